@@ -1,14 +1,23 @@
+import os
+
 import streamlit as st
-from PIL import Image
+
+from core.sidebar import LOGO_WIDTH, load_logo
 
 st.set_page_config(
     page_title = 'Home',
     page_icon = '🏠',
     layout = 'wide')
 
+# API JSON das métricas no mesmo processo (somente com CURRY_API_PORT definida): core.server carrega
+# o dataset e as métricas, e a página inicial só o importa quando a API está ligada
+if os.environ.get('CURRY_API_PORT'):
+    from core.server import start_server_from_env
+    start_server_from_env()
+
 # image_path = '/Users/fabioldossantos/Documents/repos/ftc_programacao_python/'
-image = Image.open('logo.png')
-st.sidebar.image(image, width = 180)
+# Logo decodificado e reduzido uma vez por processo (core.sidebar.load_logo)
+st.sidebar.image(load_logo(), width = LOGO_WIDTH)
 
 st.sidebar.markdown('# Curry Company')
 st.sidebar.markdown('## Fastest Delivery in Town')
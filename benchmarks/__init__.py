@@ -0,0 +1 @@
+""" Gerador de datasets sintéticos e benchmarks de escala do dashboard. """
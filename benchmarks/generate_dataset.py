@@ -0,0 +1,204 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Gerador
+# ------------------------------------------------------------------------------
+
+# Tamanhos padrão dos datasets sintéticos (linhas)
+DEFAULT_SIZES = [50_000, 1_000_000, 10_000_000]
+
+# Pasta dos CSVs gerados (fora do controle de versão)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Linhas geradas e gravadas por vez: a memória não cresce com o tamanho do arquivo
+CHUNK_ROWS = 500_000
+
+# Colunas do CSV original, na mesma ordem
+COLUMNS = ['ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings',
+           'Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',
+           'Delivery_location_longitude', 'Order_Date', 'Time_Orderd', 'Time_Order_picked',
+           'Weatherconditions', 'Road_traffic_density', 'Vehicle_condition', 'Type_of_order',
+           'Type_of_vehicle', 'multiple_deliveries', 'Festival', 'City', 'Time_taken(min)']
+
+# Valores no formato bruto do CSV original (com os espaços sobrando)
+CITIES = ['Metropolitian ', 'Urban ', 'Semi-Urban ']
+CITY_WEIGHTS = [0.75, 0.22, 0.03]
+TRAFFIC = ['Low ', 'Jam ', 'Medium ', 'High ']
+WEATHER = ['conditions Fog', 'conditions Stormy', 'conditions Cloudy',
+           'conditions Sandstorms', 'conditions Windy', 'conditions Sunny']
+ORDER_TYPES = ['Snack ', 'Meal ', 'Drinks ', 'Buffet ']
+VEHICLES = ['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle ']
+VEHICLE_WEIGHTS = [0.58, 0.33, 0.08, 0.01]
+FESTIVAL = ['No ', 'Yes ']
+FESTIVAL_WEIGHTS = [0.98, 0.02]
+
+# Sentinelas de dado ausente e a fração de linhas que as recebem, por coluna
+NAN_RATES = {'Delivery_person_Age': ('NaN ', 0.04),
+             'Delivery_person_Ratings': ('NaN ', 0.04),
+             'Time_Orderd': ('NaN ', 0.04),
+             'Weatherconditions': ('conditions NaN', 0.01),
+             'Road_traffic_density': ('NaN ', 0.01),
+             'multiple_deliveries': ('NaN ', 0.02),
+             'Festival': ('NaN ', 0.005),
+             'City': ('NaN ', 0.03)}
+
+# Entregadores: <cidade>RES<restaurante>DEL0<n>, como no dataset original
+COURIER_CITIES = ['INDO', 'BANG', 'COIMB', 'CHEN', 'HYD', 'RANCHI', 'MYS', 'DEH', 'KOC', 'PUNE',
+                  'LUDH', 'KNP', 'MUM', 'KOL', 'JAP', 'SUR', 'GOA', 'AURG', 'AGR', 'VAD', 'ALH', 'BHP']
+COURIERS = np.array([f'{cidade}RES{restaurante:02d}DEL0{n} '
+                     for cidade in COURIER_CITIES for restaurante in range(1, 21) for n in range(1, 4)],
+                    dtype=object)
+
+# Período das datas dos pedidos
+FIRST_DATE = pd.Timestamp('2022-02-11')
+DAYS = 55
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Gerar um bloco de linhas no formato bruto
+# ------------------------------------------------------------------------------
+
+def _pick(rng, valores, n, pesos=None):
+
+    return np.asarray(valores, dtype=object)[rng.choice(len(valores), size=n, p=pesos)]
+
+
+def generate_chunk(rng, first_id, n):
+
+    """ Esta função gera n linhas no formato bruto do CSV original.
+
+        Os textos vêm de tabelas pequenas pré-formatadas, indexadas por números
+        aleatórios (sem formatação linha a linha), com os espaços sobrando, o
+        prefixo '(min) ' e as sentinelas 'NaN ' / 'conditions NaN'.
+
+    Parâmetros:
+       Input:
+           - rng: gerador numpy (np.random.default_rng)
+           - first_id: número do primeiro pedido (para IDs únicos entre blocos)
+           - n: quantidade de linhas
+       Output:
+           - df: Dataframe com as colunas de COLUMNS, todas como no CSV original
+    """
+
+    idades = np.array([f'{idade} ' for idade in range(15, 51)], dtype=object)
+    avaliacoes = np.array([f'{nota / 10:.1f} ' for nota in range(10, 51)], dtype=object)
+    tempos = np.array([f'(min) {minutos}' for minutos in range(10, 55)], dtype=object)
+    datas = np.array(pd.date_range(FIRST_DATE, periods=DAYS).strftime('%d-%m-%Y'), dtype=object)
+    horas = np.array([f'{h:02d}:{m:02d}:00' for h in range(8, 24) for m in range(0, 60, 5)], dtype=object)
+
+    # Restaurante e local de entrega próximos (até ~0.2 grau), como em pedidos reais
+    restaurante_lat = rng.uniform(9.0, 31.0, n).round(6)
+    restaurante_lon = rng.uniform(72.0, 88.5, n).round(6)
+    hora_pedido = rng.integers(0, len(horas) - 3, n)
+
+    df = pd.DataFrame({
+        'ID': pd.Series(np.arange(first_id, first_id + n)).map('0x{:x} '.format),
+        'Delivery_person_ID': COURIERS[rng.integers(0, len(COURIERS), n)],
+        'Delivery_person_Age': idades[rng.integers(0, len(idades), n)],
+        'Delivery_person_Ratings': avaliacoes[rng.integers(25, len(avaliacoes), n)],
+        'Restaurant_latitude': restaurante_lat,
+        'Restaurant_longitude': restaurante_lon,
+        'Delivery_location_latitude': (restaurante_lat + rng.uniform(0.01, 0.2, n)).round(6),
+        'Delivery_location_longitude': (restaurante_lon + rng.uniform(0.01, 0.2, n)).round(6),
+        'Order_Date': datas[rng.integers(0, DAYS, n)],
+        'Time_Orderd': horas[hora_pedido],
+        'Time_Order_picked': horas[hora_pedido + rng.integers(1, 3, n)],
+        'Weatherconditions': _pick(rng, WEATHER, n),
+        'Road_traffic_density': _pick(rng, TRAFFIC, n),
+        'Vehicle_condition': rng.integers(0, 4, n),
+        'Type_of_order': _pick(rng, ORDER_TYPES, n),
+        'Type_of_vehicle': _pick(rng, VEHICLES, n, VEHICLE_WEIGHTS),
+        'multiple_deliveries': np.array(['0', '1', '2', '3'], dtype=object)[rng.integers(0, 4, n)],
+        'Festival': _pick(rng, FESTIVAL, n, FESTIVAL_WEIGHTS),
+        'City': _pick(rng, CITIES, n, CITY_WEIGHTS),
+        'Time_taken(min)': tempos[rng.integers(0, len(tempos), n)],
+    }, columns=COLUMNS)
+
+    for coluna, (sentinela, taxa) in NAN_RATES.items():
+        df.loc[rng.random(n) < taxa, coluna] = sentinela
+
+    return df
+
+
+# ------------------------------------------------------------------------------
+# Gravar um CSV sintético em blocos
+# ------------------------------------------------------------------------------
+
+def write_dataset(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+
+    """ Esta função grava um CSV sintético com o mesmo formato de dataset/train.csv.
+
+        As linhas são geradas e gravadas em blocos, então a memória usada
+        depende de chunk_rows e não do tamanho do arquivo. A mesma semente gera
+        sempre o mesmo arquivo.
+
+    Parâmetros:
+       Input:
+           - path: caminho do CSV de saída
+           - rows: quantidade total de linhas
+           - seed: semente do gerador aleatório
+           - chunk_rows: linhas por bloco
+       Output:
+           - path: caminho do CSV gravado
+    """
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with open(path, 'w', newline='') as arquivo:
+        for first_id in range(0, rows, chunk_rows):
+            bloco = generate_chunk(rng, first_id, min(chunk_rows, rows - first_id))
+            bloco.to_csv(arquivo, index=False, header=(first_id == 0))
+
+    return path
+
+
+def dataset_path(rows):
+
+    """ Esta função retorna o caminho padrão do CSV sintético com a quantidade de linhas dada. """
+
+    return os.path.join(DATA_DIR, f'train_{rows}.csv')
+
+
+def ensure_dataset(rows, seed=0):
+
+    """ Esta função grava o CSV sintético de rows linhas, se ele ainda não existir, e retorna o caminho. """
+
+    path = dataset_path(rows)
+
+    if not os.path.exists(path):
+        write_dataset(path, rows, seed=seed)
+
+    return path
+
+
+# ==============================================================================
+# Execução direta: python -m benchmarks.generate_dataset [linhas ...]
+# ==============================================================================
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Gera CSVs sintéticos no formato de dataset/train.csv.')
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES, help='quantidade de linhas de cada arquivo')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--force', action='store_true', help='regrava arquivos já existentes')
+    args = parser.parse_args()
+
+    for rows in args.sizes:
+        path = dataset_path(rows)
+        if args.force or not os.path.exists(path):
+            write_dataset(path, rows, seed=args.seed)
+        print(f'{rows:>12,} linhas -> {path} ({os.path.getsize(path) / 1e6:,.1f} MB)')
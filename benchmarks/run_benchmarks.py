@@ -0,0 +1,351 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_dataset import DEFAULT_SIZES, ensure_dataset
+from core.cleaning import clean_code, compact_dtypes
+from core.cube import build_cube
+from core.filters import CategoryBitmaps, DateIndex, default_filters, select_rows
+from core.geo import add_distance
+from core.loader import ENGINES, dataset_key
+from core.maps import MAP_MODES, map_html
+from core.sketches import build_sketches
+from core.sql import STRUCTURES, Database, SqlStats, build_database, database_path
+from core.stats import RATINGS_KEYS, RATINGS_MEASURES, GroupedStats
+from views.empresa import (order_by_week, order_metric, order_share_by_week,
+                           traffic_order_city, traffic_order_share)
+from views.entregadores import (courier_metrics, ratings_by_courier, ratings_by_traffic,
+                                ratings_by_weather, top_delivery)
+from views.restaurantes import (avg_std_graph, avg_std_time_on_traffic, courier_count, distance,
+                                festival_time_stats, mean_distance_by_type_of_order_and_city,
+                                percentile_graph, time_percentiles, time_percentiles_by_city_traffic)
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Benchmark
+# ------------------------------------------------------------------------------
+
+# Relatório padrão (fora do controle de versão)
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report.json')
+
+# Execuções de cada função; o relatório guarda o menor tempo
+DEFAULT_REPEAT = 3
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Medir uma função
+# ------------------------------------------------------------------------------
+
+def timed(func, repeat=1):
+
+    """ Esta função executa func repeat vezes e mede o menor tempo.
+
+    Parâmetros:
+       Input:
+           - func: função sem argumentos
+           - repeat: quantidade de execuções
+       Output:
+           - (segundos, resultado da última execução)
+    """
+
+    melhor = float('inf')
+
+    for _ in range(max(repeat, 1)):
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    return melhor, resultado
+
+
+# ------------------------------------------------------------------------------
+# Preparar o dataset (etapas do core.loader, medidas uma a uma)
+# ------------------------------------------------------------------------------
+
+def prepare(path):
+
+    """ Esta função repete a preparação do core.loader (sem snapshot) e mede cada etapa.
+
+    Parâmetros:
+       Input:
+           - path: caminho do CSV bruto
+       Output:
+           - timings: dicionário etapa -> segundos (as etapas da limpeza como clean_code.<etapa>)
+           - dados: dicionário com df, cube, ratings_stats, sketches, date_index e bitmaps
+    """
+
+    timings = {}
+
+    timings['read_csv'], df = timed(lambda: pd.read_csv(path))
+
+    etapas = {}
+    timings['clean_code'], df = timed(lambda: clean_code(df, timings=etapas))
+    timings.update({f'clean_code.{etapa}': segundos for etapa, segundos in etapas.items()})
+
+    timings['add_distance'], df = timed(lambda: add_distance(df))
+    timings['compact_dtypes'], df = timed(lambda: compact_dtypes(df))
+    timings['sort'], df = timed(lambda: df.sort_values('Order_Date', kind='stable', ignore_index=True))
+
+    timings['build_cube'], cube = timed(lambda: build_cube(df))
+    timings['ratings_stats'], ratings_stats = timed(lambda: GroupedStats.from_frame(df, RATINGS_KEYS,
+                                                                                     RATINGS_MEASURES))
+    timings['build_sketches'], sketches = timed(lambda: build_sketches(df))
+    timings['date_index'], date_index = timed(lambda: DateIndex.from_frame(df))
+    timings['bitmaps'], bitmaps = timed(lambda: CategoryBitmaps.from_frame(df))
+
+    dados = {'df': df, 'cube': cube, 'ratings_stats': ratings_stats, 'sketches': sketches,
+             'date_index': date_index, 'bitmaps': bitmaps}
+
+    return timings, dados
+
+
+# ------------------------------------------------------------------------------
+# Estados da barra lateral usados nas medições
+# ------------------------------------------------------------------------------
+
+def scenarios(date_index, bitmaps):
+
+    """ Esta função monta os estados dos filtros medidos.
+
+        - 'default': estado inicial da barra lateral (todas as datas e opções)
+        - 'narrow': metade do período, dois níveis de trânsito e duas cidades
+
+    Parâmetros:
+       Input:
+           - date_index: DateIndex do dataset
+           - bitmaps: CategoryBitmaps do dataset
+       Output:
+           - dicionário nome -> filtros (mesmo formato de render_sidebar)
+    """
+
+    primeiro, ultimo = date_index.first_day, date_index.last_day
+    padrao = default_filters(date_index, bitmaps)
+
+    estreito = dict(padrao, end=primeiro + (ultimo - primeiro) / 2,
+                    Road_traffic_density=['Low', 'Jam'], City=['Urban', 'Metropolitian'])
+
+    return {'default': padrao, 'narrow': estreito}
+
+
+# ------------------------------------------------------------------------------
+# Medir as funções das páginas para um estado dos filtros
+# ------------------------------------------------------------------------------
+
+def benchmark_views(dados, filtros, repeat=DEFAULT_REPEAT, rows=True):
+
+    """ Esta função mede os filtros, cada gráfico e cada tabela das páginas para um estado dos filtros.
+
+    Parâmetros:
+       Input:
+           - dados: dicionário retornado por prepare (ou por benchmark_engine)
+           - filtros: estado dos filtros (como retornado por render_sidebar)
+           - repeat: execuções de cada função (vale o menor tempo)
+           - rows: False para medir só os agregados (sem select_rows e sem os mapas, que usam as linhas)
+       Output:
+           - timings: dicionário função -> segundos, mais 'rows' e 'cells' do estado filtrado
+    """
+
+    timings = {}
+
+    if rows:
+        timings['select_rows'], df = timed(lambda: select_rows(dados['df'], dados['date_index'],
+                                                               dados['bitmaps'], **filtros), repeat)
+    timings['cube.slice'], cube = timed(lambda: dados['cube'].slice(**filtros), repeat)
+    timings['ratings_stats.slice'], ratings_stats = timed(lambda: dados['ratings_stats'].slice(**filtros), repeat)
+    timings['sketches.slice'], sketches = timed(lambda: dados['sketches'].slice(**filtros), repeat)
+
+    funcoes = {
+        # Visão Empresa
+        'order_metric': lambda: order_metric(cube),
+        'traffic_order_share': lambda: traffic_order_share(cube),
+        'traffic_order_city': lambda: traffic_order_city(cube),
+        'order_by_week': lambda: order_by_week(cube),
+        'order_share_by_week': lambda: order_share_by_week(cube),
+        # Visão Entregadores
+        'courier_metrics': lambda: courier_metrics(ratings_stats),
+        'ratings_by_courier': lambda: ratings_by_courier(ratings_stats),
+        'ratings_by_traffic': lambda: ratings_by_traffic(ratings_stats),
+        'ratings_by_weather': lambda: ratings_by_weather(ratings_stats),
+        'top_delivery': lambda: top_delivery(ratings_stats, k=10),
+        # Visão Restaurantes
+        'courier_count': lambda: courier_count(cube),
+        'distance': lambda: distance(cube, avg_by_city=False),
+        'distance_by_city': lambda: distance(cube, avg_by_city=True),
+        'festival_time_stats': lambda: festival_time_stats(cube),
+        'avg_std_time_on_traffic': lambda: avg_std_time_on_traffic(cube),
+        'avg_std_graph': lambda: avg_std_graph(cube),
+        'mean_distance_by_type_of_order_and_city': lambda: mean_distance_by_type_of_order_and_city(cube),
+        'time_percentiles': lambda: time_percentiles(sketches),
+        'time_percentiles_by_city_traffic': lambda: time_percentiles_by_city_traffic(sketches),
+        'percentile_graph': lambda: percentile_graph(sketches),
+    }
+
+    # Percentis exatos a partir das linhas filtradas, para comparar com os resumos
+    if rows:
+        funcoes['exact_percentiles'] = lambda: df['Time_taken(min)'].quantile([0.5, 0.9, 0.99])
+
+    # Mapas: agregação e HTML, sem o cache de map_html
+    if rows:
+        for modo in MAP_MODES:
+            funcoes[f'map_html.{modo}'] = (lambda modo=modo: map_html(df, modo))
+
+    for nome, funcao in funcoes.items():
+        timings[nome], _ = timed(funcao, repeat)
+
+    # Células só existem no cubo em memória (no banco embutido o slice é só o WHERE)
+    if rows:
+        timings['rows'] = len(df)
+    if hasattr(cube, 'table'):
+        timings['cells'] = len(cube.table)
+
+    return timings
+
+
+# ------------------------------------------------------------------------------
+# Medir um motor SQL (core.sql) com o mesmo dataset
+# ------------------------------------------------------------------------------
+
+def benchmark_engine(engine, path, dados, repeat=DEFAULT_REPEAT):
+
+    """ Esta função grava o dataset preparado no banco embutido e mede as funções das páginas nele.
+
+    Parâmetros:
+       Input:
+           - engine: 'sqlite' ou 'duckdb'
+           - path: caminho do CSV sintético (o banco fica ao lado)
+           - dados: dicionário retornado por prepare
+           - repeat: execuções de cada função das páginas
+       Output:
+           - dicionário com build_database, database_mb e views (por estado dos filtros)
+    """
+
+    db_path = database_path(path, engine)
+    key = dataset_key(path)
+
+    segundos, _ = timed(lambda: build_database([dados['df']], db_path, engine, key))
+    banco = Database(db_path, engine, key)
+
+    dados_sql = dict(dados)
+    for nome, (keys, measures, contagem) in STRUCTURES.items():
+        dados_sql[nome] = SqlStats(banco, keys, measures, contagem)
+
+    resultado = {'build_database': segundos,
+                 'database_mb': os.path.getsize(db_path) / 1e6,
+                 'views': {}}
+
+    for nome, filtros in scenarios(dados['date_index'], dados['bitmaps']).items():
+        resultado['views'][nome] = benchmark_views(dados_sql, filtros, repeat, rows=False)
+
+    return resultado
+
+
+# ------------------------------------------------------------------------------
+# Medir um tamanho de dataset
+# ------------------------------------------------------------------------------
+
+def benchmark_size(rows, repeat=DEFAULT_REPEAT, seed=0, engines=()):
+
+    """ Esta função gera (se preciso) o CSV com rows linhas e mede a preparação e as páginas.
+
+    Parâmetros:
+       Input:
+           - rows: quantidade de linhas do CSV sintético
+           - repeat: execuções de cada função das páginas
+           - seed: semente do gerador
+           - engines: motores SQL comparados com o pandas (ex.: ['sqlite', 'duckdb'])
+       Output:
+           - dicionário com rows, csv_mb, memory_mb, cube_cells, sketches_mb, prepare, views (por estado dos filtros)
+             e engines (motor -> resultado de benchmark_engine)
+    """
+
+    path = ensure_dataset(rows, seed=seed)
+    preparacao, dados = prepare(path)
+
+    resultado = {'rows': rows,
+                 'csv_mb': os.path.getsize(path) / 1e6,
+                 'clean_rows': len(dados['df']),
+                 'memory_mb': dados['df'].memory_usage(deep=True).sum() / 1e6,
+                 'cube_cells': len(dados['cube'].table),
+                 'sketches_mb': sum(resumo.nbytes for resumo in dados['sketches'].centroids) / 1e6,
+                 'prepare': preparacao,
+                 'views': {}}
+
+    for nome, filtros in scenarios(dados['date_index'], dados['bitmaps']).items():
+        resultado['views'][nome] = benchmark_views(dados, filtros, repeat)
+
+    resultado['engines'] = {motor: benchmark_engine(motor, path, dados, repeat) for motor in engines}
+
+    return resultado
+
+
+# ------------------------------------------------------------------------------
+# Ambiente da medição
+# ------------------------------------------------------------------------------
+
+def environment():
+
+    """ Esta função descreve o ambiente da medição (versões e máquina). """
+
+    return {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count()}
+
+
+# ==============================================================================
+# Execução direta: python -m benchmarks.run_benchmarks [--sizes N ...]
+# ==============================================================================
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Mede a preparação do dataset e as funções das páginas.')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='linhas de cada CSV sintético')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='execuções de cada função das páginas')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_REPORT, help='caminho do relatório JSON')
+    parser.add_argument('--engines', nargs='*', default=[], choices=[m for m in ENGINES if m != 'pandas'],
+                        help='motores SQL comparados com o pandas (o duckdb precisa do pacote opcional)')
+    args = parser.parse_args()
+
+    relatorio = {'environment': environment(), 'repeat': args.repeat, 'results': []}
+
+    for rows in args.sizes:
+        resultado = benchmark_size(rows, args.repeat, args.seed, args.engines)
+        relatorio['results'].append(resultado)
+
+        # Relatório regravado a cada tamanho: uma execução interrompida mantém o que já foi medido
+        with open(args.output, 'w') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, default=str)
+
+        lentas = sorted(((s, f'{estado}:{nome}') for estado, medidas in resultado['views'].items()
+                         for nome, s in medidas.items() if nome not in ('rows', 'cells')), reverse=True)[:5]
+        print(f'{rows:>12,} linhas: preparação {sum(v for k, v in resultado["prepare"].items() if "." not in k):.2f}s; '
+              f'mais lentas: ' + ', '.join(f'{nome} {s * 1000:.1f}ms' for s, nome in lentas))
+
+        for motor, medidas in resultado['engines'].items():
+            total = {estado: sum(v for k, v in m.items() if k != 'cells') for estado, m in medidas['views'].items()}
+            pandas_total = {estado: sum(v for k, v in m.items() if k in medidas['views'][estado] and k != 'cells')
+                            for estado, m in resultado['views'].items()}
+            print(f'{"":>12}  {motor}: banco {medidas["build_database"]:.2f}s; agregados ' +
+                  ', '.join(f'{estado} {total[estado] * 1000:.1f}ms (pandas {pandas_total[estado] * 1000:.1f}ms)'
+                            for estado in total))
+
+    print(f'Relatório: {args.output}')
@@ -0,0 +1,142 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.run_benchmarks import environment
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Relatório de Inicialização
+# ------------------------------------------------------------------------------
+
+# Raiz do repositório (Home.py e pages/)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relatório padrão (fora do controle de versão)
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup.json')
+
+# Execuções de cada página; o relatório guarda todas (a primeira inclui a gravação do snapshot)
+DEFAULT_REPEAT = 3
+
+# Bibliotecas pesadas de gráficos, mapas e imagens: devem ser importadas só onde são usadas
+HEAVY_PACKAGES = ('plotly', 'folium', 'branca', 'haversine', 'streamlit_folium', 'PIL', 'matplotlib')
+
+# Importações listadas no relatório (as mais lentas, pelo tempo acumulado)
+TOP_IMPORTS = 10
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Páginas do app
+# ------------------------------------------------------------------------------
+
+def app_scripts():
+
+    """ Esta função lista os scripts do app: Home.py e as páginas, na ordem do menu. """
+
+    return ['Home.py'] + sorted(os.path.relpath(p, REPO_DIR) for p in glob.glob(os.path.join(REPO_DIR, 'pages', '*.py')))
+
+
+# ------------------------------------------------------------------------------
+# Ler a saída de python -X importtime
+# ------------------------------------------------------------------------------
+
+def parse_importtime(stderr):
+
+    """ Esta função lê as linhas de python -X importtime.
+
+    Parâmetros:
+       Input:
+           - stderr: saída de erro do processo
+       Output:
+           - lista de (módulo, segundos acumulados, importado no nível de cima)
+    """
+
+    importacoes = []
+
+    for linha in stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        importacoes.append((nome.strip(), int(acumulado) / 1e6, not nome[1:].startswith(' ')))
+
+    return importacoes
+
+
+# ------------------------------------------------------------------------------
+# Medir uma página em um processo novo
+# ------------------------------------------------------------------------------
+
+def run_script(script, app_dir):
+
+    """ Esta função executa o script em um processo Python novo (modo bare do Streamlit) e mede a inicialização.
+
+    Parâmetros:
+       Input:
+           - script: caminho do script relativo à raiz do repositório
+           - app_dir: pasta de trabalho do app (com dataset/train.csv e logo.png)
+       Output:
+           - dicionário com first_render_s (processo inteiro: interpretador, importações e
+             primeira execução da página), import_s, top_imports e heavy_packages
+    """
+
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore', os.path.join(REPO_DIR, script)],
+                              cwd=app_dir, env=ambiente, capture_output=True, text=True)
+    segundos = time.perf_counter() - inicio
+
+    if processo.returncode != 0:
+        raise RuntimeError(f'{script} terminou com código {processo.returncode}:\n{processo.stderr[-2000:]}')
+
+    importacoes = parse_importtime(processo.stderr)
+    nivel_de_cima = sorted(((s, nome) for nome, s, topo in importacoes if topo), reverse=True)
+    pacotes = {nome.split('.')[0] for nome, _, _ in importacoes}
+
+    return {'first_render_s': segundos,
+            'import_s': sum(s for s, _ in nivel_de_cima),
+            'top_imports': {nome: s for s, nome in nivel_de_cima[:TOP_IMPORTS]},
+            'heavy_packages': sorted(pacotes.intersection(HEAVY_PACKAGES))}
+
+
+# ==============================================================================
+# Execução direta: python -m benchmarks.startup [--app-dir pasta] [--repeat N]
+# ==============================================================================
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Mede as importações e a primeira renderização de cada página.')
+    parser.add_argument('--app-dir', default='.', help='pasta de trabalho do app (com dataset/train.csv e logo.png)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='processos novos por página')
+    parser.add_argument('--output', default=DEFAULT_REPORT, help='caminho do relatório JSON')
+    args = parser.parse_args()
+
+    relatorio = {'environment': environment(), 'repeat': args.repeat, 'results': {}}
+
+    for script in app_scripts():
+        execucoes = [run_script(script, args.app_dir) for _ in range(max(args.repeat, 1))]
+        relatorio['results'][script] = execucoes
+
+        melhor = min(execucoes, key=lambda e: e['first_render_s'])
+        print(f'{script:<32} primeira renderização {melhor["first_render_s"]:.2f}s; '
+              f'importações {melhor["import_s"]:.2f}s; '
+              f'pesadas: {", ".join(melhor["heavy_packages"]) or "-"}; '
+              f'mais lentas: ' + ', '.join(f'{nome} {s * 1000:.0f}ms' for nome, s in list(melhor['top_imports'].items())[:3]))
+
+    with open(args.output, 'w') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, default=str)
+
+    print(f'Relatório: {args.output}')
@@ -0,0 +1,265 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.cube import load_cube
+from core.filters import (FILTER_COLUMNS, default_filters, load_bitmaps, load_date_index,
+                          normalize_filters, select_rows)
+from core.loader import DATASET_PATH, load_dataset
+from core.results import cached_call, result_state
+from core.sketches import load_sketches
+from core.stats import load_ratings_stats
+from views.empresa import (orders_by_city_traffic, orders_by_day, orders_by_week,
+                           orders_per_courier_by_week, traffic_share)
+from views.entregadores import (courier_metrics, ratings_by_courier, ratings_by_traffic,
+                                ratings_by_weather, top_delivery)
+from views.restaurantes import (courier_count, distance_by_city, distance_stats, festival_time_stats,
+                                mean_distance_by_type_of_order_and_city, time_by_city, time_by_city_traffic,
+                                time_percentiles, time_percentiles_by_city, time_percentiles_by_city_traffic)
+
+
+# ------------------------------------------------------------------------------
+# Métricas disponíveis
+# ------------------------------------------------------------------------------
+
+# Nome -> (fonte dos dados, função). Fontes: 'cube' (cubo de pedidos filtrado),
+# 'ratings' (estatísticas das avaliações filtradas), 'sketches' (resumos de quantis filtrados)
+# e 'rows' (linhas filtradas)
+METRICS = {
+    # Visão Empresa
+    'orders_by_day': ('cube', orders_by_day),
+    'orders_by_week': ('cube', orders_by_week),
+    'orders_per_courier_by_week': ('cube', orders_per_courier_by_week),
+    'traffic_share': ('cube', traffic_share),
+    'orders_by_city_traffic': ('cube', orders_by_city_traffic),
+    # Visão Entregadores
+    'courier_metrics': ('ratings', courier_metrics),
+    'ratings_by_courier': ('ratings', ratings_by_courier),
+    'ratings_by_traffic': ('ratings', ratings_by_traffic),
+    'ratings_by_weather': ('ratings', ratings_by_weather),
+    'top_couriers': ('ratings', top_delivery),
+    # Visão Restaurantes
+    'courier_count': ('cube', courier_count),
+    'distance_stats': ('cube', distance_stats),
+    'distance_by_city': ('cube', distance_by_city),
+    'festival_time_stats': ('cube', festival_time_stats),
+    'time_by_city': ('cube', time_by_city),
+    'time_by_city_traffic': ('cube', time_by_city_traffic),
+    'time_by_city_and_order_type': ('cube', mean_distance_by_type_of_order_and_city),
+    'time_percentiles': ('sketches', time_percentiles),
+    'time_percentiles_by_city': ('sketches', time_percentiles_by_city),
+    'time_percentiles_by_city_traffic': ('sketches', time_percentiles_by_city_traffic),
+}
+
+# ------------------------------------------------------------------------------
+# Parâmetros das métricas
+# ------------------------------------------------------------------------------
+
+def positive_int(texto):
+
+    """ Esta função converte o texto de um parâmetro da URL em um inteiro >= 1 (ValueError se não for). """
+
+    valor = int(texto)
+    if valor < 1:
+        raise ValueError(f'o valor deve ser um inteiro >= 1, recebido {valor}')
+
+    return valor
+
+
+# Parâmetros aceitos por métrica, além dos filtros: nome -> conversor (ValueError responde 400 na API)
+METRIC_PARAMS = {'top_couriers': {'k': positive_int}}
+
+# Nomes das partes das métricas que retornam mais de uma tabela
+RESULT_PARTS = {'top_couriers': ('fastest', 'slowest')}
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Filtros: estado inicial da barra lateral + alterações pedidas
+# ------------------------------------------------------------------------------
+
+def resolve_filters(filtros=None, path=DATASET_PATH):
+
+    """ Esta função completa os filtros pedidos com o estado inicial da barra lateral.
+
+    Parâmetros:
+       Input:
+           - filtros: dicionário parcial no formato de render_sidebar ('start', 'end'
+             exclusivo e listas de valores por coluna); None usa só o estado inicial
+           - path: caminho do arquivo CSV
+       Output:
+           - filtros completos
+    """
+
+    completos = default_filters(load_date_index(path), load_bitmaps(path))
+    completos.update(filtros or {})
+
+    return completos
+
+
+def parse_query(params):
+
+    """ Esta função converte os parâmetros de uma URL nos filtros e parâmetros de uma métrica.
+
+        - start / end: datas AAAA-MM-DD, ambas inclusivas, como no slider da barra lateral
+        - colunas de FILTER_COLUMNS: valores separados por vírgula ou parâmetro repetido
+        - demais parâmetros: os de METRIC_PARAMS da métrica
+
+    Parâmetros:
+       Input:
+           - params: dicionário nome -> lista de textos (urllib.parse.parse_qs)
+       Output:
+           - (filtros, demais parâmetros)
+    """
+
+    filtros, outros = {}, {}
+
+    for nome, valores in params.items():
+        if nome == 'start':
+            filtros['start'] = datetime.strptime(valores[-1], '%Y-%m-%d')
+        elif nome == 'end':
+            filtros['end'] = datetime.strptime(valores[-1], '%Y-%m-%d') + timedelta(days=1)
+        elif nome in FILTER_COLUMNS:
+            filtros[nome] = [v.strip() for valor in valores for v in valor.split(',') if v.strip()]
+        else:
+            outros[nome] = valores[-1]
+
+    return filtros, outros
+
+
+# ------------------------------------------------------------------------------
+# Calcular uma métrica
+# ------------------------------------------------------------------------------
+
+def compute(name, filtros=None, path=DATASET_PATH, **params):
+
+    """ Esta função calcula uma métrica do dashboard sem o Streamlit.
+
+        Usa o mesmo dataset, os mesmos agregados e o mesmo cache de resultados
+        das páginas do processo: a mesma métrica com os mesmos filtros é
+        calculada uma única vez, venha da página ou da API.
+
+    Parâmetros:
+       Input:
+           - name: nome da métrica (chave de METRICS)
+           - filtros: filtros no formato de render_sidebar (parcial; o resto vem do estado inicial)
+           - path: caminho do arquivo CSV
+           - params: parâmetros da métrica (METRIC_PARAMS), ex.: k=5 em top_couriers
+       Output:
+           - resultado da função da métrica (dataframe, número, dicionário ou tupla de dataframes)
+    """
+
+    if name not in METRICS:
+        raise KeyError(f'métrica desconhecida: {name}')
+
+    aceitos = METRIC_PARAMS.get(name, {})
+    desconhecidos = set(params) - set(aceitos)
+    if desconhecidos:
+        raise ValueError(f'parâmetros não aceitos por {name}: {sorted(desconhecidos)}')
+    convertidos = {}
+    for nome, valor in params.items():
+        try:
+            convertidos[nome] = aceitos[nome](valor)
+        except ValueError as erro:
+            raise ValueError(f'{nome} inválido para {name}: {erro}') from erro
+    params = convertidos
+
+    fonte, funcao = METRICS[name]
+    filtros = resolve_filters(filtros, path)
+    estado = result_state(filtros, path)
+
+    return cached_call(estado, funcao, source_data(fonte, filtros, path), **params)
+
+
+# ------------------------------------------------------------------------------
+# Dados filtrados de uma fonte
+# ------------------------------------------------------------------------------
+
+def source_data(fonte, filtros, path=DATASET_PATH):
+
+    """ Esta função aplica os filtros (completos) a uma fonte de dados do dataset em cache.
+
+    Parâmetros:
+       Input:
+           - fonte: 'cube' (cubo de pedidos), 'ratings' (estatísticas das avaliações),
+             'sketches' (resumos de quantis) ou 'rows' (linhas)
+           - filtros: filtros completos (resolve_filters)
+           - path: caminho do arquivo CSV
+       Output:
+           - OrderCube, GroupedStats, QuantileSketches ou Dataframe filtrado
+    """
+
+    estado = result_state(filtros, path)
+
+    if fonte == 'cube':
+        return cached_call(estado, load_cube(path).slice, **filtros)
+    if fonte == 'ratings':
+        return cached_call(estado, load_ratings_stats(path).slice, **filtros)
+    if fonte == 'sketches':
+        return cached_call(estado, load_sketches(path).slice, **filtros)
+    if fonte == 'rows':
+        return select_rows(load_dataset(path), load_date_index(path), load_bitmaps(path), **filtros)
+
+    raise ValueError(f'fonte desconhecida: {fonte}')
+
+
+# ------------------------------------------------------------------------------
+# Resultado em formato JSON
+# ------------------------------------------------------------------------------
+
+def to_payload(resultado, partes=None):
+
+    """ Esta função converte o resultado de uma métrica em tipos serializáveis em JSON.
+
+    Parâmetros:
+       Input:
+           - resultado: dataframe, Series, número, dicionário ou tupla
+           - partes: nomes das partes quando o resultado é uma tupla (RESULT_PARTS)
+       Output:
+           - lista de registros, número, texto ou dicionário
+    """
+
+    if isinstance(resultado, pd.DataFrame):
+        if resultado.index.name is not None:
+            resultado = resultado.reset_index()
+        return json.loads(resultado.to_json(orient='records', date_format='iso'))
+    if isinstance(resultado, pd.Series):
+        return to_payload(resultado.to_frame())
+    if isinstance(resultado, tuple):
+        partes = partes or [str(i) for i in range(len(resultado))]
+        return {parte: to_payload(valor) for parte, valor in zip(partes, resultado)}
+    if isinstance(resultado, dict):
+        return {str(k): to_payload(v) for k, v in resultado.items()}
+    if isinstance(resultado, np.generic):
+        resultado = resultado.item()
+    if isinstance(resultado, float) and np.isnan(resultado):
+        return None
+
+    return resultado
+
+
+def metric_payload(name, filtros=None, path=DATASET_PATH, **params):
+
+    """ Esta função calcula uma métrica e monta a resposta JSON (métrica, filtros e dados).
+
+    Parâmetros:
+       Input:
+           - name, filtros, path, params: como em compute
+       Output:
+           - dicionário com 'metric', 'filters' (estado completo, normalizado) e 'data'
+    """
+
+    resultado = compute(name, filtros, path, **params)
+
+    return {'metric': name,
+            'filters': dict(normalize_filters(resolve_filters(filtros, path))),
+            'data': to_payload(resultado, RESULT_PARTS.get(name))}
@@ -0,0 +1,218 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------------------------------------------------------
+# Configuração da Limpeza
+# ------------------------------------------------------------------------------
+
+# Colunas de texto que chegam com espaços sobrando no CSV
+TEXT_COLUMNS = ['ID', 'Delivery_person_ID', 'Road_traffic_density', 'Type_of_order',
+                'Type_of_vehicle', 'City', 'Weatherconditions', 'multiple_deliveries',
+                'Festival', 'Delivery_person_Age', 'Delivery_person_Ratings']
+
+# Valores que representam dado ausente em cada coluna (após remover os espaços)
+NAN_SENTINELS = {'Weatherconditions': 'conditions NaN',
+                 'multiple_deliveries': 'NaN',
+                 'Festival': 'NaN',
+                 'City': 'NaN',
+                 'Delivery_person_Age': 'NaN',
+                 'Delivery_person_Ratings': 'NaN'}
+
+# Tipos numéricos finais, convertidos em uma única chamada
+NUMERIC_TYPES = {'Time_taken(min)': int,
+                 'Delivery_person_Age': int,
+                 'Delivery_person_Ratings': float}
+
+# Schema compacto aplicado ao dataset preparado
+COMPACT_TYPES = {'City': 'category',
+                 'Road_traffic_density': 'category',
+                 'Weatherconditions': 'category',
+                 'Type_of_order': 'category',
+                 'Type_of_vehicle': 'category',
+                 'Festival': 'category',
+                 'multiple_deliveries': 'category',
+                 'Delivery_person_ID': 'category',
+                 'Vehicle_condition': 'int8',
+                 'Delivery_person_Age': 'int8',
+                 'Time_taken(min)': 'int16',
+                 'Delivery_person_Ratings': 'float32',
+                 'Restaurant_latitude': 'float32',
+                 'Restaurant_longitude': 'float32',
+                 'Delivery_location_latitude': 'float32',
+                 'Delivery_location_longitude': 'float32'}
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Limpandos os dados 
+# ------------------------------------------------------------------------------
+
+def clean_code(df, timings=None):
+    
+    """ Está função tem a responsabilidade de limpar o dafaframe.
+        
+        Tipos de limpezas:
+        1. Remoção dos espaços das variáveis de texto;
+        2. Remoção dos dados NaN (uma única máscara para todas as colunas);
+        3. Limpeza da coluna de tempo (remoção do texto '(min) ');
+        4. Mudança do tipo das colunas numéricas (uma única conversão);
+        5. Formatação da coluna de datas.
+        
+        Input:
+            - df: Dataframe lido do CSV
+            - timings: dicionário opcional que recebe o tempo (s) de cada etapa
+        Output: Dataframe
+    """
+
+    etapas = {}
+    inicio = time.perf_counter()
+
+    # Eliminar espaços dos textos
+
+    for coluna in TEXT_COLUMNS:
+        df[coluna] = df[coluna].str.strip()
+
+    etapas['strip'] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+
+    # Excluindo Linhas com Dados NaN (uma máscara combinada, uma única cópia)
+
+    linhas_nao_vazias = pd.Series(True, index=df.index)
+    for coluna, sentinela in NAN_SENTINELS.items():
+        linhas_nao_vazias &= df[coluna] != sentinela
+
+    df = df.loc[linhas_nao_vazias, :].copy()
+
+    etapas['nan_filter'] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+
+    # Remover o texto (min) da coluna Time Taken
+
+    df['Time_taken(min)'] = df['Time_taken(min)'].str.replace('(min) ', '', regex=False)
+
+    etapas['time_taken'] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+
+    # Conversão de texto / categoria / string para números inteiros e decimais
+
+    df = df.astype(NUMERIC_TYPES)
+
+    etapas['dtypes'] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+
+    # Conversão de texto / string para datas
+
+    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
+
+    etapas['dates'] = time.perf_counter() - inicio
+
+    if timings is not None:
+        timings.update(etapas)
+    
+    return df
+
+
+# ------------------------------------------------------------------------------
+# Schema compacto
+# ------------------------------------------------------------------------------
+
+def compact_dtypes(df):
+
+    """ Esta função converte o dataframe limpo para o schema compacto (COMPACT_TYPES).
+
+        Colunas de poucos valores viram category (Delivery_person_ID incluso,
+        como dicionário), inteiros pequenos viram int8/int16 e as coordenadas
+        viram float32. Os groupby sobre colunas category devem usar observed=True.
+
+        Input: Dataframe limpo
+        Output: Dataframe com o schema compacto
+    """
+
+    return df.astype(COMPACT_TYPES)
+
+
+# ------------------------------------------------------------------------------
+# Concatenar dataframes mantendo as colunas category
+# ------------------------------------------------------------------------------
+
+def concat_frames(frames):
+
+    """ Esta função concatena dataframes de mesmo schema sem perder as colunas category.
+
+        O pd.concat de colunas category com categorias diferentes vira object.
+        Aqui as categorias são unidas antes e ordenadas, como as do astype
+        do dataset completo: os agregados de uma ingestão incremental ou do
+        modo streaming saem na mesma ordem do carregamento completo. Os
+        códigos dos dataframes de entrada podem mudar (ver OrderCube.merge).
+
+        Input: lista de Dataframes com as mesmas colunas
+        Output: Dataframe concatenado, com índice novo
+    """
+
+    frames = [frame for frame in frames if frame is not None]
+    primeiro = frames[0]
+    alinhados = [frame.copy(deep=False) for frame in frames]
+
+    for coluna in primeiro.columns:
+        if not all(isinstance(frame[coluna].dtype, pd.CategoricalDtype) for frame in frames):
+            continue
+
+        categorias = pd.Index(primeiro[coluna].cat.categories)
+        for frame in frames[1:]:
+            categorias = categorias.append(frame[coluna].cat.categories.difference(categorias, sort=False))
+        categorias = categorias.sort_values()
+
+        for frame in alinhados:
+            if not frame[coluna].cat.categories.equals(categorias):
+                frame[coluna] = frame[coluna].cat.set_categories(categorias)
+
+    return pd.concat(alinhados, ignore_index=True)
+
+
+# ------------------------------------------------------------------------------
+# Relatório de memória
+# ------------------------------------------------------------------------------
+
+def memory_report(before, after):
+
+    """ Esta função compara o uso de memória de cada coluna antes e depois da compactação.
+
+    Parâmetros:
+       Input:
+           - before: Dataframe com o schema original
+           - after: Dataframe com o schema compacto
+       Output:
+           - df_aux: dataframe com os tipos, bytes antes, bytes depois e a redução (%) por coluna,
+             com uma linha de total no final
+    """
+
+    df_aux = pd.DataFrame({'dtype_before': before.dtypes.astype(str),
+                           'dtype_after': after.dtypes.astype(str),
+                           'bytes_before': before.memory_usage(index=False, deep=True),
+                           'bytes_after': after.memory_usage(index=False, deep=True)})
+
+    df_aux.loc['Total', ['bytes_before', 'bytes_after']] = df_aux[['bytes_before', 'bytes_after']].sum()
+    df_aux['reduction_pct'] = np.round(100 * (1 - df_aux['bytes_after'] / df_aux['bytes_before']), 1)
+
+    return df_aux
+
+
+# ==============================================================================
+# Relatório de memória pela linha de comando: python -m core.cleaning [csv]
+# ==============================================================================
+
+if __name__ == '__main__':
+    import sys
+
+    df = clean_code(pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else 'dataset/train.csv'))
+    print(memory_report(df, compact_dtypes(df)).to_string())
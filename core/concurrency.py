@@ -0,0 +1,172 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import contextvars
+import os
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core.profiling import PageProfiler
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Pool de Cálculo
+# ------------------------------------------------------------------------------
+
+# Threads do pool compartilhado pelas sessões do processo (padrão: núcleos da máquina)
+WORKERS_ENV = 'CURRY_WORKERS'
+
+# Tarefas em execução ao mesmo tempo por sessão; CURRY_SESSION_WORKERS=0 calcula tudo na thread da página
+SESSION_LIMIT_ENV = 'CURRY_SESSION_WORKERS'
+DEFAULT_SESSION_LIMIT = 4
+
+_pool = None
+_lock = threading.Lock()
+
+# Vagas de cada sessão do Streamlit, por limite (session_state -> {limite: semáforo}): somem junto com a sessão
+_sessions = weakref.WeakKeyDictionary()
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class PageTasks:
+
+    """ Cálculos independentes de uma execução de página, enviados ao pool.
+
+        A página envia (submit) as agregações e os gráficos de uma seção logo
+        no início e depois desenha na ordem do layout, pedindo cada resultado
+        (Future.result) no ponto em que ele aparece. As chamadas st.* ficam na
+        thread da página; as tarefas só calculam.
+
+        Cada sessão tem no máximo session_limit tarefas em execução: acima
+        disso, submit espera uma vaga, e uma sessão com muitos gráficos não
+        ocupa o pool inteiro.
+    """
+
+    def __init__(self, profiler=None, limit=None):
+
+        self.profiler = profiler if profiler is not None else PageProfiler(None, False)
+        self.limit = session_limit() if limit is None else limit
+        self._vagas = _session_slots(self.limit) if self.limit > 0 else None
+
+    def submit(self, name, func, *args, **kwargs):
+
+        """ Esta função envia func(*args, **kwargs) ao pool, medida como a etapa name do perfil.
+
+            A tarefa roda com uma cópia do contexto da página (a versão do
+            dataset fixada por pin_dataset vale nela).
+
+        Parâmetros:
+           Input:
+               - name: nome da etapa
+               - func: função calculada
+               - args, kwargs: argumentos de func
+           Output:
+               - Future com o resultado (já concluído quando o limite é 0)
+        """
+
+        if self._vagas is None:
+            return _run_inline(self.profiler.call, name, func, *args, **kwargs)
+
+        self._vagas.acquire()
+        try:
+            future = worker_pool().submit(contextvars.copy_context().run, self.profiler.call, name, func, *args, **kwargs)
+        except BaseException:
+            self._vagas.release()
+            raise
+
+        future.add_done_callback(lambda _: self._vagas.release())
+
+        return future
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Configuração pelas variáveis de ambiente
+# ------------------------------------------------------------------------------
+
+def _env_int(name, default):
+
+    valor = os.environ.get(name, '').strip()
+
+    return max(int(valor), 0) if valor else default
+
+
+def session_limit():
+
+    """ Esta função retorna o limite de tarefas em execução por sessão (CURRY_SESSION_WORKERS, padrão DEFAULT_SESSION_LIMIT). """
+
+    return _env_int(SESSION_LIMIT_ENV, DEFAULT_SESSION_LIMIT)
+
+
+# ------------------------------------------------------------------------------
+# Pool do processo e vagas da sessão
+# ------------------------------------------------------------------------------
+
+def worker_pool():
+
+    """ Esta função retorna o pool de threads do processo, criado no primeiro uso.
+
+        O número de threads é lido de CURRY_WORKERS só nessa criação; mudar a
+        variável depois vale apenas para um novo processo.
+
+    Parâmetros:
+       Output:
+           - ThreadPoolExecutor com CURRY_WORKERS threads (padrão: os.cpu_count())
+    """
+
+    global _pool
+
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(_env_int(WORKERS_ENV, os.cpu_count() or 1), 1),
+                                       thread_name_prefix='curry-worker')
+
+    return _pool
+
+
+def _session_slots(limit):
+
+    """ Esta função retorna o semáforo de vagas da sessão do Streamlit em execução para o limite limit.
+
+        A sessão é identificada pelo session_state do contexto da execução;
+        fora do servidor (modo bare, linha de comando) cada PageTasks tem as
+        suas próprias vagas. Cada limite tem o seu semáforo: quando
+        CURRY_SESSION_WORKERS muda, as execuções seguintes da sessão usam o
+        novo limite, e as tarefas ainda em curso devolvem as vagas ao
+        semáforo antigo.
+    """
+
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+
+    if ctx is None:
+        return threading.BoundedSemaphore(limit)
+
+    with _lock:
+        por_limite = _sessions.setdefault(ctx.session_state, {})
+        vagas = por_limite.get(limit)
+        if vagas is None:
+            vagas = por_limite[limit] = threading.BoundedSemaphore(limit)
+
+    return vagas
+
+
+def _run_inline(func, *args, **kwargs):
+
+    future = Future()
+
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as erro:
+        future.set_exception(erro)
+
+    return future
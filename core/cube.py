@@ -0,0 +1,191 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+from core.loader import DATASET_PATH, load_derived, query_engine, register_derived
+from core.stats import GroupedStats, accumulate, merge_tables
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Cubo
+# ------------------------------------------------------------------------------
+
+# Dimensões no grão mais fino usado pelos gráficos e pelos filtros da barra lateral
+CUBE_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density',
+                   'Weatherconditions', 'Festival', 'Type_of_order', 'Type_of_vehicle']
+
+# Medidas agregadas: prefixo -> coluna do dataset
+CUBE_MEASURES = {'time': 'Time_taken(min)',
+                 'distance': 'distance_km'}
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class OrderCube(GroupedStats):
+
+    """ Cubo OLAP dos pedidos, no grão (Order_Date, City, Road_traffic_density,
+        Weatherconditions, Festival, Type_of_order, Type_of_vehicle).
+
+        Além das estatísticas de core.stats.GroupedStats (contagem em 'orders'),
+        os entregadores distintos de cada célula ficam em um array ordenado de
+        códigos de Delivery_person_ID, que pode ser unido entre células para
+        contar entregadores distintos.
+    """
+
+    count_column = 'orders'
+
+    def __init__(self, table, couriers, courier_ids):
+
+        super().__init__(table, CUBE_DIMENSIONS, CUBE_MEASURES)
+        self.couriers = couriers
+        self.courier_ids = courier_ids
+
+    def _take(self, posicoes):
+
+        return OrderCube(self.table.iloc[posicoes].reset_index(drop=True),
+                         [self.couriers[i] for i in posicoes],
+                         self.courier_ids)
+
+    # --------------------------------------------------------------------------
+    # Somar as células de outro cubo (ingestão incremental)
+    # --------------------------------------------------------------------------
+
+    def merge(self, other):
+
+        """ Esta função soma as células de outro cubo (ex.: de um lote novo) às células atuais.
+
+            Os entregadores de células presentes nos dois cubos são unidos. As
+            categorias de Delivery_person_ID de other devem conter as de self
+            (o lote concatenado ao histórico, como em core.ingest); os códigos
+            de self são traduzidos para elas.
+
+        Parâmetros:
+           Input:
+               - other: OrderCube do lote
+           Output:
+               - novo OrderCube com as células combinadas
+        """
+
+        table, celula_self, celula_other = merge_tables(self.table, other.table, self.keys,
+                                                        self.measures, self.count_column)
+
+        # concat_frames ordena as categorias unidas: os entregadores novos podem deslocar os códigos de self
+        if self.courier_ids.equals(other.courier_ids):
+            codigos_self = self.couriers
+        else:
+            mapa = other.courier_ids.get_indexer(self.courier_ids).astype(np.int32)
+            codigos_self = [mapa[codigos] for codigos in self.couriers]
+
+        couriers = [None] * len(table)
+        for celula, codigos in zip(celula_self, codigos_self):
+            couriers[celula] = codigos
+        for celula, codigos in zip(celula_other, other.couriers):
+            couriers[celula] = codigos if couriers[celula] is None else np.union1d(couriers[celula], codigos)
+
+        return OrderCube(table, couriers, other.courier_ids)
+
+    # --------------------------------------------------------------------------
+    # Agregar células
+    # --------------------------------------------------------------------------
+
+    def rollup(self, by, couriers=False):
+
+        """ Esta função agrega as células do cubo em um grão mais grosso.
+
+        Parâmetros:
+           Input:
+               - by: lista de dimensões (ou chaves derivadas, ex.: 'week_of_year');
+                 lista vazia retorna uma única linha com o total
+               - couriers: True para contar os entregadores distintos de cada grupo
+           Output:
+               - df_aux: dataframe com as chaves, 'orders' e, para cada medida,
+                 <medida>_mean, <medida>_std (amostral), <medida>_min e <medida>_max;
+                 com couriers=True, a coluna 'couriers'
+        """
+
+        df_aux = super().rollup(by)
+
+        if couriers:
+            chaves = self._group_keys(by)
+            if chaves:
+                indices = self.table.groupby(chaves, observed=True).indices
+            else:
+                indices = {0: np.arange(len(self.table))}
+
+            distintos = pd.Series([len(np.unique(np.concatenate([self.couriers[i] for i in p] or [[]])))
+                                   for p in indices.values()],
+                                  index=list(indices.keys()), dtype='int64')
+
+            if chaves:
+                df_aux['couriers'] = distintos.reindex(pd.MultiIndex.from_frame(df_aux[by])
+                                                       if len(by) > 1 else df_aux[by[0]]).to_numpy()
+            else:
+                df_aux['couriers'] = distintos.to_numpy()
+
+        return df_aux
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Construir o cubo
+# ------------------------------------------------------------------------------
+
+def build_cube(df):
+
+    """ Esta função constrói o cubo de pedidos a partir do dataset limpo, em uma única passada.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe limpo (schema compacto, com distance_km)
+       Output:
+           - OrderCube
+    """
+
+    table, celula = accumulate(df, CUBE_DIMENSIONS, CUBE_MEASURES, OrderCube.count_column)
+
+    # Entregadores distintos por célula: pares (célula, entregador) únicos, ordenados por célula
+    entregadores = df['Delivery_person_ID'].astype('category')
+    codigos = entregadores.cat.codes.to_numpy().astype(np.int64)
+    n_entregadores = max(len(entregadores.cat.categories), 1)
+
+    pares = np.unique(celula * n_entregadores + codigos)
+    cortes = np.searchsorted(pares // n_entregadores, np.arange(1, len(table)))
+    couriers = np.split((pares % n_entregadores).astype(np.int32), cortes)
+
+    return OrderCube(table, couriers, entregadores.cat.categories)
+
+
+# ------------------------------------------------------------------------------
+# Cubo do dataset em cache
+# ------------------------------------------------------------------------------
+
+def load_cube(path=DATASET_PATH):
+
+    """ Esta função retorna o cubo do dataset, construído uma única vez por versão do arquivo.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - OrderCube (somente leitura); com CURRY_ENGINE=sqlite/duckdb, o
+             core.sql.SqlStats equivalente, calculado no banco embutido
+    """
+
+    motor = query_engine()
+
+    if motor != 'pandas':
+        from core.sql import load_sql_stats
+        return load_sql_stats('cube', motor, path)
+
+    return load_derived('cube', path)
+
+
+register_derived('cube', build_cube, lambda cube, batch, df: cube.merge(build_cube(batch)))
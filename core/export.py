@@ -0,0 +1,262 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from functools import partial
+
+import pandas as pd
+
+from core.api import METRICS, RESULT_PARTS, compute, resolve_filters, source_data, to_payload
+from core.cube import load_cube
+from core.filters import load_bitmaps, load_date_index, normalize_filters
+from core.loader import DATASET_PATH
+from core.sketches import load_sketches
+from core.stats import load_ratings_stats
+from views.empresa import (order_by_week, order_metric, order_share_by_week,
+                           traffic_order_city, traffic_order_share)
+from views.restaurantes import avg_std_graph, avg_std_time_on_traffic, distance, percentile_graph
+
+
+# ------------------------------------------------------------------------------
+# Configuração da Exportação
+# ------------------------------------------------------------------------------
+
+# Figuras das páginas: nome -> (fonte dos dados, função que gera a figura)
+FIGURES = {
+    # Visão Empresa
+    'order_metric': ('cube', order_metric),
+    'traffic_order_share': ('cube', traffic_order_share),
+    'traffic_order_city': ('cube', traffic_order_city),
+    'order_by_week': ('cube', order_by_week),
+    'order_share_by_week': ('cube', order_share_by_week),
+    # Visão Restaurantes
+    'distance_by_city': ('cube', partial(distance, avg_by_city=True)),
+    'avg_std_time_on_traffic': ('cube', avg_std_time_on_traffic),
+    'avg_std_graph': ('cube', avg_std_graph),
+    'percentile_graph': ('sketches', percentile_graph),
+}
+
+# Formatos: figuras em html/json/png, tabelas (core.api.METRICS) em html/json
+FORMATS = ('html', 'json', 'png')
+DEFAULT_FORMATS = ('html', 'json')
+
+# Conjuntos de presets disponíveis na linha de comando
+PRESET_KINDS = ('all', 'weekly', 'city')
+
+DEFAULT_OUTPUT = 'reports'
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Presets de filtros
+# ------------------------------------------------------------------------------
+
+def build_presets(kinds, path=DATASET_PATH):
+
+    """ Esta função monta os presets de filtros dos relatórios.
+
+        - 'all': estado inicial da barra lateral (todo o período)
+        - 'weekly': uma semana por preset, de domingo a sábado (mesma semana de week_of_year)
+        - 'city': uma cidade por preset, todo o período
+
+    Parâmetros:
+       Input:
+           - kinds: lista de tipos de preset (PRESET_KINDS)
+           - path: caminho do arquivo CSV
+       Output:
+           - dicionário nome do preset -> filtros parciais (completados por resolve_filters)
+    """
+
+    date_index = load_date_index(path)
+    bitmaps = load_bitmaps(path)
+    presets = {}
+
+    if 'all' in kinds:
+        presets['all'] = {}
+
+    if 'weekly' in kinds:
+        fim_dos_dados = date_index.last_day + timedelta(days=1)
+        # domingo da semana do primeiro dia (%U: semanas começam no domingo)
+        inicio = date_index.first_day - timedelta(days=(date_index.first_day.weekday() + 1) % 7)
+        while inicio < fim_dos_dados:
+            fim = inicio + timedelta(days=7)
+            presets[f'week_{inicio:%Y}_{inicio:%U}'] = {'start': max(inicio, date_index.first_day),
+                                                        'end': min(fim, fim_dos_dados)}
+            inicio = fim
+
+    if 'city' in kinds:
+        for cidade in bitmaps.values('City'):
+            presets[f'city_{_slug(cidade)}'] = {'City': [cidade]}
+
+    return presets
+
+
+def _slug(texto):
+
+    return re.sub(r'[^0-9A-Za-z_-]+', '_', str(texto)).strip('_') or 'vazio'
+
+
+# ------------------------------------------------------------------------------
+# Exportar um preset (executado nos processos do pool)
+# ------------------------------------------------------------------------------
+
+def _warm(path):
+
+    # Carrega os agregados no processo (sem custo se já vieram do processo pai via fork)
+    load_cube(path)
+    load_ratings_stats(path)
+    load_sketches(path)
+    load_date_index(path)
+    load_bitmaps(path)
+
+
+def export_preset(nome, filtros, output_dir, formats=DEFAULT_FORMATS, path=DATASET_PATH):
+
+    """ Esta função gera todas as figuras e tabelas de um preset e grava os arquivos.
+
+    Parâmetros:
+       Input:
+           - nome: nome do preset (pasta de saída)
+           - filtros: filtros parciais do preset
+           - output_dir: pasta raiz dos relatórios
+           - formats: formatos gravados (FORMATS)
+           - path: caminho do arquivo CSV
+       Output:
+           - dicionário com preset, filters, files, rows e seconds
+    """
+
+    inicio = time.perf_counter()
+    pasta = os.path.join(output_dir, nome)
+    os.makedirs(pasta, exist_ok=True)
+
+    filtros = resolve_filters(filtros, path)
+    arquivos = []
+
+    # Figuras
+    for figura, (fonte, builder) in FIGURES.items():
+        fig = builder(source_data(fonte, filtros, path))
+        for formato in formats:
+            arquivo = os.path.join(pasta, f'{figura}.{formato}')
+            if formato == 'html':
+                fig.write_html(arquivo, include_plotlyjs='cdn', full_html=True)
+            elif formato == 'json':
+                fig.write_json(arquivo)
+            elif formato == 'png':
+                fig.write_image(arquivo)
+            arquivos.append(arquivo)
+
+    # Tabelas (as métricas da API)
+    for metrica in METRICS:
+        resultado = compute(metrica, filtros, path)
+        if 'json' in formats:
+            arquivo = os.path.join(pasta, f'{metrica}.json')
+            with open(arquivo, 'w', encoding='utf-8') as saida:
+                json.dump(to_payload(resultado, RESULT_PARTS.get(metrica)), saida, ensure_ascii=False, indent=1)
+            arquivos.append(arquivo)
+        if 'html' in formats:
+            arquivo = os.path.join(pasta, f'{metrica}.html')
+            with open(arquivo, 'w', encoding='utf-8') as saida:
+                saida.write(_table_html(resultado, RESULT_PARTS.get(metrica)))
+            arquivos.append(arquivo)
+
+    return {'preset': nome,
+            'filters': dict(normalize_filters(filtros)),
+            'rows': int(compute('orders_by_day', filtros, path)['orders'].sum()),
+            'files': [os.path.relpath(a, output_dir) for a in arquivos],
+            'seconds': time.perf_counter() - inicio}
+
+
+def _table_html(resultado, partes=None):
+
+    if isinstance(resultado, tuple):
+        partes = partes or [str(i) for i in range(len(resultado))]
+        return '\n'.join(f'<h3>{parte}</h3>\n{_table_html(valor)}' for parte, valor in zip(partes, resultado))
+    if isinstance(resultado, dict):
+        resultado = pd.DataFrame([resultado])
+    if not isinstance(resultado, (pd.DataFrame, pd.Series)):
+        resultado = pd.DataFrame({'value': [resultado]})
+
+    return resultado.to_html()
+
+
+# ------------------------------------------------------------------------------
+# Exportar todos os presets em paralelo
+# ------------------------------------------------------------------------------
+
+def export_reports(presets, output_dir=DEFAULT_OUTPUT, formats=DEFAULT_FORMATS, workers=None, path=DATASET_PATH):
+
+    """ Esta função exporta os presets em um pool de processos e grava o índice (index.json).
+
+        O dataset e os agregados são carregados uma vez no processo principal;
+        com fork (Linux), os processos do pool herdam esses objetos sem
+        recarregar. Em plataformas com spawn, cada processo lê o snapshot.
+
+    Parâmetros:
+       Input:
+           - presets: dicionário nome -> filtros parciais (build_presets)
+           - output_dir: pasta raiz dos relatórios
+           - formats: formatos gravados (FORMATS)
+           - workers: quantidade de processos (None: todos os núcleos)
+           - path: caminho do arquivo CSV
+       Output:
+           - índice: dicionário com os presets exportados (na ordem de presets)
+    """
+
+    if 'png' in formats and importlib.util.find_spec('kaleido') is None:
+        raise RuntimeError('A exportação em PNG precisa do pacote opcional kaleido (pip install kaleido).')
+
+    inicio = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    _warm(path)
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm, initargs=(path,)) as pool:
+        tarefas = {pool.submit(export_preset, nome, filtros, output_dir, tuple(formats), path): nome
+                   for nome, filtros in presets.items()}
+        for tarefa in as_completed(tarefas):
+            resultados[tarefas[tarefa]] = tarefa.result()
+
+    indice = {'dataset': os.path.abspath(path),
+              'formats': list(formats),
+              'seconds': time.perf_counter() - inicio,
+              'presets': [resultados[nome] for nome in presets]}
+
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as saida:
+        json.dump(indice, saida, ensure_ascii=False, indent=1, default=str)
+
+    return indice
+
+
+# ==============================================================================
+# Execução direta: python -m core.export --presets weekly city
+# ==============================================================================
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Exporta as figuras e tabelas do dashboard para presets de filtros.')
+    parser.add_argument('--presets', nargs='+', choices=PRESET_KINDS, default=['all'])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(DEFAULT_FORMATS))
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='pasta dos relatórios')
+    parser.add_argument('--workers', type=int, default=None, help='processos (padrão: todos os núcleos)')
+    parser.add_argument('--dataset', default=DATASET_PATH, help='caminho do CSV')
+    args = parser.parse_args()
+
+    try:
+        indice = export_reports(build_presets(args.presets, args.dataset), args.output,
+                                args.formats, args.workers, args.dataset)
+    except RuntimeError as erro:
+        parser.error(str(erro))
+
+    print(f'{len(indice["presets"])} presets exportados em {indice["seconds"]:.1f}s -> '
+          f'{os.path.join(args.output, "index.json")}')
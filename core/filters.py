@@ -0,0 +1,395 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.loader import DATASET_PATH, load_derived, register_derived, streaming_enabled
+
+
+# ------------------------------------------------------------------------------
+# Configuração dos Filtros
+# ------------------------------------------------------------------------------
+
+# Colunas categóricas filtradas na barra lateral
+FILTER_COLUMNS = ['Road_traffic_density', 'City', 'Weatherconditions', 'Type_of_vehicle', 'Festival']
+
+# Opções fixas do trânsito (as linhas sem informação de trânsito ficam de fora)
+TRAFFIC_OPTIONS = ['Low', 'Medium', 'High', 'Jam']
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class DateIndex:
+
+    """ Índice de datas do dataset, que fica ordenado por Order_Date.
+
+        Guarda os dias existentes e a posição da primeira linha de cada dia
+        (offsets, com o total de linhas no final). O filtro de datas vira uma
+        busca binária nos dias e um fatiamento por posição, sem máscara e sem
+        cópia das linhas.
+    """
+
+    def __init__(self, days, offsets):
+
+        self.days = days
+        self.offsets = offsets
+
+    @classmethod
+    def from_frame(cls, df):
+
+        """ Esta função monta o índice a partir do dataframe ordenado por Order_Date.
+
+        Parâmetros:
+           Input:
+               - df: Dataframe limpo, ordenado por Order_Date
+           Output:
+               - DateIndex
+        """
+
+        datas = df['Order_Date'].to_numpy()
+
+        if len(datas) > 1 and (datas[1:] < datas[:-1]).any():
+            raise ValueError('O dataset precisa estar ordenado por Order_Date.')
+
+        days, offsets = np.unique(datas, return_index=True)
+
+        return cls(days, np.append(offsets, len(datas)))
+
+    def merge(self, other):
+
+        """ Esta função soma os dias de outro índice (ex.: de um lote novo) aos dias atuais.
+
+            Vale para o dataframe combinado e reordenado por Order_Date: as
+            posições são refeitas a partir da quantidade de linhas de cada dia.
+
+        Parâmetros:
+           Input:
+               - other: DateIndex do lote
+           Output:
+               - novo DateIndex
+        """
+
+        days = np.union1d(self.days, other.days)
+        linhas = np.zeros(len(days), dtype=np.int64)
+        linhas[np.searchsorted(days, self.days)] += np.diff(self.offsets)
+        linhas[np.searchsorted(days, other.days)] += np.diff(other.offsets)
+
+        return DateIndex(days, np.append(0, np.cumsum(linhas)))
+
+    @property
+    def first_day(self):
+
+        return pd.Timestamp(self.days[0]).to_pydatetime()
+
+    @property
+    def last_day(self):
+
+        return pd.Timestamp(self.days[-1]).to_pydatetime()
+
+    # --------------------------------------------------------------------------
+    # Posições das linhas de um intervalo de datas
+    # --------------------------------------------------------------------------
+
+    def bounds(self, start=None, end=None):
+
+        """ Esta função retorna as posições [inicio, fim) das linhas do intervalo de datas.
+
+        Parâmetros:
+           Input:
+               - start: data inicial (inclusiva); None para o início do dataset
+               - end: data final (exclusiva); None para o fim do dataset
+           Output:
+               - tupla (inicio, fim) de posições das linhas
+        """
+
+        i = 0 if start is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(start)), side='left')
+        j = len(self.days) if end is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(end)), side='left')
+
+        return int(self.offsets[i]), int(self.offsets[max(i, j)])
+
+    def slice(self, df, start=None, end=None):
+
+        """ Esta função filtra o dataframe pelo intervalo de datas [start, end), sem cópia.
+
+        Parâmetros:
+           Input:
+               - df: Dataframe usado para montar o índice (mesma ordem de linhas)
+               - start: data inicial (inclusiva)
+               - end: data final (exclusiva)
+           Output:
+               - df: fatia do Dataframe com as linhas do intervalo
+        """
+
+        inicio, fim = self.bounds(start, end)
+
+        return df.iloc[inicio:fim]
+
+
+class CategoryBitmaps:
+
+    """ Bitmaps das colunas categóricas filtradas na barra lateral.
+
+        Para cada valor de cada coluna em FILTER_COLUMNS guarda um bitmap
+        (np.packbits) com as linhas que têm aquele valor. Os valores escolhidos
+        de uma coluna são combinados com OR e as colunas entre si com AND, só
+        no trecho de linhas do intervalo de datas. Colunas com todos os valores
+        escolhidos não entram na conta: mais filtros na barra lateral não
+        deixam a interação mais lenta.
+    """
+
+    def __init__(self, bitmaps, n_rows):
+
+        self.bitmaps = bitmaps
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_frame(cls, df, columns=FILTER_COLUMNS):
+
+        """ Esta função monta um bitmap por valor de cada coluna categórica.
+
+        Parâmetros:
+           Input:
+               - df: Dataframe limpo (mesma ordem de linhas usada nos filtros)
+               - columns: colunas categóricas
+           Output:
+               - CategoryBitmaps
+        """
+
+        bitmaps = {}
+
+        for coluna in columns:
+            serie = df[coluna].astype('category')
+            codigos = serie.cat.codes.to_numpy()
+            bitmaps[coluna] = {}
+
+            for codigo, valor in enumerate(serie.cat.categories):
+                linhas = codigos == codigo
+                if linhas.any():
+                    bitmaps[coluna][valor] = np.packbits(linhas)
+
+        return cls(bitmaps, len(df))
+
+    @classmethod
+    def from_values(cls, values):
+
+        """ Esta função monta bitmaps sem linhas, só com as opções dos filtros (modo streaming).
+
+        Parâmetros:
+           Input:
+               - values: coluna -> lista de valores existentes
+           Output:
+               - CategoryBitmaps com zero linhas (values funciona; mask não deve ser usada)
+        """
+
+        return cls({coluna: {valor: np.zeros(0, dtype=np.uint8) for valor in valores}
+                    for coluna, valores in values.items()}, 0)
+
+    def values(self, column):
+
+        """ Esta função retorna os valores existentes de uma coluna (opções do filtro). """
+
+        return list(self.bitmaps[column])
+
+    # --------------------------------------------------------------------------
+    # Máscara das linhas selecionadas
+    # --------------------------------------------------------------------------
+
+    def mask(self, selections, start=0, stop=None):
+
+        """ Esta função combina os bitmaps das seleções no trecho de linhas [start, stop).
+
+        Parâmetros:
+           Input:
+               - selections: coluna -> lista de valores aceitos
+               - start, stop: trecho de linhas (ex.: o intervalo de datas do DateIndex)
+           Output:
+               - array booleano com stop - start posições, ou None se nenhuma
+                 seleção restringe as linhas
+        """
+
+        stop = self.n_rows if stop is None else stop
+        byte_inicio, byte_fim = start // 8, -(-stop // 8)
+        resultado = None
+
+        for coluna, valores in selections.items():
+            bitmaps = self.bitmaps[coluna]
+            if set(bitmaps) <= set(valores):
+                continue
+
+            selecionadas = np.zeros(byte_fim - byte_inicio, dtype=np.uint8)
+            for valor in valores:
+                if valor in bitmaps:
+                    selecionadas |= bitmaps[valor][byte_inicio:byte_fim]
+
+            resultado = selecionadas if resultado is None else resultado & selecionadas
+
+        if resultado is None:
+            return None
+
+        deslocamento = start - byte_inicio * 8
+
+        return np.unpackbits(resultado)[deslocamento:deslocamento + stop - start].astype(bool)
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Índice de datas do dataset em cache
+# ------------------------------------------------------------------------------
+
+def load_date_index(path=DATASET_PATH):
+
+    """ Esta função retorna o índice de datas do dataset, montado uma única vez por versão do arquivo.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - DateIndex (somente leitura)
+    """
+
+    return load_derived('date_index', path)
+
+
+# ------------------------------------------------------------------------------
+# Bitmaps das colunas categóricas em cache
+# ------------------------------------------------------------------------------
+
+def load_bitmaps(path=DATASET_PATH):
+
+    """ Esta função retorna os bitmaps dos filtros, montados uma única vez por versão do arquivo.
+
+        No modo streaming não há linhas: os bitmaps trazem só as opções dos
+        filtros, tiradas das categorias vistas nos blocos.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - CategoryBitmaps (somente leitura)
+    """
+
+    if streaming_enabled(path):
+        schema = load_derived('schema', path)
+        return CategoryBitmaps.from_values({coluna: sorted(schema[coluna].cat.categories)
+                                            for coluna in FILTER_COLUMNS})
+
+    return load_derived('bitmaps', path)
+
+
+register_derived('date_index', DateIndex.from_frame, lambda index, batch, df: index.merge(DateIndex.from_frame(batch)))
+register_derived('bitmaps', CategoryBitmaps.from_frame)
+
+
+# ------------------------------------------------------------------------------
+# Aplicar todos os filtros e materializar as linhas uma única vez
+# ------------------------------------------------------------------------------
+
+def select_positions(date_index, bitmaps, start=None, end=None, **selections):
+
+    """ Esta função aplica o filtro de datas e os filtros categóricos da barra lateral, sem tocar nas linhas.
+
+        O intervalo de datas é uma busca binária e as seleções são combinadas
+        nos bitmaps. Sem seleções restritivas, o resultado é a fatia do
+        intervalo de datas.
+
+    Parâmetros:
+       Input:
+           - date_index: DateIndex do dataset
+           - bitmaps: CategoryBitmaps do dataset
+           - start: data inicial (inclusiva)
+           - end: data final (exclusiva)
+           - selections: coluna -> lista de valores aceitos
+       Output:
+           - posicoes: slice ou array com as posições das linhas selecionadas
+    """
+
+    inicio, fim = date_index.bounds(start, end)
+    linhas_selecionadas = bitmaps.mask(selections, inicio, fim)
+
+    if linhas_selecionadas is None:
+        return slice(inicio, fim)
+
+    return inicio + np.flatnonzero(linhas_selecionadas)
+
+
+def select_rows(df, date_index, bitmaps, start=None, end=None, columns=None, **selections):
+
+    """ Esta função aplica o filtro de datas e os filtros categóricos da barra lateral.
+
+        As posições vêm de select_positions. Uma fatia de datas retorna uma
+        visão do dataframe compartilhado, sem cópia; com seleções restritivas,
+        só as linhas (e as colunas pedidas) selecionadas são copiadas, uma vez.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe usado para montar o índice e os bitmaps
+           - date_index: DateIndex do dataset
+           - bitmaps: CategoryBitmaps do dataset
+           - start: data inicial (inclusiva)
+           - end: data final (exclusiva)
+           - columns: colunas usadas pelo chamador (padrão: todas)
+           - selections: coluna -> lista de valores aceitos
+       Output:
+           - df: Dataframe filtrado (somente leitura)
+    """
+
+    posicoes = select_positions(date_index, bitmaps, start, end, **selections)
+
+    if columns is not None and not isinstance(posicoes, slice):
+        return df.iloc[posicoes, [df.columns.get_loc(c) for c in columns]]
+
+    return df.iloc[posicoes]
+
+# ------------------------------------------------------------------------------
+# Estado inicial dos filtros (o mesmo da barra lateral)
+# ------------------------------------------------------------------------------
+
+def default_filters(date_index, bitmaps):
+
+    """ Esta função monta o estado inicial dos filtros da barra lateral, sem o Streamlit.
+
+    Parâmetros:
+       Input:
+           - date_index: DateIndex do dataset
+           - bitmaps: CategoryBitmaps do dataset
+       Output:
+           - filtros: dicionário no formato de render_sidebar (todas as datas, o trânsito
+             de TRAFFIC_OPTIONS e todos os valores das demais colunas)
+    """
+
+    filtros = {'start': date_index.first_day, 'end': date_index.last_day + timedelta(days=1)}
+
+    for coluna in FILTER_COLUMNS:
+        filtros[coluna] = list(TRAFFIC_OPTIONS) if coluna == 'Road_traffic_density' else bitmaps.values(coluna)
+
+    return filtros
+
+
+# ------------------------------------------------------------------------------
+# Estado dos filtros em forma canônica (chave de cache)
+# ------------------------------------------------------------------------------
+
+def normalize_filters(filtros):
+
+    """ Esta função converte o estado dos filtros em uma tupla canônica e hashable.
+
+        A ordem das colunas e dos valores escolhidos não altera a chave.
+
+    Parâmetros:
+       Input:
+           - filtros: dicionário retornado por render_sidebar
+       Output:
+           - tupla ordenada de (nome, valor), com as listas convertidas em tuplas ordenadas
+    """
+
+    return tuple(sorted((nome, tuple(sorted(map(str, valor))) if isinstance(valor, (list, tuple, set)) else str(valor))
+                        for nome, valor in filtros.items()))
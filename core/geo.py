@@ -0,0 +1,67 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+
+
+# ------------------------------------------------------------------------------
+# Configuração
+# ------------------------------------------------------------------------------
+
+# Mesmo raio médio da Terra usado pela biblioteca haversine
+EARTH_RADIUS_KM = 6371.0088
+
+COORDINATE_COLUMNS = ['Restaurant_latitude',
+                      'Restaurant_longitude',
+                      'Delivery_location_latitude',
+                      'Delivery_location_longitude']
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Distância entre pontos - Haversine vetorizado
+# ------------------------------------------------------------------------------
+
+def haversine_km(lat1, lon1, lat2, lon2):
+
+    """ Esta função calcula a distância do grande círculo (km) entre pares de pontos.
+
+    Parâmetros:
+       Input:
+           - lat1, lon1: arrays com latitude e longitude de origem (graus)
+           - lat2, lon2: arrays com latitude e longitude de destino (graus)
+       Output:
+           - array numpy com a distância em km de cada par
+    """
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(c, dtype=np.float64))
+                              for c in (lat1, lon1, lat2, lon2))
+
+    d = (np.sin((lat2 - lat1) * 0.5) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2)
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+
+# ------------------------------------------------------------------------------
+# Coluna de distância calculada na preparação dos dados
+# ------------------------------------------------------------------------------
+
+def add_distance(df):
+
+    """ Esta função cria a coluna distance_km (restaurante -> local da entrega).
+
+    Parâmetros:
+       Input:
+           - df: Dataframe limpo com as colunas de latitude e longitude
+       Output:
+           - df: o mesmo Dataframe com a coluna distance_km
+    """
+
+    df['distance_km'] = haversine_km(*(df[c].to_numpy() for c in COORDINATE_COLUMNS))
+
+    return df
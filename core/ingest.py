@@ -0,0 +1,314 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import clean_code, compact_dtypes
+from core.geo import add_distance
+
+
+# ------------------------------------------------------------------------------
+# Configuração da Ingestão
+# ------------------------------------------------------------------------------
+
+# Lotes novos ficam ao lado do CSV principal: dataset/train.csv -> dataset/train_batches/*.csv
+BATCH_SUFFIX = '_batches'
+BATCH_EXTENSION = '.csv'
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class IdIndex:
+
+    """ Índice dos IDs de pedido já carregados, para remover duplicados dos lotes.
+
+        Guarda o hash (uint64) de cada ID em um array ordenado: a busca de um
+        lote custa uma busca binária por linha do lote, sem percorrer o histórico.
+    """
+
+    def __init__(self, hashes):
+
+        self.hashes = hashes
+
+    @classmethod
+    def from_frame(cls, df):
+
+        """ Esta função monta o índice a partir da coluna ID do dataframe.
+
+        Parâmetros:
+           Input:
+               - df: Dataframe limpo
+           Output:
+               - IdIndex
+        """
+
+        return cls(np.unique(_hash_ids(df['ID'])))
+
+    def __len__(self):
+
+        return len(self.hashes)
+
+    def contains(self, ids):
+
+        """ Esta função indica quais IDs já estão no índice.
+
+        Parâmetros:
+           Input:
+               - ids: Series de IDs
+           Output:
+               - array booleano, True para os IDs já carregados
+        """
+
+        hashes = _hash_ids(ids)
+
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+
+        posicoes = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+
+        return self.hashes[posicoes] == hashes
+
+    def merge(self, other):
+
+        """ Esta função junta os IDs de outro índice (ex.: de um lote novo).
+
+        Parâmetros:
+           Input:
+               - other: IdIndex do lote
+           Output:
+               - novo IdIndex
+        """
+
+        return IdIndex(np.union1d(self.hashes, other.hashes))
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+def _hash_ids(ids):
+
+    return pd.util.hash_array(ids.astype(str).to_numpy(dtype=object))
+
+
+# ------------------------------------------------------------------------------
+# Lotes ao lado do CSV principal
+# ------------------------------------------------------------------------------
+
+def batch_dir(csv_path):
+
+    """ Esta função retorna a pasta dos lotes do CSV principal.
+
+    Parâmetros:
+       Input:
+           - csv_path: caminho do arquivo CSV principal
+       Output:
+           - caminho da pasta (ex.: dataset/train_batches)
+    """
+
+    return os.path.splitext(csv_path)[0] + BATCH_SUFFIX
+
+
+def batch_files(csv_path):
+
+    """ Esta função lista os lotes do CSV principal, em ordem de nome.
+
+    Parâmetros:
+       Input:
+           - csv_path: caminho do arquivo CSV principal
+       Output:
+           - tupla de (nome, tamanho em bytes, mtime em nanossegundos); vazia se não houver pasta
+    """
+
+    pasta = batch_dir(csv_path)
+
+    try:
+        nomes = sorted(n for n in os.listdir(pasta) if n.endswith(BATCH_EXTENSION))
+    except FileNotFoundError:
+        return ()
+
+    lotes = []
+    for nome in nomes:
+        stat = os.stat(os.path.join(pasta, nome))
+        lotes.append((nome, stat.st_size, stat.st_mtime_ns))
+
+    return tuple(lotes)
+
+
+# ------------------------------------------------------------------------------
+# Preparar um dataframe bruto (as mesmas etapas do CSV principal)
+# ------------------------------------------------------------------------------
+
+def prepare_frame(df, timings):
+
+    """ Esta função aplica ao dataframe bruto a limpeza, as colunas derivadas,
+        o schema compacto e a ordenação por Order_Date.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe lido do CSV
+           - timings: dicionário que recebe o tempo (s) de cada etapa
+       Output:
+           - df: Dataframe limpo, compacto e ordenado
+    """
+
+    df = clean_code(df, timings=timings)
+
+    inicio = time.perf_counter()
+    df = add_distance(df)
+    timings['distance'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df = compact_dtypes(df)
+    timings['compact'] = time.perf_counter() - inicio
+
+    # Ordenado por data: o filtro de datas vira uma busca binária (core.filters.DateIndex)
+    inicio = time.perf_counter()
+    df = df.sort_values('Order_Date', kind='stable', ignore_index=True)
+    timings['sort'] = time.perf_counter() - inicio
+
+    return df
+
+
+def prepare_batch(path, ids, timings):
+
+    """ Esta função lê e prepara um lote, sem os pedidos já carregados.
+
+        IDs repetidos dentro do próprio lote ficam com a primeira ocorrência.
+
+    Parâmetros:
+       Input:
+           - path: caminho do CSV do lote
+           - ids: IdIndex dos pedidos já carregados
+           - timings: dicionário que recebe o tempo (s) de cada etapa
+       Output:
+           - df: Dataframe do lote preparado (pode ser vazio)
+    """
+
+    inicio = time.perf_counter()
+    df = pd.read_csv(path)
+    timings['read_csv'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df = drop_known_ids(df, ids)
+    timings['deduplicate'] = time.perf_counter() - inicio
+
+    return prepare_frame(df, timings)
+
+
+def drop_known_ids(df, ids):
+
+    """ Esta função remove do dataframe bruto os pedidos já carregados e os IDs repetidos.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe lido do CSV
+           - ids: IdIndex dos pedidos já carregados
+       Output:
+           - df: Dataframe sem os pedidos repetidos (primeira ocorrência mantida)
+    """
+
+    df['ID'] = df['ID'].str.strip()
+
+    return df.loc[~df['ID'].duplicated().to_numpy() & ~ids.contains(df['ID'])]
+
+
+# ------------------------------------------------------------------------------
+# Ler um CSV em blocos (modo streaming)
+# ------------------------------------------------------------------------------
+
+def read_chunks(path, chunk_rows):
+
+    """ Esta função lê o CSV em blocos de até chunk_rows linhas, sem carregar o arquivo inteiro.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+           - chunk_rows: linhas por bloco
+       Output:
+           - gerador de Dataframes brutos (como lidos por pd.read_csv)
+    """
+
+    with pd.read_csv(path, chunksize=chunk_rows) as leitor:
+        yield from leitor
+
+
+# ------------------------------------------------------------------------------
+# Adicionar um lote à pasta de lotes
+# ------------------------------------------------------------------------------
+
+def add_batch(source, csv_path, name=None):
+
+    """ Esta função copia um CSV de pedidos novos para a pasta de lotes do CSV principal.
+
+        A cópia é feita em um arquivo temporário e depois renomeada de forma
+        atômica: o app nunca lê um lote pela metade.
+
+    Parâmetros:
+       Input:
+           - source: caminho do CSV com os pedidos novos (mesmo schema do principal)
+           - csv_path: caminho do arquivo CSV principal
+           - name: nome do lote na pasta (padrão: nome do arquivo de origem)
+       Output:
+           - caminho do lote gravado
+    """
+
+    pasta = batch_dir(csv_path)
+    os.makedirs(pasta, exist_ok=True)
+
+    nome = name or os.path.basename(source)
+    if not nome.endswith(BATCH_EXTENSION):
+        nome += BATCH_EXTENSION
+
+    destino = os.path.join(pasta, nome)
+    if os.path.exists(destino):
+        raise FileExistsError(f'O lote {destino} já existe.')
+
+    tmp_path = '{}.{}.tmp'.format(destino, os.getpid())
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destino)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return destino
+
+
+# ==============================================================================
+# Execução direta: python -m core.ingest novos_pedidos.csv [--dataset dataset/train.csv]
+# ==============================================================================
+
+if __name__ == '__main__':
+    from core.loader import DATASET_PATH, cleaning_timings, load_derived, save_snapshot, streaming_enabled
+
+    parser = argparse.ArgumentParser(description='Adiciona lotes de pedidos novos ao dataset.')
+    parser.add_argument('batches', nargs='+', help='CSVs com os pedidos novos')
+    parser.add_argument('--dataset', default=DATASET_PATH, help='caminho do CSV principal')
+    args = parser.parse_args()
+
+    linhas_antes = len(load_derived('id_index', args.dataset))
+
+    for lote in args.batches:
+        try:
+            print(f'Lote gravado em {add_batch(lote, args.dataset)}')
+        except FileExistsError as erro:
+            parser.error(str(erro))
+
+    linhas = len(load_derived('id_index', args.dataset))
+
+    # No modo streaming não há linhas em memória nem snapshot: os lotes são lidos a cada processo novo
+    if not streaming_enabled(args.dataset):
+        save_snapshot(args.dataset)
+
+    print(f'{linhas - linhas_antes} pedidos novos ({linhas} no total); '
+          f'etapas: ' + ', '.join(f'{etapa} {s:.3f}s' for etapa, s in cleaning_timings(args.dataset).items()))
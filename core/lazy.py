@@ -0,0 +1,90 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import importlib
+import threading
+import time
+
+
+# ------------------------------------------------------------------------------
+# Tempos das importações sob demanda: módulo -> segundos
+# ------------------------------------------------------------------------------
+
+_timings = {}
+_lock = threading.Lock()
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class LazyModule:
+
+    """ Módulo importado só no primeiro acesso a um atributo.
+
+        Usado para as bibliotecas de gráficos e mapas (plotly, folium): as
+        páginas, a API e as linhas de comando que não desenham nada não pagam
+        a importação. O uso é o mesmo do módulo (ex.: px.bar).
+    """
+
+    def __init__(self, name):
+
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+
+        if self._module is None:
+            self._module = _import(self._name)
+
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+
+        estado = 'importado' if self._module is not None else 'não importado'
+
+        return f'<LazyModule {self._name} ({estado})>'
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+def _import(name):
+
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(name)
+    segundos = time.perf_counter() - inicio
+
+    with _lock:
+        _timings.setdefault(name, segundos)
+
+    return modulo
+
+
+def lazy_import(name):
+
+    """ Esta função retorna o módulo name, importado só no primeiro uso.
+
+    Parâmetros:
+       Input:
+           - name: nome do módulo (ex.: 'plotly.express')
+       Output:
+           - LazyModule
+    """
+
+    return LazyModule(name)
+
+
+def import_timings():
+
+    """ Esta função retorna o tempo (s) da primeira importação de cada módulo sob demanda já usado.
+
+    Parâmetros:
+       Output:
+           - dicionário módulo -> segundos, na ordem das importações
+    """
+
+    with _lock:
+        return dict(_timings)
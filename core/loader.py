@@ -0,0 +1,644 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import contextvars
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import concat_frames
+from core.ingest import (IdIndex, batch_dir, batch_files, drop_known_ids, prepare_batch,
+                         prepare_frame, read_chunks)
+from core.snapshot import read_snapshot, write_snapshot
+
+
+# ------------------------------------------------------------------------------
+# Configuração
+# ------------------------------------------------------------------------------
+
+DATASET_PATH = os.path.join('dataset', 'train.csv')
+
+# Modo streaming (CSV maior que a memória): CURRY_STREAMING=1 liga, CURRY_STREAMING=0 desliga;
+# sem a variável, liga sozinho a partir de STREAMING_MIN_BYTES. As linhas não ficam em memória, e as
+# estatísticas das avaliações (quase uma célula por linha) ficam no banco embutido (core.stats.ratings_engine)
+STREAMING_ENV = 'CURRY_STREAMING'
+STREAMING_MIN_BYTES = 1 << 30
+
+# Linhas lidas do CSV por vez no modo streaming
+CHUNK_ROWS = 50_000
+
+# Motor dos agregados (cubo e estatísticas das avaliações): pandas (padrão, em memória),
+# sqlite ou duckdb (banco embutido ao lado do CSV, ver core.sql)
+ENGINE_ENV = 'CURRY_ENGINE'
+ENGINES = ('pandas', 'sqlite', 'duckdb')
+
+# Versão ativa de cada dataset: caminho absoluto -> (chave do arquivo, dataframe limpo, tempos da limpeza,
+# estruturas derivadas nome -> objeto). Cada versão guarda as suas estruturas: uma versão nova nunca
+# altera a anterior, que segue válida para as sessões que ainda a usam
+_cache = {}
+_lock = threading.RLock()
+
+# Versões trocadas em segundo plano (refresh_dataset): caminhos cuja versão ativa é servida sem consultar o arquivo
+_watched = set()
+_refresh_lock = threading.Lock()
+
+# Funções chamadas após a troca de versão (ex.: refazer o banco embutido de core.sql)
+_listeners = []
+
+# Versão fixada pela execução (pin_dataset): caminho absoluto -> entrada do cache. Variável de contexto:
+# vale na thread da página e nas tarefas que ela envia ao pool de core.concurrency (contexto copiado)
+_pinned = contextvars.ContextVar('curry_pinned_versions', default={})
+
+# Estruturas derivadas registradas: nome -> (builder(df), merger(estrutura, lote, df combinado) ou None,
+# acumulada no modo streaming)
+_registry = {}
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Chave de versão do arquivo
+# ------------------------------------------------------------------------------
+
+def dataset_key(path=DATASET_PATH):
+
+    """ Esta função gera a chave que identifica a versão do arquivo de dados e dos seus lotes.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - tupla (caminho absoluto, tamanho em bytes, mtime em nanossegundos, lotes),
+             com os lotes como em core.ingest.batch_files
+    """
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+
+    return (path, stat.st_size, stat.st_mtime_ns, batch_files(path))
+
+
+# ------------------------------------------------------------------------------
+# Ler o CSV, limpar e gravar o snapshot
+# ------------------------------------------------------------------------------
+
+def _build_dataset(key, timings):
+
+    """ Esta função refaz o dataset a partir do CSV principal (sem os lotes).
+
+        O snapshot só é gravado aqui quando não há lotes; com lotes, ele é
+        gravado depois da ingestão (_ingest), já com o dataset completo.
+
+    Parâmetros:
+       Input:
+           - key: chave do CSV (caminho, tamanho, mtime, lotes)
+           - timings: dicionário que recebe o tempo (s) de cada etapa
+       Output:
+           - df: Dataframe limpo com as colunas derivadas
+    """
+
+    inicio = time.perf_counter()
+    df = pd.read_csv(key[0])
+    timings['read_csv'] = time.perf_counter() - inicio
+
+    df = prepare_frame(df, timings)
+
+    if not key[3]:
+        _save(df, key, timings)
+
+    return df
+
+
+def _save(df, key, timings):
+
+    # O snapshot é um acelerador: se não puder ser gravado, o app segue com o CSV
+    inicio = time.perf_counter()
+    try:
+        write_snapshot(df, key)
+    except OSError:
+        pass
+    timings['write_snapshot'] = time.perf_counter() - inicio
+
+
+# ------------------------------------------------------------------------------
+# Ingestão incremental dos lotes
+# ------------------------------------------------------------------------------
+
+def _ingest(key, df, batches, derivadas, timings):
+
+    """ Esta função adiciona ao dataset os lotes de key que ainda não foram carregados.
+
+        Só os lotes novos são lidos e limpos. Os pedidos com ID já carregado
+        são descartados, e as estruturas derivadas com um merger registrado são
+        atualizadas a partir do lote; as demais são refeitas na próxima chamada
+        de load_derived.
+
+    Parâmetros:
+       Input:
+           - key: chave atual do CSV (caminho, tamanho, mtime, lotes)
+           - df: Dataframe já carregado
+           - batches: lotes já incluídos em df
+           - derivadas: dicionário nome -> estrutura derivada de df (atualizado no lugar)
+           - timings: dicionário que recebe o tempo (s) de cada etapa
+       Output:
+           - df: Dataframe com os lotes novos, ordenado por Order_Date
+    """
+
+    carregados = set(batches)
+    novos = [lote for lote in key[3] if lote not in carregados]
+
+    if not novos:
+        return df
+
+    if 'id_index' not in derivadas:
+        derivadas['id_index'] = IdIndex.from_frame(df)
+
+    for nome, _, _ in novos:
+        etapas = {}
+        lote = prepare_batch(os.path.join(batch_dir(key[0]), nome), derivadas['id_index'], etapas)
+
+        if len(lote):
+            inicio = time.perf_counter()
+            combinado = concat_frames([df, lote])
+            # Linhas do lote com as categorias do dataframe combinado (códigos compatíveis)
+            lote = combinado.iloc[len(df):]
+
+            # Lotes com datas anteriores ao fim do histórico exigem reordenar
+            if len(df) and lote['Order_Date'].iat[0] < df['Order_Date'].iat[-1]:
+                combinado = combinado.sort_values('Order_Date', kind='stable', ignore_index=True)
+            etapas['merge'] = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            for estrutura in list(derivadas):
+                merger = _registry.get(estrutura, (None, None, True))[1]
+                if merger is not None:
+                    derivadas[estrutura] = merger(derivadas[estrutura], lote, combinado)
+                else:
+                    del derivadas[estrutura]
+            etapas['update_derived'] = time.perf_counter() - inicio
+
+            df = combinado
+
+        for etapa, segundos in etapas.items():
+            timings[f'batch.{etapa}'] = timings.get(f'batch.{etapa}', 0) + segundos
+
+    return df
+
+
+# ------------------------------------------------------------------------------
+# Modo streaming: o CSV lido em blocos, direto para os agregados
+# ------------------------------------------------------------------------------
+
+def streaming_enabled(path=DATASET_PATH):
+
+    """ Esta função indica se o dataset é carregado no modo streaming.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - True com CURRY_STREAMING=1, ou sem a variável e com o CSV a partir de STREAMING_MIN_BYTES
+    """
+
+    valor = os.environ.get(STREAMING_ENV, '').strip()
+
+    if valor:
+        return valor not in ('0', 'false', 'no')
+
+    return os.path.getsize(path) >= STREAMING_MIN_BYTES
+
+
+def query_engine():
+
+    """ Esta função indica o motor que calcula os agregados.
+
+    Parâmetros:
+       Output:
+           - 'pandas' (padrão), 'sqlite' ou 'duckdb', conforme CURRY_ENGINE
+    """
+
+    motor = os.environ.get(ENGINE_ENV, '').strip().lower() or 'pandas'
+
+    if motor not in ENGINES:
+        raise ValueError(f'{ENGINE_ENV}={motor} inválido; use um de {", ".join(ENGINES)}.')
+
+    return motor
+
+
+def _stream(key, sources, derivadas, timings):
+
+    """ Esta função lê os CSVs em blocos de CHUNK_ROWS linhas e acumula cada bloco nas estruturas derivadas.
+
+        Cada bloco é limpo como o CSV inteiro (core.ingest.prepare_frame),
+        ganha as categorias já vistas (estrutura 'schema') e é somado às
+        estruturas com merger registrado; depois é descartado. O pico de
+        memória é o de um bloco mais o das estruturas, que crescem com o
+        número de células: o cubo, os resumos de quantis e o índice de datas
+        se estabilizam (dias x categorias), e o índice de IDs guarda 8 bytes
+        por pedido. Estruturas sem merger (ex.: bitmaps por linha) ou
+        registradas com streaming=False (as estatísticas das avaliações, quase
+        uma célula por linha) não existem neste modo.
+
+    Parâmetros:
+       Input:
+           - key: chave atual do CSV (caminho, tamanho, mtime, lotes)
+           - sources: caminhos dos CSVs lidos, na ordem (o principal primeiro, depois os lotes)
+           - derivadas: dicionário nome -> estrutura (atualizado no lugar; vazio na primeira leitura)
+           - timings: dicionário que recebe o tempo (s) de cada etapa, somado entre os blocos
+    """
+
+    nomes = [nome for nome, (_, merger, streaming) in _registry.items() if merger is not None and streaming]
+
+    for fonte in sources:
+        inicio = time.perf_counter()
+        for bruto in read_chunks(fonte, CHUNK_ROWS):
+            etapas = {'read_csv': time.perf_counter() - inicio}
+
+            # Lotes: sem os pedidos já carregados (o CSV principal não é deduplicado, como no modo completo)
+            if fonte != key[0]:
+                inicio = time.perf_counter()
+                bruto = drop_known_ids(bruto, derivadas['id_index'])
+                etapas['deduplicate'] = time.perf_counter() - inicio
+
+            bloco = prepare_frame(bruto, etapas)
+            del bruto
+
+            inicio = time.perf_counter()
+            if len(bloco):
+                if 'schema' in derivadas:
+                    bloco = concat_frames([derivadas['schema'], bloco])
+                for nome in nomes:
+                    builder, merger, _ = _registry[nome]
+                    derivadas[nome] = merger(derivadas[nome], bloco, None) if nome in derivadas else builder(bloco)
+            etapas['update_derived'] = time.perf_counter() - inicio
+
+            for etapa, segundos in etapas.items():
+                timings[f'stream.{etapa}'] = timings.get(f'stream.{etapa}', 0) + segundos
+
+            inicio = time.perf_counter()
+
+
+# ------------------------------------------------------------------------------
+# Gravar o snapshot do dataset em cache
+# ------------------------------------------------------------------------------
+
+def save_snapshot(path=DATASET_PATH):
+
+    """ Esta função grava o snapshot do dataset em cache, já com os lotes carregados.
+
+        A ingestão incremental não regrava o snapshot (o custo seria o do
+        histórico inteiro); sem gravar, os lotes são lidos de novo a cada
+        processo novo. Chamada pela linha de comando de core.ingest.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - caminho do snapshot gravado
+    """
+
+    key, df, _, _ = _load_cached(path)
+
+    if df is None:
+        raise RuntimeError('O modo streaming não guarda as linhas do dataset: não há snapshot a gravar.')
+
+    return write_snapshot(df, key)
+
+
+# ------------------------------------------------------------------------------
+# Carregar o dataset limpo (uma vez por processo)
+# ------------------------------------------------------------------------------
+
+def load_dataset(path=DATASET_PATH):
+
+    """ Esta função lê e limpa o dataset uma única vez por processo e cria
+        as colunas derivadas (distance_km), já no schema compacto (core.cleaning.COMPACT_TYPES)
+        e ordenado por Order_Date.
+
+        Quando existe um snapshot Feather válido ao lado do CSV, ele é lido via
+        memory-map no lugar do CSV. O resultado fica em cache, identificado pelo
+        caminho, tamanho e mtime do arquivo. Se o CSV for substituído, a próxima
+        chamada refaz a leitura.
+        Todas as sessões compartilham os mesmos arrays, somente leitura
+        (freeze_frame). Cada chamada recebe uma cópia rasa do dataframe em
+        cache: novas colunas criadas pela página não alteram o cache, e uma
+        escrita no lugar levanta ValueError em vez de alterar os dados das
+        outras sessões.
+
+        No modo streaming (streaming_enabled) as linhas não ficam em memória:
+        a chamada levanta RuntimeError e as páginas usam os agregados.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - df: Dataframe limpo
+    """
+
+    df = _load_cached(path)[1]
+
+    if df is None:
+        raise RuntimeError(f'As linhas do dataset não ficam em memória no modo streaming ({STREAMING_ENV}=0 desliga).')
+
+    return df.copy(deep=False)
+
+
+# ------------------------------------------------------------------------------
+# Dataset compartilhado somente leitura
+# ------------------------------------------------------------------------------
+
+def freeze_frame(df):
+
+    """ Esta função marca os arrays do dataframe como somente leitura, no lugar e sem cópia.
+
+        Os arrays vindos do snapshot (memory-map) já chegam assim; os demais
+        (CSV limpo, lotes) são marcados aqui. Os blocos não são consolidados:
+        isso copiaria o snapshot inteiro para a memória.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe limpo, que passa a ser compartilhado entre as sessões
+       Output:
+           - df: o mesmo Dataframe
+    """
+
+    for bloco in df._mgr.blocks:
+        # Arrays do pandas (Categorical, DatetimeArray) guardam os dados em _ndarray
+        valores = getattr(bloco.values, '_ndarray', bloco.values)
+        if isinstance(valores, np.ndarray):
+            valores.flags.writeable = False
+
+    return df
+
+
+# ------------------------------------------------------------------------------
+# Entrada do cache para a versão atual do arquivo
+# ------------------------------------------------------------------------------
+
+def _load_cached(path):
+
+    """ Esta função retorna a entrada do cache (chave, dataframe, tempos, derivadas) usada pela execução.
+
+        A versão fixada na execução (pin_dataset) tem prioridade. Depois vem a
+        versão ativa: com o observador ligado (refresh_dataset), ela é servida
+        sem consultar o arquivo; sem ele, uma mudança no CSV é processada aqui
+        mesmo, antes de responder.
+    """
+
+    path = os.path.abspath(path)
+    fixada = _pinned.get().get(path)
+
+    if fixada is not None:
+        return fixada
+
+    with _lock:
+        cached = _cache.get(path)
+
+        if cached is not None and path in _watched:
+            return cached
+
+        key = dataset_key(path)
+        if cached is None or cached[0] != key:
+            cached = _build_version(key, cached)
+            _cache[path] = cached
+
+    return cached
+
+
+def _build_version(key, cached):
+
+    """ Esta função monta a entrada do cache da versão key do CSV.
+
+        Se só chegaram lotes novos desde a versão cached (ou desde o
+        snapshot), apenas esses lotes são processados. No modo streaming o
+        dataframe é None e as estruturas derivadas são acumuladas bloco a bloco.
+        A versão cached não é alterada.
+
+    Parâmetros:
+       Input:
+           - key: chave atual do CSV (caminho, tamanho, mtime, lotes)
+           - cached: entrada da versão anterior (ou None)
+       Output:
+           - entrada (chave, dataframe somente leitura ou None, tempos, derivadas)
+    """
+
+    timings = {}
+    streaming = streaming_enabled(key[0])
+    incremental = (cached is not None and (cached[1] is None) == streaming
+                   and cached[0][1:3] == key[1:3] and set(cached[0][3]) <= set(key[3]))
+
+    derivadas = dict(cached[3]) if incremental else {}
+
+    if streaming:
+        carregados = set(cached[0][3]) if incremental else set()
+        fontes = [os.path.join(batch_dir(key[0]), lote[0]) for lote in key[3] if lote not in carregados]
+        _stream(key, fontes if incremental else [key[0]] + fontes, derivadas, timings)
+        df = None
+    elif incremental:
+        df = _ingest(key, cached[1], cached[0][3], derivadas, timings)
+    else:
+        inicio = time.perf_counter()
+        snapshot = read_snapshot(key)
+        timings['read_snapshot'] = time.perf_counter() - inicio
+
+        if snapshot is None:
+            df, batches = _build_dataset(key, timings), ()
+        else:
+            df, batches = snapshot
+
+        df = _ingest(key, df, batches, derivadas, timings)
+
+    return (key, None if df is None else freeze_frame(df), timings, derivadas)
+
+
+# ------------------------------------------------------------------------------
+# Versão do dataset usada pela execução
+# ------------------------------------------------------------------------------
+
+def pin_dataset(path=DATASET_PATH):
+
+    """ Esta função fixa a versão ativa do dataset na execução atual (thread e tarefas enviadas por ela).
+
+        Chamada no início de cada execução de página (e de cada requisição da
+        API): todas as leituras da execução usam a mesma versão, mesmo que o
+        observador troque a versão ativa no meio dela. A próxima execução
+        fixa a versão ativa de novo.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - chave da versão fixada
+    """
+
+    path = os.path.abspath(path)
+    versoes = {k: v for k, v in _pinned.get().items() if k != path}
+    _pinned.set(versoes)
+
+    versoes[path] = _load_cached(path)
+
+    return versoes[path][0]
+
+
+def dataset_version(path=DATASET_PATH):
+
+    """ Esta função retorna a chave da versão do dataset usada pela execução (fixada ou ativa).
+
+        É a chave dos caches de resultados e de mapas: com o observador ligado,
+        o arquivo em disco pode estar à frente da versão servida.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - chave da versão (como em dataset_key)
+    """
+
+    return _load_cached(path)[0]
+
+
+# ------------------------------------------------------------------------------
+# Trocar a versão ativa em segundo plano
+# ------------------------------------------------------------------------------
+
+def refresh_dataset(path=DATASET_PATH):
+
+    """ Esta função processa a versão nova do CSV fora das requisições e a troca de forma atômica.
+
+        Chamada pelo observador (core.watcher). A versão nova é montada sem
+        segurar o cache: as sessões seguem com a versão ativa enquanto isso.
+        As estruturas derivadas usadas na versão anterior são construídas
+        antes da troca. A partir da primeira chamada, o caminho passa a ser
+        servido sem consultar o arquivo (ver _load_cached).
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - True se a versão ativa foi trocada
+    """
+
+    path = os.path.abspath(path)
+
+    with _refresh_lock:
+        with _lock:
+            _watched.add(path)
+            cached = _cache.get(path)
+
+        # Sem versão ativa, a primeira leitura é feita pela página
+        if cached is None:
+            return False
+
+        key = dataset_key(path)
+        if cached[0] == key:
+            return False
+
+        nova = _build_version(key, cached)
+
+        for nome in cached[3]:
+            if nome not in nova[3] and nova[1] is not None:
+                nova[3][nome] = _registry[nome][0](nova[1])
+
+        with _lock:
+            _cache[path] = nova
+
+    for callback in _listeners:
+        callback(path)
+
+    return True
+
+
+def on_new_version(callback):
+
+    """ Esta função registra uma função chamada (com o caminho do CSV) após cada troca de versão. """
+
+    _listeners.append(callback)
+
+
+# ------------------------------------------------------------------------------
+# Tempos da última limpeza
+# ------------------------------------------------------------------------------
+
+def cleaning_timings(path=DATASET_PATH):
+
+    """ Esta função retorna o tempo (s) de cada etapa da limpeza do dataset em cache.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - dicionário etapa -> segundos (vazio se o dataset ainda não foi carregado)
+    """
+
+    fixada = _pinned.get().get(os.path.abspath(path))
+    cached = fixada if fixada is not None else _cache.get(os.path.abspath(path))
+
+    return dict(cached[2]) if cached is not None else {}
+
+
+# ------------------------------------------------------------------------------
+# Estruturas derivadas do dataset (uma vez por versão do arquivo)
+# ------------------------------------------------------------------------------
+
+def register_derived(name, builder, merger=None, streaming=True):
+
+    """ Esta função registra uma estrutura derivada do dataset (chamada na importação do módulo dono).
+
+    Parâmetros:
+       Input:
+           - name: nome da estrutura (chave do cache)
+           - builder: função que recebe o Dataframe limpo e retorna a estrutura
+           - merger: função opcional (estrutura, lote, Dataframe combinado) -> estrutura atualizada;
+             o lote vem com as categorias do Dataframe combinado, que é None no modo streaming.
+             Com merger, a estrutura é atualizada pelos lotes novos (_ingest) e
+             acumulada bloco a bloco no modo streaming (_stream)
+           - streaming: False deixa a estrutura fora do modo streaming (ex.: uma que cresce com
+             as linhas e é servida de outra forma nesse modo)
+    """
+
+    _registry[name] = (builder, merger, streaming)
+
+
+def load_derived(name, path=DATASET_PATH):
+
+    """ Esta função constrói uma estrutura derivada do dataset uma única vez por versão do arquivo.
+
+        Usada para agregados pré-calculados (cubo, índices, etc.), registrados
+        com register_derived. A estrutura é refeita quando o CSV muda e deve
+        ser tratada como somente leitura.
+
+    Parâmetros:
+       Input:
+           - name: nome da estrutura registrada
+           - path: caminho do arquivo CSV
+       Output:
+           - a estrutura retornada pelo builder registrado
+    """
+
+    key, df, _, derivadas = _load_cached(path)
+
+    with _lock:
+        if name not in derivadas:
+            if df is None:
+                raise RuntimeError(f'A estrutura {name} precisa das linhas do dataset e não existe no modo '
+                                   f'streaming ({STREAMING_ENV}=0 desliga).')
+            derivadas[name] = _registry[name][0](df)
+
+    return derivadas[name]
+
+
+# ------------------------------------------------------------------------------
+# Estruturas derivadas do próprio carregamento
+# ------------------------------------------------------------------------------
+
+# IDs carregados (deduplicação dos lotes)
+register_derived('id_index', IdIndex.from_frame, lambda ids, batch, df: ids.merge(IdIndex.from_frame(batch)))
+
+# Dataframe vazio com as categorias já vistas: alinha os blocos do modo streaming
+register_derived('schema', lambda df: df.iloc[:0].copy(), lambda schema, batch, df: batch.iloc[:0].copy())
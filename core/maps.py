@@ -0,0 +1,157 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.lazy import lazy_import
+
+# Importados só quando um mapa é desenhado (core.lazy)
+folium = lazy_import('folium')
+plugins = lazy_import('folium.plugins')
+
+
+# ------------------------------------------------------------------------------
+# Configuração dos Mapas
+# ------------------------------------------------------------------------------
+
+MAP_MODES = {'median': 'Mediana por cidade e trânsito',
+             'cluster': 'Entregas agrupadas (cluster)',
+             'heatmap': 'Mapa de calor das entregas'}
+
+# Limite de pontos enviados ao navegador no modo cluster (amostra uniforme acima disso)
+MAX_CLUSTER_POINTS = 200_000
+
+# Casas decimais da grade do mapa de calor (2 casas ~ 1 km)
+HEATMAP_DECIMALS = 2
+
+# Colunas lidas pelas camadas do mapa (as únicas copiadas no filtro, ver core.filters.select_rows)
+MAP_COLUMNS = ['Delivery_location_latitude', 'Delivery_location_longitude', 'City', 'Road_traffic_density']
+
+# Limites do cache de mapas renderizados (LRU; o que for atingido primeiro): quantidade e bytes do HTML.
+# Um mapa cluster ou heatmap com muitos pontos tem dezenas de MB
+MAX_CACHED_MAPS = 32
+MAX_CACHED_MAP_BYTES = 128 * 1024 ** 2
+
+# Chave -> (html, bytes)
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Coordenadas das entregas como arrays
+# ------------------------------------------------------------------------------
+
+def _delivery_points(df):
+
+    latitudes = df['Delivery_location_latitude'].to_numpy(dtype=np.float64)
+    longitudes = df['Delivery_location_longitude'].to_numpy(dtype=np.float64)
+
+    return latitudes, longitudes
+
+
+# ------------------------------------------------------------------------------
+# Camadas do mapa
+# ------------------------------------------------------------------------------
+
+def _add_median_markers(map, df):
+
+    localizacao_media_entregas = (df.loc[:, MAP_COLUMNS]
+                                  .groupby(['City', 'Road_traffic_density'], observed=True)
+                                  .median()
+                                  .sort_index()
+                                  .reset_index())
+
+    for latitude, longitude, city, traffic in zip(localizacao_media_entregas['Delivery_location_latitude'].tolist(),
+                                                  localizacao_media_entregas['Delivery_location_longitude'].tolist(),
+                                                  localizacao_media_entregas['City'].astype(str).tolist(),
+                                                  localizacao_media_entregas['Road_traffic_density'].astype(str).tolist()):
+        folium.Marker([latitude, longitude], popup = f'{city} - {traffic}').add_to(map)
+
+
+def _add_cluster(map, df):
+
+    latitudes, longitudes = _delivery_points(df)
+
+    if len(latitudes) > MAX_CLUSTER_POINTS:
+        amostra = np.linspace(0, len(latitudes) - 1, MAX_CLUSTER_POINTS).astype(np.int64)
+        latitudes, longitudes = latitudes[amostra], longitudes[amostra]
+
+    pontos = np.column_stack([latitudes, longitudes]).round(6).tolist()
+    plugins.FastMarkerCluster(pontos).add_to(map)
+
+
+def _add_heatmap(map, df):
+
+    latitudes, longitudes = _delivery_points(df)
+
+    # Pontos somados em uma grade: o tamanho do HTML depende da grade, não dos pedidos
+    grade, pesos = np.unique(np.column_stack([latitudes, longitudes]).round(HEATMAP_DECIMALS),
+                             axis=0, return_counts=True)
+
+    pontos = np.column_stack([grade, pesos]).tolist()
+    plugins.HeatMap(pontos).add_to(map)
+
+
+_LAYERS = {'median': _add_median_markers,
+           'cluster': _add_cluster,
+           'heatmap': _add_heatmap}
+
+
+# ------------------------------------------------------------------------------
+# Gerar o HTML do mapa (com cache)
+# ------------------------------------------------------------------------------
+
+def map_html(df, mode='median', cache_key=None):
+
+    """ Esta função gera o HTML do mapa das entregas, com cache por estado dos filtros.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe filtrado
+           - mode: modo do mapa (chave de MAP_MODES):
+               - 'median': um marcador na mediana de cada cidade e trânsito
+               - 'cluster': todas as entregas, agrupadas no navegador (FastMarkerCluster)
+               - 'heatmap': mapa de calor das entregas, somadas em uma grade
+           - cache_key: chave do estado (ex.: versão do dataset e filtros normalizados);
+             None desliga o cache
+       Output:
+           - html: documento HTML do mapa, pronto para components.html
+    """
+
+    global _cache_bytes
+
+    chave = None if cache_key is None else (cache_key, mode)
+
+    if chave is not None:
+        with _lock:
+            if chave in _cache:
+                _cache.move_to_end(chave)
+                return _cache[chave][0]
+
+    map = folium.Map()
+    _LAYERS[mode](map, df)
+    html = folium.Figure().add_child(map).render()
+
+    tamanho = sys.getsizeof(html)
+
+    # Mapas maiores que o limite inteiro não são guardados
+    if chave is not None and tamanho <= MAX_CACHED_MAP_BYTES:
+        with _lock:
+            if chave not in _cache:
+                _cache[chave] = (html, tamanho)
+                _cache_bytes += tamanho
+            while len(_cache) > MAX_CACHED_MAPS or _cache_bytes > MAX_CACHED_MAP_BYTES:
+                _, (_, liberado) = _cache.popitem(last=False)
+                _cache_bytes -= liberado
+
+    return html
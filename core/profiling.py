@@ -0,0 +1,285 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+
+from core.lazy import import_timings
+from core.results import results
+
+
+# ------------------------------------------------------------------------------
+# Configuração da Instrumentação
+# ------------------------------------------------------------------------------
+
+# Liga a instrumentação para todas as sessões (ex.: CURRY_PROFILE=1)
+PROFILE_ENV = 'CURRY_PROFILE'
+
+# Liga a instrumentação para uma sessão pela URL (ex.: ?profile=1)
+PROFILE_QUERY_PARAM = 'profile'
+
+# Arquivo de log (JSON Lines, uma linha por execução de página)
+LOG_ENV = 'CURRY_PROFILE_LOG'
+DEFAULT_LOG_PATH = os.path.join('logs', 'performance.jsonl')
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+# Cada sessão do Streamlit executa a página em uma thread: o perfil ativo é por thread
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class PageProfiler:
+
+    """ Tempos das etapas de uma execução de página.
+
+        Desligado, call executa a função direto e phase não faz nada: o custo
+        fica em uma chamada de função por etapa.
+    """
+
+    def __init__(self, page, enabled):
+
+        self.page = page
+        self.enabled = enabled
+        self.phases = []
+        self.inicio = time.perf_counter()
+
+    # --------------------------------------------------------------------------
+    # Medir etapas
+    # --------------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _measure(self, name, rows=None):
+
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - inicio, rows)
+
+    def phase(self, name, rows=None):
+
+        """ Esta função retorna um context manager que mede o bloco como a etapa name.
+
+        Parâmetros:
+           Input:
+               - name: nome da etapa
+               - rows: quantidade de linhas processadas (opcional)
+           Output:
+               - context manager
+        """
+
+        return self._measure(name, rows) if self.enabled else contextlib.nullcontext()
+
+    def call(self, name, func, *args, **kwargs):
+
+        """ Esta função executa func(*args, **kwargs) e mede o tempo como a etapa name.
+
+            As linhas do resultado (dataframe, Series ou objeto com .table)
+            entram como a contagem de linhas da etapa.
+
+        Parâmetros:
+           Input:
+               - name: nome da etapa
+               - func: função medida
+               - args, kwargs: argumentos de func
+           Output:
+               - o resultado de func
+        """
+
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        inicio = time.perf_counter()
+        resultado = func(*args, **kwargs)
+        self.record(name, time.perf_counter() - inicio, _count_rows(resultado))
+
+        return resultado
+
+    def record(self, name, seconds, rows=None):
+
+        """ Esta função registra uma etapa já medida. """
+
+        if self.enabled:
+            self.phases.append({'phase': name, 'seconds': seconds, 'rows': rows})
+
+    # --------------------------------------------------------------------------
+    # Resultado
+    # --------------------------------------------------------------------------
+
+    def total(self):
+
+        """ Esta função retorna o tempo (s) desde o início da página. """
+
+        return time.perf_counter() - self.inicio
+
+    def to_frame(self):
+
+        """ Esta função retorna as etapas como dataframe (phase, ms, rows). """
+
+        df_aux = pd.DataFrame(self.phases, columns=['phase', 'seconds', 'rows'])
+        df_aux['ms'] = (df_aux.pop('seconds') * 1000).round(2)
+        df_aux['rows'] = df_aux['rows'].astype('Int64')
+
+        return df_aux.loc[:, ['phase', 'ms', 'rows']]
+
+    def to_record(self, extra=None):
+
+        """ Esta função monta a linha do log estruturado desta execução. """
+
+        registro = {'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                    'page': self.page,
+                    'total_seconds': self.total(),
+                    'phases': self.phases}
+        registro.update(extra or {})
+
+        return registro
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Instrumentação ligada?
+# ------------------------------------------------------------------------------
+
+def profiling_enabled():
+
+    """ Esta função verifica se a instrumentação está ligada, pela variável de
+        ambiente CURRY_PROFILE ou pelo parâmetro ?profile= da URL.
+
+    Parâmetros:
+       Output:
+           - True ou False
+    """
+
+    if os.environ.get(PROFILE_ENV, '').strip().lower() in _TRUE_VALUES:
+        return True
+
+    valores = st.experimental_get_query_params().get(PROFILE_QUERY_PARAM, [])
+
+    return any(valor.strip().lower() in _TRUE_VALUES for valor in valores)
+
+
+# ------------------------------------------------------------------------------
+# Início e perfil ativo da página
+# ------------------------------------------------------------------------------
+
+def start_page(page):
+
+    """ Esta função inicia o perfil da execução da página na thread atual.
+
+    Parâmetros:
+       Input:
+           - page: nome da página
+       Output:
+           - PageProfiler (desligado quando a instrumentação não foi pedida)
+    """
+
+    _local.profiler = PageProfiler(page, profiling_enabled())
+
+    return _local.profiler
+
+
+def current():
+
+    """ Esta função retorna o perfil ativo da thread (desligado fora de uma página). """
+
+    profiler = getattr(_local, 'profiler', None)
+
+    return profiler if profiler is not None else PageProfiler(None, False)
+
+
+# ------------------------------------------------------------------------------
+# Painel na barra lateral e log estruturado
+# ------------------------------------------------------------------------------
+
+def finish_page(profiler, dataset_timings=None):
+
+    """ Esta função encerra o perfil: mostra o painel na barra lateral e grava o log.
+
+    Parâmetros:
+       Input:
+           - profiler: PageProfiler retornado por start_page
+           - dataset_timings: tempos (s) da última leitura/limpeza do dataset
+             (core.loader.cleaning_timings), mostrados à parte, assim como os
+             tempos das importações sob demanda do processo (core.lazy)
+       Output:
+           - None
+    """
+
+    if not profiler.enabled:
+        return
+
+    dataset_timings = dataset_timings or {}
+    importacoes = import_timings()
+    cache = results.stats()
+
+    with st.sidebar.expander('⏱️ Desempenho', expanded=True):
+        st.markdown(f'**{profiler.page}**: {profiler.total() * 1000:,.0f} ms')
+        st.dataframe(profiler.to_frame(), use_container_width=True)
+
+        if dataset_timings:
+            st.markdown('Última carga do dataset')
+            st.dataframe(pd.DataFrame({'step': list(dataset_timings),
+                                       'ms': [round(s * 1000, 2) for s in dataset_timings.values()]}),
+                         use_container_width=True)
+
+        if importacoes:
+            st.markdown('Importações sob demanda (primeiro uso no processo)')
+            st.dataframe(pd.DataFrame({'module': list(importacoes),
+                                       'ms': [round(s * 1000, 2) for s in importacoes.values()]}),
+                         use_container_width=True)
+
+        st.markdown(f"Cache de resultados: {cache['hits']} hits, {cache['misses']} misses, "
+                    f"{cache['entries']} itens ({cache['bytes'] / 1024 ** 2:,.1f} MB)")
+
+    write_log(profiler.to_record({'dataset_build': dataset_timings, 'lazy_imports': importacoes,
+                                  'result_cache': cache}))
+
+
+def write_log(record, path=None):
+
+    """ Esta função acrescenta um registro ao log estruturado (JSON Lines).
+
+    Parâmetros:
+       Input:
+           - record: dicionário serializável
+           - path: caminho do log (padrão: CURRY_PROFILE_LOG ou logs/performance.jsonl)
+       Output:
+           - None
+    """
+
+    path = path or os.environ.get(LOG_ENV) or DEFAULT_LOG_PATH
+    linha = json.dumps(record, default=str, ensure_ascii=False)
+
+    # O log é auxiliar: falha de escrita não derruba a página
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _log_lock, open(path, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linha + '\n')
+    except OSError:
+        pass
+
+
+def _count_rows(resultado):
+
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return len(resultado)
+
+    table = getattr(resultado, 'table', None)
+
+    return len(table) if isinstance(table, pd.DataFrame) else None
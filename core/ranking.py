@@ -0,0 +1,78 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Posições dos k menores valores (seleção parcial, desempate pelo item)
+# ------------------------------------------------------------------------------
+
+def _smallest_k(values, items, k):
+
+    if len(values) <= k:
+        candidatos = np.arange(len(values))
+    else:
+        # k-ésimo menor valor em O(n); empates no limite entram como candidatos
+        limite = np.partition(values, k - 1)[k - 1]
+        candidatos = np.flatnonzero(values <= limite)
+
+    ordem = np.lexsort((items[candidatos], values[candidatos]))
+
+    return candidatos[ordem[:k]]
+
+
+# ------------------------------------------------------------------------------
+# Top-k e bottom-k por grupo
+# ------------------------------------------------------------------------------
+
+def top_bottom_k(df, group, item, value, k=10, agg='min'):
+
+    """ Esta função seleciona, para cada grupo, os k itens de menor e de maior valor.
+
+        O valor de cada item é agregado uma vez (groupby); depois, em cada grupo
+        existente nos dados, os k menores e os k maiores são escolhidos por
+        seleção parcial (np.partition), sem ordenar o grupo inteiro. Empates
+        são resolvidos pelo item, para o resultado ser estável.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe com os dados necessários para o cálculo
+           - group: coluna dos grupos (ex.: 'City')
+           - item: coluna dos itens ranqueados (ex.: 'Delivery_person_ID')
+           - value: coluna numérica do ranking (ex.: 'Time_taken(min)')
+           - k: quantidade de itens por grupo (inteiro >= 1; outro valor levanta ValueError)
+           - agg: agregação do valor por item (ex.: 'min', 'mean')
+       Output:
+           - (menores, maiores): dois dataframes com as colunas group, item e value,
+             por grupo, do menor para o maior (menores) e do maior para o menor (maiores)
+    """
+
+    # k <= 0 não falharia sozinho: candidatos[ordem[:k]] com k=-1 devolve todos os itens menos um
+    if isinstance(k, bool) or not isinstance(k, (int, np.integer)) or k < 1:
+        raise ValueError(f'k deve ser um inteiro >= 1, recebido {k!r}')
+
+    por_item = (df.loc[:, [group, item, value]]
+                  .groupby([group, item], observed=True)[value]
+                  .agg(agg)
+                  .reset_index())
+
+    valores = por_item[value].to_numpy(dtype=np.float64)
+    itens = por_item[item].astype(str).to_numpy()
+    menores, maiores = [], []
+
+    for _, posicoes in sorted(por_item.groupby(group, observed=True).indices.items()):
+        menores.append(posicoes[_smallest_k(valores[posicoes], itens[posicoes], k)])
+        maiores.append(posicoes[_smallest_k(-valores[posicoes], itens[posicoes], k)])
+
+    def _linhas(selecao):
+        posicoes = np.concatenate(selecao) if selecao else np.array([], dtype=np.int64)
+        return por_item.iloc[posicoes].reset_index(drop=True)
+
+    return _linhas(menores), _linhas(maiores)
@@ -0,0 +1,193 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.filters import normalize_filters
+from core.loader import DATASET_PATH, dataset_version
+from core.stats import GroupedStats
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Cache de Resultados
+# ------------------------------------------------------------------------------
+
+# Limites do cache (o que for atingido primeiro): quantidade de resultados e bytes estimados
+MAX_RESULT_ENTRIES = 256
+MAX_RESULT_BYTES = 512 * 1024 ** 2
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class ResultCache:
+
+    """ Cache LRU dos resultados das agregações e figuras, compartilhado pelas sessões do processo.
+
+        A chave é (estado, função, parâmetros): o estado identifica a versão do
+        dataset e os filtros (result_state), e os argumentos que são dados
+        (dataframes, cubos, estatísticas agrupadas) ficam fora da chave, pois
+        são determinados pelo estado. Os resultados são compartilhados entre
+        sessões e devem ser tratados como somente leitura.
+    """
+
+    def __init__(self, max_entries=MAX_RESULT_ENTRIES, max_bytes=MAX_RESULT_BYTES):
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --------------------------------------------------------------------------
+    # Consultar ou calcular
+    # --------------------------------------------------------------------------
+
+    def call(self, state, func, *args, **kwargs):
+
+        """ Esta função retorna o resultado em cache de func(*args, **kwargs) para o estado,
+            calculando e guardando na primeira vez.
+
+        Parâmetros:
+           Input:
+               - state: estado dos dados (result_state)
+               - func: função (ou método) que gera o resultado
+               - args, kwargs: argumentos de func; dados entram só pelo estado,
+                 os demais (listas, números, textos) fazem parte da chave
+           Output:
+               - o resultado de func (somente leitura)
+        """
+
+        chave = (state, func.__module__, func.__qualname__, _freeze(getattr(func, '__self__', None)),
+                 _freeze(args), _freeze(kwargs))
+
+        with self._lock:
+            if chave in self._entries:
+                self._entries.move_to_end(chave)
+                self.hits += 1
+                return self._entries[chave][0]
+            self.misses += 1
+
+        resultado = func(*args, **kwargs)
+        tamanho = _estimate_bytes(resultado)
+
+        # Resultados maiores que o limite inteiro não são guardados
+        if tamanho > self.max_bytes:
+            return resultado
+
+        with self._lock:
+            if chave not in self._entries:
+                self._entries[chave] = (resultado, tamanho)
+                self._bytes += tamanho
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, liberado) = self._entries.popitem(last=False)
+                self._bytes -= liberado
+                self.evictions += 1
+
+        return resultado
+
+    # --------------------------------------------------------------------------
+    # Contadores e limpeza
+    # --------------------------------------------------------------------------
+
+    def stats(self):
+
+        """ Esta função retorna os contadores do cache (hits, misses, evictions, entries, bytes). """
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def clear(self):
+
+        """ Esta função esvazia o cache (os contadores são mantidos). """
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# Instância única do processo
+results = ResultCache()
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Estado dos dados: versão do dataset + filtros normalizados
+# ------------------------------------------------------------------------------
+
+def result_state(filtros, path=DATASET_PATH):
+
+    """ Esta função gera o estado que identifica os dados filtrados de uma página.
+
+    Parâmetros:
+       Input:
+           - filtros: dicionário retornado por render_sidebar
+           - path: caminho do arquivo CSV
+       Output:
+           - tupla (chave da versão do dataset usada pela thread, filtros normalizados)
+    """
+
+    return (dataset_version(path), normalize_filters(filtros))
+
+
+def cached_call(state, func, *args, **kwargs):
+
+    """ Esta função consulta o cache de resultados do processo (ver ResultCache.call). """
+
+    return results.call(state, func, *args, **kwargs)
+
+
+# ------------------------------------------------------------------------------
+# Chave e tamanho dos resultados
+# ------------------------------------------------------------------------------
+
+def _freeze(valor):
+
+    # Dados ficam fora da chave: são determinados pelo estado (das estatísticas, só o grão e as medidas)
+    if isinstance(valor, GroupedStats):
+        return (type(valor).__name__, tuple(valor.keys), tuple(valor.measures))
+    if isinstance(valor, (pd.DataFrame, pd.Series, np.ndarray)):
+        return type(valor).__name__
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_freeze(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted(map(str, valor)))
+
+    return valor
+
+
+def _estimate_bytes(valor):
+
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(np.sum(valor.memory_usage(index=True)))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, GroupedStats):
+        return _estimate_bytes(valor.table) + sum(getattr(a, 'nbytes', 0) for a in getattr(valor, 'couriers', [])) \
+            + sum(getattr(a, 'nbytes', 0) for a in getattr(valor, 'centroids', []))
+    if isinstance(valor, (list, tuple)):
+        return sum(_estimate_bytes(v) for v in valor)
+
+    # Figuras do plotly: os arrays das séries
+    data = getattr(valor, 'data', None)
+    if isinstance(data, tuple):
+        return sum(v.nbytes if isinstance(v, np.ndarray) else 8 * len(v)
+                   for trace in data for v in trace.to_plotly_json().values()
+                   if isinstance(v, (np.ndarray, list, tuple)))
+
+    return 1024
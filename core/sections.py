@@ -0,0 +1,38 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import streamlit as st
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Seletor de seção (abas calculadas sob demanda)
+# ------------------------------------------------------------------------------
+
+def select_section(labels, key):
+
+    """ Esta função desenha um seletor horizontal no lugar de st.tabs e retorna a seção escolhida.
+
+        Com st.tabs, o conteúdo de todas as abas é calculado a cada execução
+        (a troca de aba acontece só no navegador). Com o seletor, a página
+        executa apenas o bloco da seção visível:
+
+            secao = select_section(['Visão Gerencial', 'Visão Tática'], key='empresa')
+            if secao == 'Visão Gerencial':
+                ...
+
+        A escolha fica no session_state (key) e sobrevive às mudanças de filtro.
+
+    Parâmetros:
+       Input:
+           - labels: lista com os nomes das seções, na ordem das abas
+           - key: chave única do seletor no session_state
+       Output:
+           - nome da seção selecionada
+    """
+
+    return st.radio('Seção', labels, key=key, horizontal=True, label_visibility='collapsed')
@@ -0,0 +1,183 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from core.api import METRIC_PARAMS, METRICS, metric_payload, parse_query
+from core.loader import DATASET_PATH, dataset_version, pin_dataset
+from core.results import results
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Servidor
+# ------------------------------------------------------------------------------
+
+# Endereço padrão: somente a máquina local
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Liga o servidor dentro do processo do Streamlit (ex.: CURRY_API_PORT=8765)
+API_PORT_ENV = 'CURRY_API_PORT'
+API_HOST_ENV = 'CURRY_API_HOST'
+
+_server = None
+_lock = threading.Lock()
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    """ Rotas GET em JSON:
+
+        - /health: estado do servidor, versão do dataset e contadores do cache
+        - /metrics: métricas disponíveis e seus parâmetros
+        - /metrics/<nome>?start=AAAA-MM-DD&end=AAAA-MM-DD&City=Urban,Metropolitian:
+          a métrica com os filtros da barra lateral (os ausentes ficam no estado inicial)
+
+        Erros respondem em JSON: 404 (rota ou métrica desconhecida), 400
+        (parâmetro inválido), 503 (fonte ou motor indisponível no processo) e
+        500 (demais falhas).
+    """
+
+    dataset_path = DATASET_PATH
+
+    def do_GET(self):
+
+        url = urlsplit(self.path)
+        partes = [p for p in url.path.split('/') if p]
+
+        try:
+            # Uma versão do dataset por requisição, mesmo com troca de versão no meio (core.watcher)
+            pin_dataset(self.dataset_path)
+
+            if partes == ['health']:
+                self._send(200, {'status': 'ok',
+                                 'dataset': list(dataset_version(self.dataset_path)),
+                                 'result_cache': results.stats()})
+            elif partes == ['metrics']:
+                self._send(200, {'metrics': {nome: {'source': fonte, 'params': sorted(METRIC_PARAMS.get(nome, {}))}
+                                             for nome, (fonte, _) in METRICS.items()}})
+            elif len(partes) == 2 and partes[0] == 'metrics':
+                filtros, params = parse_query(parse_qs(url.query))
+                self._send(200, metric_payload(partes[1], filtros, self.dataset_path, **params))
+            else:
+                self._send(404, {'error': f'rota desconhecida: {url.path}'})
+        except KeyError as erro:
+            self._send(404, {'error': str(erro.args[0]) if erro.args else str(erro)})
+        except ValueError as erro:
+            self._send(400, {'error': str(erro)})
+        except RuntimeError as erro:
+            # Fonte ou motor indisponível neste processo (ex.: linhas no modo streaming, duckdb não instalado)
+            self._send(503, {'error': str(erro)})
+        except Exception as erro:
+            self._send(500, {'error': f'{type(erro).__name__}: {erro}'})
+
+    def _send(self, status, corpo):
+
+        conteudo = json.dumps(corpo, ensure_ascii=False, default=str).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Criar e iniciar o servidor
+# ------------------------------------------------------------------------------
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, path=DATASET_PATH):
+
+    """ Esta função cria o servidor HTTP das métricas (uma thread por requisição).
+
+    Parâmetros:
+       Input:
+           - host, port: endereço do servidor
+           - path: caminho do arquivo CSV
+       Output:
+           - ThreadingHTTPServer (ainda sem atender)
+    """
+
+    handler = type('Handler', (MetricsHandler,), {'dataset_path': path})
+    servidor = ThreadingHTTPServer((host, port), handler)
+    servidor.daemon_threads = True
+
+    return servidor
+
+
+def start_server(host=DEFAULT_HOST, port=DEFAULT_PORT, path=DATASET_PATH):
+
+    """ Esta função inicia o servidor em uma thread de fundo, uma única vez por processo.
+
+        Dentro do processo do Streamlit, a API usa o mesmo dataset em cache e o
+        mesmo cache de resultados das sessões.
+
+    Parâmetros:
+       Input:
+           - host, port: endereço do servidor
+           - path: caminho do arquivo CSV
+       Output:
+           - ThreadingHTTPServer em execução
+    """
+
+    global _server
+
+    with _lock:
+        if _server is None:
+            _server = make_server(host, port, path)
+            threading.Thread(target=_server.serve_forever, name='metrics-api', daemon=True).start()
+
+    return _server
+
+
+def start_server_from_env():
+
+    """ Esta função inicia o servidor quando CURRY_API_PORT está definida (e retorna None se não estiver).
+
+        Uma porta já ocupada (ex.: outro processo do app) não derruba a página.
+    """
+
+    porta = os.environ.get(API_PORT_ENV)
+
+    if not porta:
+        return None
+
+    try:
+        return start_server(os.environ.get(API_HOST_ENV, DEFAULT_HOST), int(porta))
+    except OSError:
+        return None
+
+
+# ==============================================================================
+# Execução direta: python -m core.server [--port 8765]
+# ==============================================================================
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='API JSON das métricas do dashboard.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--dataset', default=DATASET_PATH, help='caminho do CSV')
+    args = parser.parse_args()
+
+    servidor = make_server(args.host, args.port, args.dataset)
+    print(f'Métricas em http://{args.host}:{args.port}/metrics')
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
@@ -0,0 +1,133 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import io
+import os
+import threading
+from datetime import timedelta
+
+import streamlit as st
+
+
+# ------------------------------------------------------------------------------
+# Configuração dos Filtros
+# ------------------------------------------------------------------------------
+
+# Rótulos dos filtros categóricos cujas opções vêm dos dados
+CATEGORY_LABELS = {'City': 'Quais as cidades?',
+                   'Weatherconditions': 'Quais as condições do clima?',
+                   'Type_of_vehicle': 'Quais os tipos de veículo?',
+                   'Festival': 'Pedidos durante festival?'}
+
+# Logo da barra lateral e a largura em que é mostrado
+LOGO_PATH = 'logo.png'
+LOGO_WIDTH = 180
+
+# Logo já reduzido e codificado: (caminho absoluto, largura) -> (mtime em nanossegundos, bytes PNG)
+_logos = {}
+_lock = threading.Lock()
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Logo (decodificado uma vez por processo)
+# ------------------------------------------------------------------------------
+
+def load_logo(path=LOGO_PATH, width=LOGO_WIDTH):
+
+    """ Esta função retorna o logo já reduzido para a largura da barra lateral, como PNG.
+
+        A imagem é decodificada e reduzida uma única vez por processo (e de
+        novo se o arquivo mudar). Entregues em bytes, na largura final, as
+        imagens não são reprocessadas pelo st.image a cada execução da página.
+
+    Parâmetros:
+       Input:
+           - path: caminho da imagem
+           - width: largura (px) em que o logo é mostrado
+       Output:
+           - bytes do PNG
+    """
+
+    chave = (os.path.abspath(path), width)
+    mtime = os.stat(path).st_mtime_ns
+
+    with _lock:
+        cached = _logos.get(chave)
+
+        if cached is None or cached[0] != mtime:
+            from PIL import Image
+
+            image = Image.open(path)
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), resample=Image.BILINEAR)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+            cached = _logos[chave] = (mtime, buffer.getvalue())
+
+    return cached[1]
+
+
+# ------------------------------------------------------------------------------
+# Barra Lateral com os filtros das páginas
+# ------------------------------------------------------------------------------
+
+def render_sidebar(date_index, bitmaps):
+
+    """ Esta função desenha a barra lateral (logo e filtros) comum às páginas.
+
+    Parâmetros:
+       Input:
+           - date_index: DateIndex do dataset (limites do filtro de datas)
+           - bitmaps: CategoryBitmaps do dataset (opções dos filtros categóricos)
+       Output:
+           - filtros: dicionário com 'start' (inclusivo), 'end' (exclusivo) e,
+             para cada coluna filtrada, a lista de valores escolhidos; pode ser
+             passado direto para select_rows e para o slice do cubo
+    """
+
+    # core.filters importa o loader (pandas, numpy): só as páginas com filtros pagam, não a Home
+    from core.filters import TRAFFIC_OPTIONS
+
+    # Imagem do Logo que está na Side Bar
+    st.sidebar.image(load_logo(), width=LOGO_WIDTH)
+
+    st.sidebar.markdown('# Curry Company')
+    st.sidebar.markdown('## Fastest Delivery in Town')
+    st.sidebar.markdown("""---""")
+
+    # --------------------------------------------------------------------------
+    # Criar Filtros
+
+    st.sidebar.markdown('### Selecione um intervalo de datas')
+    data_slider = st.sidebar.slider(
+        'Qual o intervalo?',
+        value = (date_index.first_day, date_index.last_day),
+        min_value = date_index.first_day,
+        max_value = date_index.last_day,
+        format = 'DD-MM-YYYY')
+
+    # Intervalo [start, end): o último dia selecionado entra no filtro
+    filtros = {'start': data_slider[0], 'end': data_slider[1] + timedelta(days=1)}
+
+    st.sidebar.markdown("""---""")
+
+    filtros['Road_traffic_density'] = st.sidebar.multiselect(
+        'Quais as condições do trânsito?',
+        TRAFFIC_OPTIONS,
+        default = TRAFFIC_OPTIONS)
+
+    for coluna, rotulo in CATEGORY_LABELS.items():
+        opcoes = bitmaps.values(coluna)
+        filtros[coluna] = st.sidebar.multiselect(rotulo, opcoes, default = opcoes)
+
+    st.sidebar.markdown("""---""")
+
+    st.sidebar.markdown('### Powered by Comunidade DS')
+
+    return filtros
@@ -0,0 +1,326 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+from core.loader import DATASET_PATH, load_derived, register_derived
+from core.stats import GroupedStats, accumulate, merge_tables
+
+
+# ------------------------------------------------------------------------------
+# Configuração dos Resumos de Quantis
+# ------------------------------------------------------------------------------
+
+# Grão dos resumos: um t-digest do tempo de entrega por célula
+SKETCH_KEYS = ['Order_Date', 'City', 'Road_traffic_density', 'Festival']
+SKETCH_MEASURES = {'time': 'Time_taken(min)'}
+
+# Compressão do t-digest: cada resumo guarda no máximo COMPRESSION / 2 + 1 centróides, qualquer que seja
+# o número de pedidos da célula. Maior = mais preciso e mais memória
+COMPRESSION = 100
+
+# Quantis entregues pelo rollup (colunas <medida>_p50, <medida>_p90, <medida>_p99)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class QuantileSketches(GroupedStats):
+
+    """ Resumos de quantis do tempo de entrega, no grão (Order_Date, City,
+        Road_traffic_density, Festival).
+
+        Além das estatísticas de core.stats.GroupedStats (contagem em 'orders',
+        mínimo e máximo usados nas pontas), cada célula guarda um t-digest: até
+        COMPRESSION / 2 + 1 centróides (média, peso), menores nas caudas, onde
+        ficam os percentis altos. Os quantis de qualquer agrupamento saem da
+        fusão dos resumos das células, sem ordenar os pedidos.
+
+        Os filtros de colunas fora do grão (ex.: Weatherconditions) não se
+        aplicam aos resumos e são ignorados pelo slice.
+    """
+
+    count_column = 'orders'
+
+    def __init__(self, table, centroids):
+
+        super().__init__(table, SKETCH_KEYS, SKETCH_MEASURES)
+        self.centroids = centroids
+
+    def _take(self, posicoes):
+
+        return QuantileSketches(self.table.iloc[posicoes].reset_index(drop=True),
+                                [self.centroids[i] for i in posicoes])
+
+    # --------------------------------------------------------------------------
+    # Filtrar células (só as colunas do grão)
+    # --------------------------------------------------------------------------
+
+    def slice(self, start=None, end=None, **filters):
+
+        """ Esta função filtra as células pelas datas e pelas colunas do grão (ver GroupedStats.slice). """
+
+        return super().slice(start, end, **{chave: valores for chave, valores in filters.items() if chave in self.keys})
+
+    # --------------------------------------------------------------------------
+    # Somar as células de outro objeto (ingestão incremental)
+    # --------------------------------------------------------------------------
+
+    def merge(self, other):
+
+        """ Esta função soma as células de outro objeto (ex.: de um lote novo) às células atuais.
+
+            Os resumos de células presentes nos dois objetos são fundidos e
+            comprimidos de novo; os demais são reaproveitados.
+
+        Parâmetros:
+           Input:
+               - other: QuantileSketches do lote
+           Output:
+               - novo QuantileSketches com as células combinadas
+        """
+
+        table, celula_self, celula_other = merge_tables(self.table, other.table, self.keys,
+                                                        self.measures, self.count_column)
+
+        centroids = [None] * len(table)
+        for celula, resumo in zip(celula_self, self.centroids):
+            centroids[celula] = resumo
+
+        fundidas = []
+        for celula, resumo in zip(celula_other, other.centroids):
+            if centroids[celula] is None:
+                centroids[celula] = resumo
+            else:
+                centroids[celula] = np.hstack([centroids[celula], resumo])
+                fundidas.append(celula)
+
+        if fundidas:
+            resumos = compress(*_flatten([centroids[c] for c in fundidas]))
+            for celula, resumo in zip(fundidas, _split(*resumos, len(fundidas))):
+                centroids[celula] = resumo
+
+        return QuantileSketches(table, centroids)
+
+    # --------------------------------------------------------------------------
+    # Agregar células
+    # --------------------------------------------------------------------------
+
+    def rollup(self, by, quantiles=QUANTILES):
+
+        """ Esta função agrega as células em um grão mais grosso, com os quantis do tempo de entrega.
+
+        Parâmetros:
+           Input:
+               - by: lista de dimensões (ou chaves derivadas, ex.: 'week_of_year');
+                 lista vazia retorna uma única linha com o total
+               - quantiles: quantis pedidos, entre 0 e 1
+           Output:
+               - df_aux: dataframe com as colunas de GroupedStats.rollup e, para cada
+                 quantil, <medida>_p<percentil> (ex.: time_p90)
+        """
+
+        df_aux = super().rollup(by)
+
+        if not len(self.table):
+            for q in quantiles:
+                df_aux[f'{_measure()}_p{q * 100:g}'] = np.nan
+            return df_aux
+
+        chaves = self._group_keys(by)
+        if chaves:
+            grupo_celula = self.table.groupby(chaves, observed=True).ngroup().to_numpy()
+        else:
+            grupo_celula = np.zeros(len(self.table), dtype=np.int64)
+
+        _, medias, pesos = _flatten(self.centroids)
+        grupo = np.repeat(grupo_celula, [resumo.shape[1] for resumo in self.centroids])
+        grupo, medias, pesos = compress(grupo, medias, pesos)
+
+        # Mínimo e máximo de cada grupo (pontas da interpolação)
+        medida = _measure()
+        n_grupos = grupo_celula.max() + 1
+        minimos, maximos = np.full(n_grupos, np.inf), np.full(n_grupos, -np.inf)
+        np.minimum.at(minimos, grupo_celula, self.table[f'{medida}_min'].to_numpy())
+        np.maximum.at(maximos, grupo_celula, self.table[f'{medida}_max'].to_numpy())
+
+        valores = interpolate(grupo, medias, pesos, minimos, maximos, quantiles)
+
+        # Grupos na ordem de df_aux, pelas chaves da primeira célula de cada grupo
+        if chaves:
+            primeira = np.unique(grupo_celula, return_index=True)[1]
+            indice = pd.MultiIndex.from_arrays([chave.to_numpy()[primeira] for chave in chaves])
+            posicao = indice.get_indexer(pd.MultiIndex.from_frame(df_aux[list(by)]))
+            valores = valores[posicao]
+
+        for i, q in enumerate(quantiles):
+            df_aux[f'{medida}_p{q * 100:g}'] = valores[:, i]
+
+        return df_aux
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+def _measure():
+
+    return next(iter(SKETCH_MEASURES))
+
+
+def _flatten(resumos):
+
+    # Centróides de vários resumos em arrays únicos, com o número do resumo de cada centróide
+    grupo = np.repeat(np.arange(len(resumos)), [resumo.shape[1] for resumo in resumos])
+    medias, pesos = np.hstack(resumos) if resumos else np.empty((2, 0))
+
+    return grupo, medias, pesos
+
+
+def _split(grupo, medias, pesos, n_grupos):
+
+    # Inverso de _flatten: um array (2, centróides) por grupo, na ordem dos grupos
+    cortes = np.searchsorted(grupo, np.arange(1, n_grupos))
+
+    return np.split(np.vstack([medias, pesos]), cortes, axis=1)
+
+
+# ------------------------------------------------------------------------------
+# Comprimir centróides (t-digest com fusão)
+# ------------------------------------------------------------------------------
+
+def compress(grupo, medias, pesos, compression=COMPRESSION):
+
+    """ Esta função funde os centróides de cada grupo em um t-digest de tamanho limitado.
+
+        Os centróides de cada grupo são ordenados pela média e fundidos quando
+        caem na mesma unidade da escala k(q) = compression / (2π) · asin(2q − 1),
+        em que q é a posição acumulada do centróide no grupo. A escala é mais
+        fina perto de q = 0 e q = 1: as caudas mantêm centróides pequenos e os
+        percentis altos continuam precisos. Todos os grupos são comprimidos de
+        uma vez, sem laço em Python.
+
+    Parâmetros:
+       Input:
+           - grupo: número do grupo de cada centróide (inteiros)
+           - medias: média de cada centróide (ou o valor, para pesos 1)
+           - pesos: quantidade de valores de cada centróide
+           - compression: compressão do t-digest (no máximo compression / 2 + 1 centróides por grupo)
+       Output:
+           - grupo, medias, pesos: centróides comprimidos, ordenados por grupo e média
+    """
+
+    if not len(grupo):
+        return grupo, medias, pesos
+
+    ordem = np.lexsort((medias, grupo))
+    grupo, medias, pesos = grupo[ordem], medias[ordem], pesos[ordem]
+
+    inicio = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+    tamanho = np.diff(np.r_[inicio, len(grupo)])
+    acumulado = np.cumsum(pesos)
+    antes = np.repeat((acumulado - pesos)[inicio], tamanho)
+    total = np.repeat(np.add.reduceat(pesos, inicio), tamanho)
+
+    # Posição (0 a 1) do meio de cada centróide no seu grupo e unidade da escala k
+    q = (acumulado - pesos / 2 - antes) / total
+    k = np.floor(compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+
+    cortes = np.flatnonzero(np.r_[True, (grupo[1:] != grupo[:-1]) | (k[1:] != k[:-1])])
+    pesos_fundidos = np.add.reduceat(pesos, cortes)
+
+    return grupo[cortes], np.add.reduceat(medias * pesos, cortes) / pesos_fundidos, pesos_fundidos
+
+
+# ------------------------------------------------------------------------------
+# Quantis a partir dos centróides
+# ------------------------------------------------------------------------------
+
+def interpolate(grupo, medias, pesos, minimos, maximos, quantiles):
+
+    """ Esta função estima os quantis de cada grupo a partir dos centróides comprimidos.
+
+        Cada centróide representa os seus valores no meio do seu peso
+        acumulado; entre dois centróides (e entre as pontas e o mínimo/máximo
+        do grupo) o valor é interpolado linearmente.
+
+    Parâmetros:
+       Input:
+           - grupo, medias, pesos: centróides ordenados por grupo e média (saída de compress),
+             com os grupos numerados de 0 a len(minimos) - 1, todos com algum centróide
+           - minimos, maximos: mínimo e máximo de cada grupo
+           - quantiles: quantis pedidos, entre 0 e 1
+       Output:
+           - array (grupos, quantis) com os valores estimados
+    """
+
+    n_grupos = len(minimos)
+    total = np.bincount(grupo, pesos, minlength=n_grupos)
+    deslocamento = np.r_[0, np.cumsum(total)[:-1]]
+
+    # Uma única curva crescente para todos os grupos: cada grupo ocupa [deslocamento, deslocamento + total]
+    posicoes = np.concatenate([deslocamento, np.cumsum(pesos) - pesos / 2, deslocamento + total])
+    valores = np.concatenate([minimos, medias, maximos])
+    grupos = np.concatenate([np.arange(n_grupos), grupo, np.arange(n_grupos)])
+
+    ordem = np.lexsort((posicoes, grupos))
+    alvo = deslocamento[:, None] + np.clip(np.asarray(quantiles, dtype='float64'), 0, 1)[None, :] * total[:, None]
+
+    resultado = np.interp(alvo.ravel(), posicoes[ordem], valores[ordem]).reshape(alvo.shape)
+
+    # Nas pontas exatas (q = 0 ou 1) a curva encosta no grupo vizinho: mínimo e máximo do próprio grupo
+    resultado[:, np.asarray(quantiles) <= 0] = minimos[:, None]
+    resultado[:, np.asarray(quantiles) >= 1] = maximos[:, None]
+
+    return resultado
+
+
+# ------------------------------------------------------------------------------
+# Construir os resumos
+# ------------------------------------------------------------------------------
+
+def build_sketches(df):
+
+    """ Esta função constrói os resumos de quantis a partir do dataset limpo, em uma única passada.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe limpo (schema compacto)
+       Output:
+           - QuantileSketches
+    """
+
+    table, celula = accumulate(df, SKETCH_KEYS, SKETCH_MEASURES, QuantileSketches.count_column)
+
+    valores = df[SKETCH_MEASURES[_measure()]].to_numpy(dtype='float64')
+    grupo, medias, pesos = compress(celula, valores, np.ones(len(valores)))
+
+    return QuantileSketches(table, _split(grupo, medias, pesos, len(table)))
+
+
+# ------------------------------------------------------------------------------
+# Resumos do dataset em cache
+# ------------------------------------------------------------------------------
+
+def load_sketches(path=DATASET_PATH):
+
+    """ Esta função retorna os resumos de quantis do dataset, construídos uma única vez por versão do arquivo.
+
+        Os resumos ficam em memória com qualquer motor (CURRY_ENGINE): o
+        tamanho depende do número de células, não do de pedidos.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - QuantileSketches (somente leitura)
+    """
+
+    return load_derived('time_sketches', path)
+
+
+register_derived('time_sketches', build_sketches, lambda sketches, batch, df: sketches.merge(build_sketches(batch)))
@@ -0,0 +1,130 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# ------------------------------------------------------------------------------
+# Configuração
+# ------------------------------------------------------------------------------
+
+# Aumentar sempre que a limpeza ou as colunas derivadas mudarem
+SNAPSHOT_VERSION = 4
+
+_METADATA_KEY = b'curry_company'
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Caminho do snapshot
+# ------------------------------------------------------------------------------
+
+def snapshot_path(csv_path):
+
+    """ Esta função retorna o caminho do snapshot colunar ao lado do CSV.
+
+    Parâmetros:
+       Input:
+           - csv_path: caminho do arquivo CSV de origem
+       Output:
+           - caminho do arquivo .feather (ex.: dataset/train.feather)
+    """
+
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+
+# ------------------------------------------------------------------------------
+# Gravar o snapshot
+# ------------------------------------------------------------------------------
+
+def write_snapshot(df, csv_key):
+
+    """ Esta função grava o dataframe limpo em formato Feather (Arrow IPC).
+
+        Nos metadados ficam a versão do snapshot, a chave do CSV de origem
+        (tamanho e mtime), os lotes já incluídos e o schema (tipo de cada coluna). A gravação é feita
+        em um arquivo temporário e depois trocada de forma atômica.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe limpo
+           - csv_key: chave do CSV de origem (caminho, tamanho, mtime, lotes)
+       Output:
+           - caminho do snapshot gravado
+    """
+
+    path = snapshot_path(csv_key[0])
+    metadata = {'version': SNAPSHOT_VERSION,
+                'source_size': csv_key[1],
+                'source_mtime_ns': csv_key[2],
+                'batches': [list(lote) for lote in csv_key[3]],
+                'schema': {coluna: str(tipo) for coluna, tipo in df.dtypes.items()}}
+
+    table = pa.Table.from_pandas(df)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           _METADATA_KEY: json.dumps(metadata).encode()})
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return path
+
+
+# ------------------------------------------------------------------------------
+# Ler o snapshot (memory-map)
+# ------------------------------------------------------------------------------
+
+def read_snapshot(csv_key):
+
+    """ Esta função lê o snapshot via memory-map, se ele ainda for válido.
+
+        O snapshot é descartado se não existir, se tiver sido gerado por outra
+        versão da limpeza, se o CSV de origem mudou de tamanho ou mtime ou se
+        algum lote incluído nele mudou ou foi removido.
+
+    Parâmetros:
+       Input:
+           - csv_key: chave do CSV de origem (caminho, tamanho, mtime, lotes)
+       Output:
+           - (df, lotes incluídos), ou None se o snapshot não for válido
+    """
+
+    path = snapshot_path(csv_key[0])
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = feather.read_table(path, memory_map=True)
+        metadata = json.loads(table.schema.metadata[_METADATA_KEY])
+    except (pa.ArrowException, OSError, KeyError, TypeError, ValueError):
+        return None
+
+    if (metadata.get('version') != SNAPSHOT_VERSION
+            or metadata.get('source_size') != csv_key[1]
+            or metadata.get('source_mtime_ns') != csv_key[2]):
+        return None
+
+    lotes = tuple(tuple(lote) for lote in metadata.get('batches', []))
+    if not set(lotes) <= set(csv_key[3]):
+        return None
+
+    df = table.to_pandas(split_blocks=True)
+
+    if {coluna: str(tipo) for coluna, tipo in df.dtypes.items()} != metadata['schema']:
+        return None
+
+    return df, lotes
@@ -0,0 +1,492 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from core.cube import CUBE_DIMENSIONS, CUBE_MEASURES, OrderCube
+from core.ingest import IdIndex, batch_dir, batch_files, drop_known_ids, prepare_frame, read_chunks
+from core.loader import (CHUNK_ROWS, DATASET_PATH, dataset_version, load_dataset, on_new_version,
+                         query_engine, streaming_enabled)
+from core.stats import RATINGS_KEYS, RATINGS_MEASURES, GroupedStats, ratings_engine, sample_std
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Banco Embutido
+# ------------------------------------------------------------------------------
+
+# Aumentar sempre que a tabela de pedidos mudar
+DATABASE_VERSION = 1
+
+# Colunas gravadas na tabela de pedidos: chaves do cubo e das avaliações + medidas
+TEXT_COLUMNS = list(dict.fromkeys(CUBE_DIMENSIONS[1:] + RATINGS_KEYS[1:]))
+VALUE_COLUMNS = list(dict.fromkeys(list(CUBE_MEASURES.values()) + list(RATINGS_MEASURES.values())))
+
+# Estruturas disponíveis: nome -> (grão, medidas, coluna de contagem), como em core.cube e core.stats
+STRUCTURES = {'cube': (CUBE_DIMENSIONS, CUBE_MEASURES, OrderCube.count_column),
+              'ratings_stats': (RATINGS_KEYS, RATINGS_MEASURES, GroupedStats.count_column)}
+
+# Diferenças de SQL entre os motores: parâmetro de data, chaves derivadas de core.stats.DERIVED_KEYS
+# (semana do ano como o %U do pandas, semanas começando no domingo), extensão do arquivo e módulo Python
+DIALECTS = {
+    'sqlite': {'date': '?',
+               'derived': {'week_of_year': "printf('%02d', (CAST(strftime('%j', Order_Date) AS INTEGER) + 6"
+                                           " - CAST(strftime('%w', Order_Date) AS INTEGER)) / 7)"},
+               'extension': '.sqlite',
+               'module': 'sqlite3'},
+    'duckdb': {'date': 'CAST(? AS DATE)',
+               'derived': {'week_of_year': "strftime(Order_Date, '%U')"},
+               'extension': '.duckdb',
+               'module': 'duckdb'},
+}
+
+_TABLE = 'orders'
+_META = 'curry_meta'
+
+# Bancos mantidos por CSV e motor: o da versão ativa e o da anterior, ainda usada pelas execuções
+# fixadas nela (core.loader.pin_dataset); os mais antigos gravados por este processo são apagados
+KEPT_VERSIONS = 2
+
+# Bancos abertos: (caminho absoluto do CSV, motor, chave da versão) -> Database, do mais antigo ao mais novo.
+# _lock protege só os dicionários; a gravação de um banco usa a trava da sua chave (_build_locks), e as
+# consultas aos bancos já abertos (e aos de outras versões ou motores) não esperam por ela
+_databases = {}
+_build_locks = {}
+_lock = threading.Lock()
+
+# Arquivos de banco gravados por este processo -> (caminho do CSV, motor): os únicos que ele apaga
+# (outros processos do app podem estar lendo os seus)
+_created = {}
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class Database:
+
+    """ Banco embutido (arquivo ao lado do CSV) com a tabela de pedidos limpa.
+
+        Cada thread usa a sua conexão somente leitura: as sessões do
+        Streamlit consultam o banco em paralelo, e o DuckDB ainda divide cada
+        consulta entre os núcleos.
+    """
+
+    def __init__(self, path, engine, key):
+
+        self.path = path
+        self.engine = engine
+        self.key = key
+        self.dialect = DIALECTS[engine]
+        self._local = threading.local()
+
+    def _connection(self):
+
+        conexao = getattr(self._local, 'conexao', None)
+
+        if conexao is None:
+            if self.engine == 'sqlite':
+                conexao = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            else:
+                conexao = _module('duckdb').connect(self.path, read_only=True)
+            self._local.conexao = conexao
+
+        return conexao
+
+    def query(self, sql, params=()):
+
+        """ Esta função executa uma consulta e retorna o resultado como dataframe.
+
+        Parâmetros:
+           Input:
+               - sql: consulta com parâmetros '?'
+               - params: valores dos parâmetros
+           Output:
+               - dataframe com as colunas da consulta
+        """
+
+        cursor = self._connection().execute(sql, list(params))
+        colunas = [descricao[0] for descricao in cursor.description]
+
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=colunas)
+
+
+class SqlStats:
+
+    """ Estatísticas agrupadas calculadas no banco embutido, com a interface de
+        core.stats.GroupedStats (slice e rollup).
+
+        O slice só acumula as condições (WHERE); o rollup envia uma única
+        consulta com os filtros e o GROUP BY para o banco. As páginas usam o
+        objeto no lugar do cubo ou das estatísticas das avaliações, sem mudar
+        as funções de core.views.
+    """
+
+    def __init__(self, database, keys, measures, count_column, where=(), params=()):
+
+        self.database = database
+        self.keys = keys
+        self.measures = measures
+        self.count_column = count_column
+        self.where = where
+        self.params = params
+
+    def _state(self):
+
+        return (self.database.path, self.database.key, tuple(self.keys), tuple(self.measures),
+                self.where, self.params)
+
+    def __eq__(self, other):
+
+        return isinstance(other, SqlStats) and self._state() == other._state()
+
+    def __hash__(self):
+
+        return hash(self._state())
+
+    # --------------------------------------------------------------------------
+    # Filtrar (condições do WHERE)
+    # --------------------------------------------------------------------------
+
+    def slice(self, start=None, end=None, **filters):
+
+        """ Esta função acrescenta os filtros às condições da consulta.
+
+        Parâmetros:
+           Input:
+               - start: data inicial (inclusiva) de Order_Date
+               - end: data final (exclusiva) de Order_Date, como o filtro da barra lateral
+               - filters: coluna -> lista de valores aceitos
+           Output:
+               - novo SqlStats com as condições
+        """
+
+        condicoes, params = list(self.where), list(self.params)
+
+        if start is not None:
+            condicoes.append(f'Order_Date >= {self.database.dialect["date"]}')
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            condicoes.append(f'Order_Date < {self.database.dialect["date"]}')
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        for coluna, valores in filters.items():
+            valores = [str(valor) for valor in valores]
+            if valores:
+                condicoes.append(f'{_quote(coluna)} IN ({", ".join("?" * len(valores))})')
+                params.extend(valores)
+            else:
+                condicoes.append('1 = 0')
+
+        return SqlStats(self.database, self.keys, self.measures, self.count_column,
+                        tuple(condicoes), tuple(params))
+
+    # --------------------------------------------------------------------------
+    # Agregar (GROUP BY no banco)
+    # --------------------------------------------------------------------------
+
+    def rollup(self, by, couriers=False):
+
+        """ Esta função agrega as linhas filtradas no grão pedido, dentro do banco.
+
+        Parâmetros:
+           Input:
+               - by: lista de colunas (ou chaves derivadas, ex.: 'week_of_year');
+                 lista vazia retorna uma única linha com o total
+               - couriers: True para contar os entregadores distintos de cada grupo
+           Output:
+               - df_aux: dataframe com as mesmas colunas de GroupedStats.rollup
+                 (e 'couriers' com couriers=True)
+        """
+
+        derivadas = self.database.dialect['derived']
+        chaves = [f'{derivadas[k]} AS {k}' if k in derivadas else _quote(k) for k in by]
+        contagem = self.count_column
+
+        selecao = chaves + [f'COUNT(*) AS {contagem}']
+        for medida, coluna in self.measures.items():
+            selecao += [f'SUM({_quote(coluna)}) AS {medida}_sum',
+                        f'SUM({_quote(coluna)} * {_quote(coluna)}) AS {medida}_sumsq',
+                        f'MIN({_quote(coluna)}) AS {medida}_min',
+                        f'MAX({_quote(coluna)}) AS {medida}_max']
+        if couriers:
+            selecao.append('COUNT(DISTINCT Delivery_person_ID) AS couriers')
+
+        sql = f'SELECT {", ".join(selecao)} FROM {_TABLE}'
+        if self.where:
+            sql += ' WHERE ' + ' AND '.join(self.where)
+        if by:
+            grupos = ', '.join(str(i + 1) for i in range(len(by)))
+            sql += f' GROUP BY {grupos} ORDER BY {grupos}'
+
+        df_aux = self.database.query(sql, self.params)
+
+        if 'Order_Date' in by:
+            df_aux['Order_Date'] = pd.to_datetime(df_aux['Order_Date'])
+
+        df_aux[contagem] = df_aux[contagem].astype('int64')
+        for medida in self.measures:
+            for estatistica in ('sum', 'sumsq', 'min', 'max'):
+                df_aux[f'{medida}_{estatistica}'] = df_aux[f'{medida}_{estatistica}'].astype('float64')
+            df_aux[f'{medida}_mean'] = df_aux[f'{medida}_sum'] / df_aux[contagem]
+            df_aux[f'{medida}_std'] = sample_std(df_aux[contagem], df_aux[f'{medida}_sum'], df_aux[f'{medida}_sumsq'])
+
+        colunas = list(by) + [contagem] + [f'{m}_{s}' for m in self.measures for s in ('mean', 'std', 'min', 'max')]
+        if couriers:
+            colunas.append('couriers')
+
+        return df_aux.loc[:, colunas]
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+def _quote(coluna):
+
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def _module(engine):
+
+    """ Esta função importa o módulo do motor (o DuckDB é opcional). """
+
+    try:
+        return importlib.import_module(DIALECTS[engine]['module'])
+    except ImportError as erro:
+        raise RuntimeError(f'O motor {engine} precisa do pacote opcional {DIALECTS[engine]["module"]} '
+                           f'(pip install {DIALECTS[engine]["module"]}).') from erro
+
+
+# ------------------------------------------------------------------------------
+# Caminho do banco
+# ------------------------------------------------------------------------------
+
+def database_path(csv_path, engine, key=None):
+
+    """ Esta função retorna o caminho do banco embutido ao lado do CSV.
+
+    Parâmetros:
+       Input:
+           - csv_path: caminho do arquivo CSV de origem
+           - engine: 'sqlite' ou 'duckdb'
+           - key: chave da versão do CSV; com ela, cada versão tem o seu arquivo
+       Output:
+           - caminho do banco (ex.: dataset/train.duckdb ou dataset/train-<versão>.duckdb)
+    """
+
+    base = os.path.splitext(csv_path)[0]
+
+    if key is not None:
+        base += '-' + hashlib.sha1(json.dumps(key[1:]).encode('utf-8')).hexdigest()[:12]
+
+    return base + DIALECTS[engine]['extension']
+
+
+# ------------------------------------------------------------------------------
+# Gravar a tabela de pedidos
+# ------------------------------------------------------------------------------
+
+def _orders_frame(df):
+
+    # Colunas da tabela, com datas ISO e categorias como texto (comparáveis nos dois motores)
+    df_aux = df.loc[:, ['Order_Date'] + TEXT_COLUMNS + VALUE_COLUMNS].copy()
+    df_aux['Order_Date'] = df_aux['Order_Date'].dt.strftime('%Y-%m-%d')
+    for coluna in TEXT_COLUMNS:
+        df_aux[coluna] = df_aux[coluna].astype(str)
+    for coluna in VALUE_COLUMNS:
+        df_aux[coluna] = df_aux[coluna].astype('float64')
+
+    return df_aux
+
+
+def _prepared_frames(path):
+
+    """ Esta função entrega o dataset limpo em partes: inteiro, ou em blocos no modo streaming. """
+
+    if not streaming_enabled(path):
+        yield load_dataset(path)
+        return
+
+    ids = None
+    fontes = [path] + [os.path.join(batch_dir(path), nome) for nome, _, _ in batch_files(path)]
+
+    for fonte in fontes:
+        for bruto in read_chunks(fonte, CHUNK_ROWS):
+            if fonte != path:
+                bruto = drop_known_ids(bruto, ids)
+            bloco = prepare_frame(bruto, {})
+            ids = IdIndex.from_frame(bloco) if ids is None else ids.merge(IdIndex.from_frame(bloco))
+            yield bloco
+
+
+def build_database(frames, db_path, engine, key):
+
+    """ Esta função grava a tabela de pedidos no banco embutido.
+
+        A gravação é feita em um arquivo temporário e depois trocada de forma
+        atômica. A chave do CSV de origem fica na tabela de metadados.
+
+    Parâmetros:
+       Input:
+           - frames: dataframes limpos (o dataset inteiro ou blocos)
+           - db_path: caminho do banco
+           - engine: 'sqlite' ou 'duckdb'
+           - key: chave da versão do CSV de origem (core.loader.dataset_version)
+       Output:
+           - caminho do banco gravado
+    """
+
+    modulo = _module(engine)
+    tmp_path = '{}.{}.tmp'.format(db_path, os.getpid())
+    colunas = ['"Order_Date" DATE' if engine == 'duckdb' else '"Order_Date" TEXT']
+    colunas += [f'{_quote(c)} TEXT' for c in TEXT_COLUMNS] + [f'{_quote(c)} DOUBLE' for c in VALUE_COLUMNS]
+
+    try:
+        conexao = modulo.connect(tmp_path)
+        conexao.execute(f'CREATE TABLE {_TABLE} ({", ".join(colunas)})')
+        insercao = f'INSERT INTO {_TABLE} VALUES ({", ".join("?" * (1 + len(TEXT_COLUMNS) + len(VALUE_COLUMNS)))})'
+
+        for df in frames:
+            df_aux = _orders_frame(df)
+            if engine == 'duckdb':
+                conexao.register('bloco', df_aux)
+                conexao.execute(f'INSERT INTO {_TABLE} SELECT * FROM bloco')
+                conexao.unregister('bloco')
+            else:
+                conexao.executemany(insercao, df_aux.itertuples(index=False, name=None))
+
+        # Índice de datas para o SQLite (o DuckDB usa os min/max por bloco da própria tabela)
+        if engine == 'sqlite':
+            conexao.execute(f'CREATE INDEX {_TABLE}_date ON {_TABLE} ("Order_Date")')
+
+        conexao.execute(f'CREATE TABLE {_META} (version INTEGER, source TEXT)')
+        conexao.execute(f'INSERT INTO {_META} VALUES (?, ?)', [DATABASE_VERSION, json.dumps(key[1:])])
+        conexao.commit()
+        conexao.close()
+        os.replace(tmp_path, db_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return db_path
+
+
+def _database_valid(db_path, engine, key):
+
+    if not os.path.exists(db_path):
+        return False
+
+    try:
+        conexao = _module(engine).connect(db_path, read_only=True) if engine == 'duckdb' \
+            else sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            versao, origem = conexao.execute(f'SELECT version, source FROM {_META}').fetchone()
+        finally:
+            conexao.close()
+    except Exception:
+        return False
+
+    return versao == DATABASE_VERSION and origem == json.dumps(key[1:])
+
+
+# ------------------------------------------------------------------------------
+# Banco da versão atual do CSV
+# ------------------------------------------------------------------------------
+
+def load_database(engine, path=DATASET_PATH):
+
+    """ Esta função abre o banco embutido do CSV, gravando-o antes se não existir ou estiver desatualizado.
+
+    Parâmetros:
+       Input:
+           - engine: 'sqlite' ou 'duckdb'
+           - path: caminho do arquivo CSV
+       Output:
+           - Database
+    """
+
+    key = dataset_version(path)
+    chave = (key[0], engine, key)
+
+    with _lock:
+        banco = _databases.get(chave)
+        if banco is not None:
+            return banco
+        trava = _build_locks.setdefault(chave, threading.Lock())
+
+    # Uma gravação por chave; quem chegar durante ela espera só por esta chave
+    with trava:
+        with _lock:
+            banco = _databases.get(chave)
+        if banco is not None:
+            return banco
+
+        db_path = database_path(key[0], engine, key)
+        gravado = not _database_valid(db_path, engine, key)
+        if gravado:
+            build_database(_prepared_frames(path), db_path, engine, key)
+        banco = Database(db_path, engine, key)
+
+        with _lock:
+            _databases[chave] = banco
+            _build_locks.pop(chave, None)
+            if gravado:
+                _created[db_path] = (key[0], engine)
+            _drop_old_databases(key[0], engine)
+
+    return banco
+
+
+def _drop_old_databases(csv_path, engine):
+
+    # Mantém os KEPT_VERSIONS bancos mais novos do CSV; dos demais, apaga só os arquivos gravados por este
+    # processo (chamada com _lock)
+    versoes = [chave for chave in _databases if chave[:2] == (csv_path, engine)]
+    for chave in versoes[:-KEPT_VERSIONS]:
+        del _databases[chave]
+
+    mantidos = {_databases[chave].path for chave in versoes[-KEPT_VERSIONS:]}
+
+    for caminho, origem in list(_created.items()):
+        if origem == (csv_path, engine) and caminho not in mantidos:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+            del _created[caminho]
+
+
+def load_sql_stats(name, engine, path=DATASET_PATH):
+
+    """ Esta função retorna a estrutura name ('cube' ou 'ratings_stats') calculada no banco embutido.
+
+    Parâmetros:
+       Input:
+           - name: nome da estrutura (chave de STRUCTURES)
+           - engine: 'sqlite' ou 'duckdb'
+           - path: caminho do arquivo CSV
+       Output:
+           - SqlStats sem filtros
+    """
+
+    keys, measures, contagem = STRUCTURES[name]
+
+    return SqlStats(load_database(engine, path), keys, measures, contagem)
+
+
+def _refresh_database(path):
+
+    # Troca de versão em segundo plano (core.watcher): os bancos em uso (motor ativo e, no modo streaming,
+    # o das avaliações) são refeitos na mesma thread
+    for motor in sorted({query_engine(), ratings_engine(path)} - {'pandas'}):
+        load_database(motor, path)
+
+
+on_new_version(_refresh_database)
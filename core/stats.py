@@ -0,0 +1,360 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+
+from core.cleaning import concat_frames
+from core.loader import DATASET_PATH, load_derived, query_engine, register_derived, streaming_enabled
+
+
+# ------------------------------------------------------------------------------
+# Configuração
+# ------------------------------------------------------------------------------
+
+# Chaves derivadas das colunas da tabela, disponíveis no rollup
+DERIVED_KEYS = {'week_of_year': lambda table: table['Order_Date'].dt.strftime('%U')}
+
+# Estatísticas entregues pelo rollup para cada medida
+STATISTICS = ('mean', 'std', 'min', 'max')
+
+# Grão e medidas dos entregadores (Visão Entregadores), com os filtros da barra lateral: avaliações,
+# tempo de entrega (top entregadores), idade e condição do veículo (métricas gerais). Com o entregador
+# no grão quase todo pedido é uma célula (0,97 célula por linha com 345 mil linhas, ~150 bytes cada):
+# no modo streaming elas não ficam em memória, e sim no banco embutido (ratings_engine)
+RATINGS_KEYS = ['Order_Date', 'Delivery_person_ID', 'Road_traffic_density', 'City',
+                'Weatherconditions', 'Type_of_vehicle', 'Festival']
+RATINGS_MEASURES = {'ratings': 'Delivery_person_Ratings',
+                    'time': 'Time_taken(min)',
+                    'age': 'Delivery_person_Age',
+                    'condition': 'Vehicle_condition'}
+
+# Motor das estatísticas das avaliações no modo streaming com CURRY_ENGINE=pandas: o banco embutido
+# (core.sql) é gravado bloco a bloco e fica em disco, e o sqlite3 vem com o Python
+STREAMING_RATINGS_ENGINE = 'sqlite'
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class GroupedStats:
+
+    """ Motor de estatísticas agrupadas: uma passada nos dados, no grão mais fino.
+
+        Cada célula (combinação das chaves) guarda a contagem e, para cada
+        medida, a soma, a soma dos quadrados, o mínimo e o máximo. Média e
+        desvio padrão amostral de qualquer agrupamento mais grosso são
+        derivados dessas somas, sem voltar aos dados brutos.
+
+        Os filtros (slice) e as agregações (rollup) custam o número de células,
+        não o número de linhas.
+    """
+
+    count_column = 'count'
+
+    def __init__(self, table, keys, measures):
+
+        self.table = table
+        self.keys = keys
+        self.measures = measures
+
+    # --------------------------------------------------------------------------
+    # Construir a partir do dataframe
+    # --------------------------------------------------------------------------
+
+    @classmethod
+    def from_frame(cls, df, keys, measures):
+
+        """ Esta função acumula as estatísticas do dataframe no grão das chaves.
+
+        Parâmetros:
+           Input:
+               - df: Dataframe limpo
+               - keys: lista de colunas que formam o grão mais fino
+               - measures: dicionário prefixo -> coluna numérica (ex.: {'time': 'Time_taken(min)'})
+           Output:
+               - objeto da classe com a tabela de células
+        """
+
+        table, _ = accumulate(df, keys, measures, cls.count_column)
+
+        return cls(table, keys, measures)
+
+    # --------------------------------------------------------------------------
+    # Filtrar células
+    # --------------------------------------------------------------------------
+
+    def slice(self, start=None, end=None, **filters):
+
+        """ Esta função filtra as células.
+
+        Parâmetros:
+           Input:
+               - start: data inicial (inclusiva) de Order_Date
+               - end: data final (exclusiva) de Order_Date, como o filtro da barra lateral
+               - filters: chave -> lista de valores aceitos (ex.: Road_traffic_density=['Low', 'Jam'])
+           Output:
+               - objeto da mesma classe apenas com as células selecionadas
+        """
+
+        linhas_selecionadas = np.ones(len(self.table), dtype=bool)
+
+        if start is not None:
+            linhas_selecionadas &= (self.table['Order_Date'] >= start).to_numpy()
+        if end is not None:
+            linhas_selecionadas &= (self.table['Order_Date'] < end).to_numpy()
+        for chave, valores in filters.items():
+            linhas_selecionadas &= self.table[chave].isin(valores).to_numpy()
+
+        return self._take(np.flatnonzero(linhas_selecionadas))
+
+    def _take(self, posicoes):
+
+        return type(self)(self.table.iloc[posicoes].reset_index(drop=True), self.keys, self.measures)
+
+    # --------------------------------------------------------------------------
+    # Somar outro conjunto de células (ingestão incremental)
+    # --------------------------------------------------------------------------
+
+    def merge(self, other):
+
+        """ Esta função soma as células de outro objeto (ex.: de um lote novo) às células atuais.
+
+            Contagens, somas e somas dos quadrados são somadas; mínimos e máximos
+            combinados. O custo depende do número de células, não das linhas
+            que as formaram.
+
+        Parâmetros:
+           Input:
+               - other: objeto da mesma classe, com as mesmas chaves e medidas
+           Output:
+               - novo objeto com as células combinadas
+        """
+
+        table, _, _ = merge_tables(self.table, other.table, self.keys, self.measures, self.count_column)
+
+        return type(self)(table, self.keys, self.measures)
+
+    # --------------------------------------------------------------------------
+    # Agregar células
+    # --------------------------------------------------------------------------
+
+    def _group_keys(self, by):
+
+        return [DERIVED_KEYS[k](self.table).rename(k) if k in DERIVED_KEYS else self.table[k] for k in by]
+
+    def rollup(self, by):
+
+        """ Esta função agrega as células em um grão mais grosso.
+
+        Parâmetros:
+           Input:
+               - by: lista de chaves (ou chaves derivadas, ex.: 'week_of_year');
+                 lista vazia retorna uma única linha com o total
+           Output:
+               - df_aux: dataframe com as chaves, a contagem e, para cada medida,
+                 <medida>_mean, <medida>_std (amostral), <medida>_min e <medida>_max
+        """
+
+        table = self.table
+        chaves = self._group_keys(by)
+        contagem = self.count_column
+        colunas_soma = [contagem] + [f'{m}_{s}' for m in self.measures for s in ('sum', 'sumsq')]
+
+        if chaves:
+            grupos = table.groupby(chaves, observed=True)
+            df_aux = grupos[colunas_soma].sum()
+            for medida in self.measures:
+                df_aux[f'{medida}_min'] = grupos[f'{medida}_min'].min()
+                df_aux[f'{medida}_max'] = grupos[f'{medida}_max'].max()
+        else:
+            df_aux = table[colunas_soma].sum().to_frame().T
+            for medida in self.measures:
+                df_aux[f'{medida}_min'] = table[f'{medida}_min'].min()
+                df_aux[f'{medida}_max'] = table[f'{medida}_max'].max()
+
+        for medida in self.measures:
+            df_aux[f'{medida}_mean'] = df_aux[f'{medida}_sum'] / df_aux[contagem]
+            df_aux[f'{medida}_std'] = sample_std(df_aux[contagem], df_aux[f'{medida}_sum'],
+                                                 df_aux[f'{medida}_sumsq'])
+
+        colunas = [contagem] + [f'{m}_{s}' for m in self.measures for s in STATISTICS]
+        df_aux = df_aux.loc[:, colunas].sort_index()
+        df_aux[contagem] = df_aux[contagem].astype('int64')
+
+        return df_aux.reset_index(drop=not chaves)
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Acumular contagem, soma, soma dos quadrados, mínimo e máximo por célula
+# ------------------------------------------------------------------------------
+
+def accumulate(df, keys, measures, count_column='count'):
+
+    """ Esta função percorre o dataframe uma única vez e acumula as estatísticas por célula.
+
+    Parâmetros:
+       Input:
+           - df: Dataframe limpo
+           - keys: lista de colunas que formam o grão mais fino
+           - measures: dicionário prefixo -> coluna numérica
+           - count_column: nome da coluna de contagem
+       Output:
+           - table: dataframe com as chaves e, para cada medida, <medida>_sum,
+             <medida>_sumsq, <medida>_min e <medida>_max
+           - celula: array com o número da célula (linha de table) de cada linha de df
+    """
+
+    df_aux = df.loc[:, keys].copy()
+    agregacoes = {count_column: (keys[0], 'size')}
+
+    for medida, coluna in measures.items():
+        df_aux[medida] = df[coluna].astype('float64')
+        df_aux[f'{medida}_sq'] = df_aux[medida] ** 2
+        agregacoes.update({f'{medida}_sum': (medida, 'sum'),
+                           f'{medida}_sumsq': (f'{medida}_sq', 'sum'),
+                           f'{medida}_min': (medida, 'min'),
+                           f'{medida}_max': (medida, 'max')})
+
+    grupos = df_aux.groupby(keys, observed=True)
+    table = grupos.agg(**agregacoes).reset_index()
+
+    # Número da célula de cada linha (mesma ordem das linhas de table)
+    celula = grupos.ngroup().to_numpy().astype(np.int64)
+
+    return table, celula
+
+
+# ------------------------------------------------------------------------------
+# Combinar duas tabelas de células
+# ------------------------------------------------------------------------------
+
+def merge_tables(table, other, keys, measures, count_column='count'):
+
+    """ Esta função combina duas tabelas de células (geradas por accumulate) no mesmo grão.
+
+        Só as células de table com a primeira chave presente em other (ex.: os
+        dias de um lote) são reagrupadas; as demais são copiadas. A tabela
+        combinada continua ordenada pela primeira chave.
+
+    Parâmetros:
+       Input:
+           - table, other: tabelas de células
+           - keys: colunas que formam o grão
+           - measures: dicionário prefixo -> coluna numérica
+           - count_column: nome da coluna de contagem
+       Output:
+           - tabela: tabela combinada
+           - celula_table: número da célula combinada de cada linha de table
+           - celula_other: número da célula combinada de cada linha de other
+    """
+
+    colunas_soma = [count_column] + [f'{m}_{s}' for m in measures for s in ('sum', 'sumsq')]
+    colunas_min = [f'{m}_min' for m in measures]
+    colunas_max = [f'{m}_max' for m in measures]
+
+    afetadas = table[keys[0]].isin(other[keys[0]].unique()).to_numpy()
+    intactas = np.flatnonzero(~afetadas)
+
+    grupos = concat_frames([table.loc[afetadas], other]).groupby(keys, observed=True)
+    celula = grupos.ngroup().to_numpy().astype(np.int64) + len(intactas)
+    novas = grupos[colunas_soma].sum().join([grupos[colunas_min].min(), grupos[colunas_max].max()])
+    # Lotes mais recentes que o histórico: as células intactas são o início da tabela (fatia, sem cópia)
+    if not len(intactas) or intactas[-1] == len(intactas) - 1:
+        intocada = table.iloc[:len(intactas)]
+    else:
+        intocada = table.iloc[intactas]
+    tabela = concat_frames([intocada, novas.reset_index()[table.columns]])
+
+    celula_table = np.empty(len(table), dtype=np.int64)
+    celula_table[intactas] = np.arange(len(intactas))
+    celula_table[afetadas] = celula[:afetadas.sum()]
+    celula_other = celula[afetadas.sum():]
+
+    # Lotes com datas no meio do histórico: reordenar pela primeira chave
+    ordem = np.argsort(tabela[keys[0]].to_numpy(), kind='stable')
+    if (ordem != np.arange(len(ordem))).any():
+        tabela = tabela.iloc[ordem].reset_index(drop=True)
+        posicao = np.empty_like(ordem)
+        posicao[ordem] = np.arange(len(ordem))
+        celula_table, celula_other = posicao[celula_table], posicao[celula_other]
+
+    return tabela, celula_table, celula_other
+
+
+# ------------------------------------------------------------------------------
+# Desvio padrão amostral a partir de contagem, soma e soma dos quadrados
+# ------------------------------------------------------------------------------
+
+def sample_std(count, total, total_sq):
+
+    """ Esta função deriva o desvio padrão amostral (ddof=1, como o pandas) das somas.
+
+    Parâmetros:
+       Input:
+           - count: contagem por grupo
+           - total: soma dos valores por grupo
+           - total_sq: soma dos quadrados por grupo
+       Output:
+           - Series com o desvio padrão (NaN para grupos com menos de 2 valores)
+    """
+
+    variancia = (total_sq - total ** 2 / count) / (count - 1)
+
+    return np.sqrt(variancia.clip(lower=0)).where(count > 1)
+
+
+# ------------------------------------------------------------------------------
+# Estatísticas das avaliações do dataset em cache
+# ------------------------------------------------------------------------------
+
+def ratings_engine(path=DATASET_PATH):
+
+    """ Esta função indica o motor que calcula as estatísticas das avaliações.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - o motor de CURRY_ENGINE; com 'pandas' no modo streaming, STREAMING_RATINGS_ENGINE
+    """
+
+    motor = query_engine()
+
+    if motor == 'pandas' and streaming_enabled(path):
+        return STREAMING_RATINGS_ENGINE
+
+    return motor
+
+
+def load_ratings_stats(path=DATASET_PATH):
+
+    """ Esta função retorna as estatísticas das avaliações, acumuladas uma única vez por versão do arquivo.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+       Output:
+           - GroupedStats no grão RATINGS_KEYS (somente leitura); com CURRY_ENGINE=sqlite/duckdb
+             ou no modo streaming (ratings_engine), o core.sql.SqlStats equivalente, calculado
+             no banco embutido
+    """
+
+    motor = ratings_engine(path)
+
+    if motor != 'pandas':
+        from core.sql import load_sql_stats
+        return load_sql_stats('ratings_stats', motor, path)
+
+    return load_derived('ratings_stats', path)
+
+
+register_derived('ratings_stats',
+                 lambda df: GroupedStats.from_frame(df, RATINGS_KEYS, RATINGS_MEASURES),
+                 lambda stats, batch, df: stats.merge(GroupedStats.from_frame(batch, stats.keys, stats.measures)),
+                 streaming=False)
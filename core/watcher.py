@@ -0,0 +1,129 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import argparse
+import os
+import threading
+import time
+import traceback
+
+from core.loader import DATASET_PATH, cleaning_timings, load_derived, refresh_dataset
+
+
+# ------------------------------------------------------------------------------
+# Configuração do Observador
+# ------------------------------------------------------------------------------
+
+# Intervalo (s) entre as consultas ao CSV e à pasta de lotes; CURRY_WATCH_INTERVAL=0 desliga
+WATCH_INTERVAL_ENV = 'CURRY_WATCH_INTERVAL'
+DEFAULT_INTERVAL = 5.0
+
+_watchers = {}
+_lock = threading.Lock()
+
+
+# ==============================================================================
+# Classes
+# ==============================================================================
+
+class DatasetWatcher(threading.Thread):
+
+    """ Thread de fundo que consulta o CSV a cada interval segundos.
+
+        Quando o arquivo (ou a pasta de lotes) muda, a versão nova é limpa e
+        agregada nesta thread (core.loader.refresh_dataset) e trocada de forma
+        atômica. As sessões seguem com a versão anterior até a próxima execução
+        da página; nenhuma requisição espera a limpeza.
+    """
+
+    def __init__(self, path, interval):
+
+        super().__init__(name='dataset-watcher', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.swaps = 0
+        self.last_error = None
+        self._parar = threading.Event()
+
+    def run(self):
+
+        while not self._parar.wait(self.interval):
+            try:
+                if refresh_dataset(self.path):
+                    self.swaps += 1
+            except Exception:
+                # CSV copiado pela metade, lote inválido, etc.: a versão ativa continua, nova tentativa no próximo ciclo
+                self.last_error = traceback.format_exc()
+
+    def stop(self):
+
+        self._parar.set()
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Iniciar o observador
+# ------------------------------------------------------------------------------
+
+def start_watcher(path=DATASET_PATH, interval=DEFAULT_INTERVAL):
+
+    """ Esta função inicia o observador do CSV em uma thread de fundo, uma única vez por caminho.
+
+    Parâmetros:
+       Input:
+           - path: caminho do arquivo CSV
+           - interval: segundos entre as consultas ao arquivo
+       Output:
+           - DatasetWatcher em execução
+    """
+
+    chave = os.path.abspath(path)
+
+    with _lock:
+        if chave not in _watchers:
+            _watchers[chave] = DatasetWatcher(chave, interval)
+            _watchers[chave].start()
+
+    return _watchers[chave]
+
+
+def start_watcher_from_env(path=DATASET_PATH):
+
+    """ Esta função inicia o observador com o intervalo de CURRY_WATCH_INTERVAL (padrão DEFAULT_INTERVAL).
+
+        Com CURRY_WATCH_INTERVAL=0 o observador fica desligado e uma mudança no
+        CSV é processada pela primeira página que a encontrar (retorna None).
+    """
+
+    valor = os.environ.get(WATCH_INTERVAL_ENV, '').strip()
+    intervalo = float(valor) if valor else DEFAULT_INTERVAL
+
+    if intervalo <= 0:
+        return None
+
+    return start_watcher(path, intervalo)
+
+
+# ==============================================================================
+# Execução direta: python -m core.watcher [--dataset dataset/train.csv] [--interval 5]
+# ==============================================================================
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Observa o CSV e troca a versão do dataset em segundo plano.')
+    parser.add_argument('--dataset', default=DATASET_PATH, help='caminho do CSV')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='segundos entre as consultas')
+    args = parser.parse_args()
+
+    print(f'{len(load_derived("id_index", args.dataset))} pedidos carregados; observando {args.dataset}')
+
+    while True:
+        inicio = time.perf_counter()
+        if refresh_dataset(args.dataset):
+            print(f'Versão nova: {len(load_derived("id_index", args.dataset))} pedidos '
+                  f'em {time.perf_counter() - inicio:.2f}s ({", ".join(f"{etapa} {s:.3f}s" for etapa, s in cleaning_timings(args.dataset).items())})')
+        time.sleep(args.interval)
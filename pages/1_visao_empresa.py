@@ -2,16 +2,22 @@
 # Libraries
 # ==============================================================================
 
-import pandas as pd
-import re
-import plotly.express as px
-import folium
-from haversine import haversine
 import streamlit as st
-from PIL import Image
-from streamlit_folium import folium_static
-import plotly.graph_objects as go
-import numpy as np
+import streamlit.components.v1 as components
+
+from core.cube import load_cube
+from core.filters import load_bitmaps, load_date_index, normalize_filters, select_rows
+from core.loader import (STREAMING_ENV, cleaning_timings, dataset_version, load_dataset, pin_dataset,
+                         streaming_enabled)
+from core.maps import MAP_COLUMNS, MAP_MODES, map_html
+from core.profiling import current, finish_page, start_page
+from core.results import cached_call, result_state
+from core.sections import select_section
+from core.server import start_server_from_env
+from core.sidebar import render_sidebar
+from core.watcher import start_watcher_from_env
+from views.empresa import (order_by_week, order_metric, order_share_by_week,
+                           traffic_order_city, traffic_order_share)
 
 
 # ------------------------------------------------------------------------------
@@ -20,214 +26,51 @@ import numpy as np
 
 st.set_page_config(page_title = 'Visão Empresa', page_icon = '📊', layout = 'wide')
 
-# ==============================================================================
-# Functions
-# ==============================================================================
-
-# ------------------------------------------------------------------------------
-# Limpandos os dados 
-# ------------------------------------------------------------------------------
-def clean_code(df):
-    
-    """ Está função tem a responsabilidade de limpar o dafaframe.
-        
-        Tipos de limpezas:
-        1. Remoção dos dados NaN;
-        2. Mudança do tipo da coluna de dados;
-        3. Remoção dos espaços das variáveis de texto;
-        4. Formatação da coluna de datas;
-        5. Limpeza da coluna de tempo (remoção do teto da variável numérica).
-        
-        Input: Dataframe
-        Output: Dataframe
-    """
-    
-    # Eliminar espaços dos textos
-    
-    df.loc[:, 'ID'] = df.loc[:, 'ID'].str.strip()
-    df.loc[:, 'Delivery_person_ID'] = df.loc[:, 'Delivery_person_ID'].str.strip()
-    df.loc[:, 'Road_traffic_density'] = df.loc[:, 'Road_traffic_density'].str.strip()
-    df.loc[:, 'Type_of_order'] = df.loc[:, 'Type_of_order'].str.strip()
-    df.loc[:, 'Type_of_vehicle'] = df.loc[:, 'Type_of_vehicle'].str.strip()
-    df.loc[:, 'City'] = df.loc[:, 'City'].str.strip()
-    df.loc[:, 'Weatherconditions'] = df.loc[:, 'Weatherconditions'].str.strip()
-    df.loc[:, 'multiple_deliveries'] = df.loc[:, 'multiple_deliveries'].str.strip()
-    df.loc[:, 'Festival'] = df.loc[:, 'Festival'].str.strip()
-    df.loc[:, 'Delivery_person_Age'] = df.loc[:, 'Delivery_person_Age'].str.strip()
-    df.loc[:, 'Delivery_person_Ratings'] = df.loc[:, 'Delivery_person_Ratings'].str.strip()
-
-    # Excluindo Linhas com Dados NaN
-
-    linhas_nao_vazias = df['Weatherconditions'] != 'conditions NaN'
-    df = df.loc[linhas_nao_vazias,:]
-    linhas_nao_vazias = df['multiple_deliveries'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Festival'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['City'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Delivery_person_Age'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Delivery_person_Ratings'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-
-    # Remover o texto (min) da coluna Time Taken
-
-    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df['Time_taken(min)'] = df['Time_taken(min)'].astype(int)
-
-    # Conversão de texto / categoria / string para números inteiros e decimais
-
-    df['Delivery_person_Age']= df['Delivery_person_Age'].astype(int)
-    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype(float)
-
-    # Conversão de texto / string para datas
-
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
-    
-    return df
-
-# ------------------------------------------------------------------------------
-# Desenhar um gráfico de barra
-# ------------------------------------------------------------------------------
-
-def order_metric(df):
-    # criar o gráfico
-    order_by_date = df.loc[:,['ID', 'Order_Date']].groupby('Order_Date').count().reset_index()
-    fig = px.bar(order_by_date,
-                 x='Order_Date',
-                 y='ID',
-                 labels={'Order_Date': 'Date', 'ID': 'Order Quantity'},
-                 template='plotly_white')
-
-    return fig
-
-
-# ------------------------------------------------------------------------------
-# Gerar uma Fig - Agrupamento duas colunas - Pie Plot
-# ------------------------------------------------------------------------------
-
-def traffic_order_share(df):
-
-    order_by_road_traffic_density = (df.loc[:, ['ID', 'Road_traffic_density']]
-                                     .groupby('Road_traffic_density')
-                                     .count()
-                                     .reset_index())
-
-    # Criar uma coluna com o valor % para inserir no gráfico
-    order_by_road_traffic_density['percent_delivery'] = (order_by_road_traffic_density['ID'] /
-                                                         order_by_road_traffic_density['ID']
-                                                         .sum())
-
-    fig = px.pie(order_by_road_traffic_density, values='percent_delivery', names='Road_traffic_density')
-
-    return fig
-
-
-# ------------------------------------------------------------------------------
-# Gerar uma Fig - Agrupamento duas colunas - Scatter Plot
-# ------------------------------------------------------------------------------
-
-def traffic_order_city(df):
-
-    delivery_by_city_by_road_traffic = (df.loc[:, ['ID', 'City', 'Road_traffic_density']]
-                                        .groupby(['City', 'Road_traffic_density'])
-                                        .count()
-                                        .reset_index())
-
-    fig = px.scatter(delivery_by_city_by_road_traffic,
-                     x='City',
-                     y='Road_traffic_density',
-                     size='ID',
-                     color='City',
-                     template='plotly_white')
-                
-    return fig
-
+# Tempos das etapas (?profile=1 ou CURRY_PROFILE=1)
+perf = start_page('Visão Empresa')
 
-# ------------------------------------------------------------------------------
-# Gerar uma Fig - Line Plot
-# ------------------------------------------------------------------------------
-
-def order_share_by_week(df):
-
-    # contar quantos pedidos foram entregues por semana
-    delivery_by_week = (df.loc[:, ['ID', 'week_of_year']]
-                        .groupby('week_of_year')
-                        .count()
-                        .reset_index())
-
-    # contar quanto entregadores únicos fizeram entregas na semanas
-    delivery_by_person = (df.loc[:, ['Delivery_person_ID', 'week_of_year']]
-                          .groupby('week_of_year')
-                          .nunique()
-                          .reset_index())
-
-    # unir os dois dataframes
-    delivery_by_week_by_person = pd.merge(delivery_by_week, delivery_by_person, how='inner')
-
-    # criar uma coluna com a média de entrega realizado por entregadores únicos por semana
-    delivery_by_week_by_person['order_by_delivery'] = (delivery_by_week_by_person['ID'] /
-                                                       delivery_by_week_by_person['Delivery_person_ID'])
-
-    # plotar o gráfico de linhas
-    fig = px.line(delivery_by_week_by_person,
-                  x='week_of_year',
-                  y='order_by_delivery',
-                  template='plotly_white',
-                  labels={'week_of_year': 'Week of Year', 'order_by_delivery':'Order Quantity'})
-
-    return fig
+# API JSON das métricas no mesmo processo (somente com CURRY_API_PORT definida)
+start_server_from_env()
 
-# ------------------------------------------------------------------------------
-# Gerar uma Fig - Line Plot
-# ------------------------------------------------------------------------------
-
-def order_by_week(df):
-    df['week_of_year'] = df['Order_Date'].dt.strftime('%U')
-
-    order_by_week = df.loc[:, ['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-    fig = px.line(order_by_week, x='week_of_year', y='ID')
-    return fig
+# Versão nova do CSV limpa e trocada em segundo plano (CURRY_WATCH_INTERVAL=0 desliga); esta execução
+# usa do início ao fim a versão ativa agora, mesmo que a troca aconteça no meio dela
+start_watcher_from_env()
+perf.call('pin_dataset', pin_dataset)
 
+# ==============================================================================
+# Functions
+# ==============================================================================
 
 # ------------------------------------------------------------------------------
 # Gerar um Mapa
 # ------------------------------------------------------------------------------
 
-def map_country(df):
-    localizacao_media_entregas = (df.loc[:, ['Delivery_location_latitude',
-                                             'Delivery_location_longitude',
-                                             'City', 'Road_traffic_density']]
-                              .groupby(['City', 'Road_traffic_density'])
-                              .median()
-                              .reset_index())
+def map_country(df, filtros, modo='median'):
 
-    map = folium.Map()
+    # HTML do mapa em cache por versão do dataset, filtros e modo
+    with current().phase(f'map_html.{modo}', rows=len(df)):
+        html = map_html(df, modo, cache_key=(dataset_version(), normalize_filters(filtros)))
 
-    for index, location_info in localizacao_media_entregas.iterrows():
-        folium.Marker([location_info['Delivery_location_latitude'],
-                       location_info['Delivery_location_longitude']],
-                      popup = location_info[['City',
-                                             'Road_traffic_density']]).add_to(map)
+    with current().phase('components.html'):
+        components.html(html, width=1024, height=610)
 
-    folium_static(map, width=1024, height=600)
-
-    return map
+    return html
 
 # ==============================================================================
 # Inicio da Estrutura Lógica
 # ==============================================================================
 
-# Import Dataset
+# Índice de datas (o dataset fica ordenado por Order_Date) e bitmaps dos filtros
+# (o dataset é lido e limpo uma vez por processo)
 # ------------------------------------------------------------------------------
 
-df = pd.read_csv('dataset/train.csv')
+date_index = perf.call('load_date_index', load_date_index)
+bitmaps = perf.call('load_bitmaps', load_bitmaps)
 
-# Limpando os dados
+# Cubo de pedidos (agregado uma vez por processo)
 # ------------------------------------------------------------------------------
 
-df = clean_code(df)
+cube = perf.call('load_cube', load_cube)
 
 # ==============================================================================
 # Barra Lateral
@@ -235,57 +78,26 @@ df = clean_code(df)
 
 st.header('Marketplace - Visão Cliente')
 
-# Imagem do Logo que está na Side Bar
-# image_path = '/Users/fabioldossantos/Documents/repos/ftc_programacao_pythologo.png'
-image = Image.open('logo.png')
-st.sidebar.image(image, width=180)
+filtros = render_sidebar(date_index, bitmaps)
 
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""---""")
+# Estado dos dados (versão do dataset + filtros): chave do cache de resultados
+estado = result_state(filtros)
 
-# ------------------------------------------------------------------------------
-# Criar Filtros
-
-st.sidebar.markdown('### Selecione uma data limite')
-data_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value = pd.datetime(2022,4,13),
-    min_value = pd.datetime(2022, 2, 11),
-    max_value = pd.datetime(2022, 4, 6),
-    format = 'DD-MM-YYYY')
-
-st.sidebar.markdown("""---""")
-
-traffic_options = st.sidebar.multiselect(
-    'Quais as condições do trânsito?',
-    ['Low', 'Medium', 'High', 'Jam'],
-    default = ['Low', 'Medium', 'High', 'Jam'])
-
-# Filtro de Datas
-linhas_selecionadas = df['Order_Date'] < data_slider
-df = df.loc[linhas_selecionadas, :]
-
-# Filtro de transito
-linhas_selecionadas = df['Road_traffic_density'].isin(traffic_options)
-df = df.loc[linhas_selecionadas,:]
-
-
-st.sidebar.markdown("""---""")
-
-st.sidebar.markdown('### Powered by Comunidade DS')
+# Filtros de datas e categorias aplicados às células do cubo
+cube = perf.call('cube.slice', cached_call, estado, cube.slice, **filtros)
 
 # ==============================================================================
 # Layout no Streamlit
 # ==============================================================================
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'])
+# Somente a seção selecionada é calculada (st.tabs calcularia as três a cada interação)
+secao = select_section(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'], key='empresa_secao')
 
 # ------------------------------------------------------------------------------
 # Criando a primeira Tab
 # ------------------------------------------------------------------------------
 
-with tab1:
+if secao == 'Visão Gerencial':
     # Order Metric
 
 # ------------------------------------------------------------------------------
@@ -294,10 +106,10 @@ with tab1:
     with st.container(): # criar um container
         st.markdown('## Order by Day')
         
-        fig = order_metric(df)
+        fig = perf.call('order_metric', cached_call, estado, order_metric, cube)
         
         # usar função para plotar o gráfico
-        st.plotly_chart(fig, use_container_width=True)
+        perf.call('plotly_chart.order_metric', st.plotly_chart, fig, use_container_width=True)
 
 # ------------------------------------------------------------------------------
 # Segundo Container - primeiro gráfico
@@ -308,9 +120,9 @@ with tab1:
         with col1:
             st.header('Traffic Order Share')
             
-            fig = traffic_order_share(df)
+            fig = perf.call('traffic_order_share', cached_call, estado, traffic_order_share, cube)
             
-            st.plotly_chart(fig, use_container_width=True)
+            perf.call('plotly_chart.traffic_order_share', st.plotly_chart, fig, use_container_width=True)
             
 # ------------------------------------------------------------------------------
 # Segundo Container - segundo gráfico
@@ -318,15 +130,15 @@ with tab1:
         with col2:
             st.header('Traffic Order City')
             
-            fig = traffic_order_city(df)
+            fig = perf.call('traffic_order_city', cached_call, estado, traffic_order_city, cube)
             
-            st.plotly_chart(fig, use_container_with=True)
+            perf.call('plotly_chart.traffic_order_city', st.plotly_chart, fig, use_container_with=True)
     
 # ------------------------------------------------------------------------------
 # Criando a segunda Tab
 # ------------------------------------------------------------------------------
 
-with tab2:
+elif secao == 'Visão Tática':
     
 # ------------------------------------------------------------------------------
 # Primeiro Container
@@ -334,8 +146,8 @@ with tab2:
     with st.container():
         st.markdown('## Order by Week')
         
-        fig = order_by_week(df)
-        st.plotly_chart(fig, use_container_with=True)
+        fig = perf.call('order_by_week', cached_call, estado, order_by_week, cube)
+        perf.call('plotly_chart.order_by_week', st.plotly_chart, fig, use_container_with=True)
 
 # ------------------------------------------------------------------------------
 # Segundo Container
@@ -343,9 +155,9 @@ with tab2:
     with st.container():
         st.markdown('## Order Share by Week')
         
-        fig = order_share_by_week(df)
+        fig = perf.call('order_share_by_week', cached_call, estado, order_share_by_week, cube)
         
-        st.plotly_chart(fig, use_container_with=True)
+        perf.call('plotly_chart.order_share_by_week', st.plotly_chart, fig, use_container_with=True)
     
 # ------------------------------------------------------------------------------
 # Criando a teceira Tab
@@ -354,7 +166,26 @@ with tab2:
 # ------------------------------------------------------------------------------
 # Criando o Mapa
 
-with tab3:
+elif secao == 'Visão Geográfica':
     st.markdown('## Country Maps')
-    
-    map_country(df)
+
+    # O mapa precisa das linhas, que não ficam em memória no modo streaming
+    if streaming_enabled():
+        st.info(f'O mapa não está disponível no modo streaming (dataset maior que a memória). '
+                f'Defina {STREAMING_ENV}=0 para carregar as linhas.')
+    else:
+        df = perf.call('load_dataset', load_dataset)
+
+        # Filtros de datas e categorias: busca binária + bitmaps; uma fatia de datas é uma visão do
+        # dataset compartilhado, e com seleções só as colunas do mapa são copiadas
+        df = perf.call('select_rows', select_rows, df, date_index, bitmaps, columns=MAP_COLUMNS, **filtros)
+
+        modo = st.radio('Modo do mapa', list(MAP_MODES), format_func=MAP_MODES.get, horizontal=True)
+
+        map_country(df, filtros, modo)
+
+# ==============================================================================
+# Painel de Desempenho (somente com a instrumentação ligada)
+# ==============================================================================
+
+finish_page(perf, cleaning_timings())
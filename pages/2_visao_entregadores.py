@@ -2,16 +2,19 @@
 # Libraries
 # ==============================================================================
 
-import pandas as pd
-import re
-import plotly.express as px
-import folium
-from haversine import haversine
 import streamlit as st
-from PIL import Image
-from streamlit_folium import folium_static
-import plotly.graph_objects as go
-import numpy as np
+
+from core.filters import load_bitmaps, load_date_index
+from core.loader import cleaning_timings, pin_dataset
+from core.profiling import finish_page, start_page
+from core.results import cached_call, result_state
+from core.sections import select_section
+from core.server import start_server_from_env
+from core.sidebar import render_sidebar
+from core.stats import load_ratings_stats
+from core.watcher import start_watcher_from_env
+from views.entregadores import (courier_metrics, ratings_by_courier, ratings_by_traffic,
+                                ratings_by_weather, top_delivery)
 
 
 # ------------------------------------------------------------------------------
@@ -20,127 +23,31 @@ import numpy as np
 
 st.set_page_config(page_title = 'Visão Entregadores', page_icon = '📈', layout = 'wide')
 
-# ==============================================================================
-# Functions
-# ==============================================================================
-
-# ------------------------------------------------------------------------------
-# Limpandos os dados 
-# ------------------------------------------------------------------------------
-def clean_code(df):
-    
-    """ Está função tem a responsabilidade de limpar o dafaframe.
-        
-        Tipos de limpezas:
-        1. Remoção dos dados NaN;
-        2. Mudança do tipo da coluna de dados;
-        3. Remoção dos espaços das variáveis de texto;
-        4. Formatação da coluna de datas;
-        5. Limpeza da coluna de tempo (remoção do teto da variável numérica).
-        
-        Input: Dataframe
-        Output: Dataframe
-    """
-    
-    # Eliminar espaços dos textos
-    
-    df.loc[:, 'ID'] = df.loc[:, 'ID'].str.strip()
-    df.loc[:, 'Delivery_person_ID'] = df.loc[:, 'Delivery_person_ID'].str.strip()
-    df.loc[:, 'Road_traffic_density'] = df.loc[:, 'Road_traffic_density'].str.strip()
-    df.loc[:, 'Type_of_order'] = df.loc[:, 'Type_of_order'].str.strip()
-    df.loc[:, 'Type_of_vehicle'] = df.loc[:, 'Type_of_vehicle'].str.strip()
-    df.loc[:, 'City'] = df.loc[:, 'City'].str.strip()
-    df.loc[:, 'Weatherconditions'] = df.loc[:, 'Weatherconditions'].str.strip()
-    df.loc[:, 'multiple_deliveries'] = df.loc[:, 'multiple_deliveries'].str.strip()
-    df.loc[:, 'Festival'] = df.loc[:, 'Festival'].str.strip()
-    df.loc[:, 'Delivery_person_Age'] = df.loc[:, 'Delivery_person_Age'].str.strip()
-    df.loc[:, 'Delivery_person_Ratings'] = df.loc[:, 'Delivery_person_Ratings'].str.strip()
-
-    # Excluindo Linhas com Dados NaN
-
-    linhas_nao_vazias = df['Weatherconditions'] != 'conditions NaN'
-    df = df.loc[linhas_nao_vazias,:]
-    linhas_nao_vazias = df['multiple_deliveries'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Festival'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['City'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Delivery_person_Age'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Delivery_person_Ratings'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-
-    # Remover o texto (min) da coluna Time Taken
+# Tempos das etapas (?profile=1 ou CURRY_PROFILE=1)
+perf = start_page('Visão Entregadores')
 
-    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df['Time_taken(min)'] = df['Time_taken(min)'].astype(int)
-
-    # Conversão de texto / categoria / string para números inteiros e decimais
-
-    df['Delivery_person_Age']= df['Delivery_person_Age'].astype(int)
-    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype(float)
-
-    # Conversão de texto / string para datas
-
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
-    
-    return df
-
-# ------------------------------------------------------------------------------
-# Top Entregadores
-# ------------------------------------------------------------------------------
-
-def top_delivery(df1, top_asc):
-
-    """ Esta função calcula o top entregadores da base de dados, por cidade.
-
-    Parâmetros:
-       Input:
-           - df: Dataframe com os dados necessários para o cálculo
-           - top_asc: Parâmetro que determina a classificação da base de dados.
-               - True: Os entregadores mais rápidos.
-               - False: Os entregadores mais lentos
-       Output:
-           - dataframe: um dataframe com a cidade, os IDs dos 10 entregadores e o tempo de entrega.
-           
-       """
-    
-    
-    selecao = (df.loc[:, ['Delivery_person_ID', 'City', 'Time_taken(min)']]
-     .groupby(['City', 'Delivery_person_ID'])
-     .min()
-     .sort_values(['City', 'Time_taken(min)'], ascending = top_asc)
-     .reset_index())
+# API JSON das métricas no mesmo processo (somente com CURRY_API_PORT definida)
+start_server_from_env()
 
-    urban = selecao.loc[selecao['City'] == 'Urban', :].head(10)
-    metropolitan = selecao.loc[selecao['City'] == 'Metropolitian', :].head(10)
-    semi_urban = selecao.loc[selecao['City'] == 'Semi-Urban', :].head(10)
-
-    dados = pd.concat([urban, metropolitan, semi_urban]).reset_index(drop = True)
-
-    return dados
-
-
-# ==============================================================================
-# Import Dataset
-# ==============================================================================
-
-df = pd.read_csv('dataset/train.csv')
+# Versão nova do CSV limpa e trocada em segundo plano (CURRY_WATCH_INTERVAL=0 desliga); esta execução
+# usa do início ao fim a versão ativa agora, mesmo que a troca aconteça no meio dela
+start_watcher_from_env()
+perf.call('pin_dataset', pin_dataset)
 
 # ==============================================================================
 # Inicio da Estrutura Lógica
 # ==============================================================================
 
-# Import Dataset
+# Índice de datas e bitmaps dos filtros (o dataset é lido e limpo uma vez por processo)
 # ------------------------------------------------------------------------------
 
-df = pd.read_csv('dataset/train.csv')
+date_index = perf.call('load_date_index', load_date_index)
+bitmaps = perf.call('load_bitmaps', load_bitmaps)
 
-# Limpando os dados
+# Estatísticas dos entregadores: avaliações, tempos, idade e veículo (acumuladas uma vez por processo)
 # ------------------------------------------------------------------------------
 
-df = clean_code(df)
+ratings_stats = perf.call('load_ratings_stats', load_ratings_stats)
 
 # ==============================================================================
 # Barra Lateral
@@ -148,78 +55,45 @@ df = clean_code(df)
 
 st.header('Marketplace - Visão Cliente')
 
-# Imagem do Logo que está na Side Bar
-# image_path = '/Users/fabioldossantos/Documents/repos/ftc_programacao_python/logo.png'
-image = Image.open('logo.png')
-st.sidebar.image(image, width=180)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""---""")
-
-# ------------------------------------------------------------------------------
-# Criar Filtros
-
-st.sidebar.markdown('### Selecione uma data limite')
-data_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value = pd.datetime(2022,4,13),
-    min_value = pd.datetime(2022, 2, 11),
-    max_value = pd.datetime(2022, 4, 6),
-    format = 'DD-MM-YYYY')
-
-st.sidebar.markdown("""---""")
-
-traffic_options = st.sidebar.multiselect(
-    'Quais as condições do trânsito?',
-    ['Low', 'Medium', 'High', 'Jam'],
-    default = ['Low', 'Medium', 'High', 'Jam'])
+filtros = render_sidebar(date_index, bitmaps)
 
-# Filtro de Datas
-linhas_selecionadas = df['Order_Date'] < data_slider
-df = df.loc[linhas_selecionadas, :]
+# Estado dos dados (versão do dataset + filtros): chave do cache de resultados
+estado = result_state(filtros)
 
-# Filtro de transito
-linhas_selecionadas = df['Road_traffic_density'].isin(traffic_options)
-df = df.loc[linhas_selecionadas,:]
-
-
-st.sidebar.markdown("""---""")
-
-st.sidebar.markdown('### Powered by Comunidade DS')
+# Filtros de datas e categorias aplicados às células das estatísticas (sem copiar linhas)
+ratings_stats = perf.call('ratings_stats.slice', cached_call, estado, ratings_stats.slice, **filtros)
 
 # ==============================================================================
 # Layout no Streamlit
 # ==============================================================================
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', '-', '-'])
+# Somente a seção selecionada é calculada
+secao = select_section(['Visão Gerencial', '-', '-'], key='entregadores_secao')
 
 
-with tab1:
+if secao == 'Visão Gerencial':
     
     with st.container():
         st.title('Overall Metrics')
         col1, col2, col3, col4 = st.columns(4, gap='large')
+
+        metricas = perf.call('courier_metrics', cached_call, estado, courier_metrics, ratings_stats)
         
         # Maior idade dos entregadores
         with col1:
-            maior_idade = df.loc[:,'Delivery_person_Age'].max()
-            col1.metric('Maior idade', maior_idade)
+            col1.metric('Maior idade', metricas['maior_idade'])
         
         # Menor idade dos entregadores
         with col2:
-            menor_idade= df.loc[:,'Delivery_person_Age'].min()
-            col2.metric('Menor idade', menor_idade)
+            col2.metric('Menor idade', metricas['menor_idade'])
         
         # Melhor Condição do Veículo
         with col3:
-            melhor_cond = df.loc[:,'Vehicle_condition'].max()
-            col3.metric('Melhor Codição Veic',  melhor_cond)
+            col3.metric('Melhor Codição Veic', metricas['melhor_cond'])
         
         # Pior Condição do Veículo
         with col4:
-            pior_cond = df.loc[:,'Vehicle_condition'].min()
-            col4.metric('Pior Condição Veic', pior_cond)
+            col4.metric('Pior Condição Veic', metricas['pior_cond'])
             
     with st.container():
         st.markdown("""---""")
@@ -229,43 +103,31 @@ with tab1:
         
         with col1:
             st.markdown('##### Avalições média por entregador')
-            avalicao_media = (df.loc[:, ['Delivery_person_ID', 'Delivery_person_Ratings']]
-                    .groupby('Delivery_person_ID')
-                    .mean()
-                    .reset_index())
+            avalicao_media = perf.call('ratings_by_courier', cached_call, estado, ratings_by_courier, ratings_stats)
             st.dataframe(avalicao_media)
             
         with col2:
             st.markdown('##### Avaliação média por trânsito')
-            mean_std_person_ratings = (df.loc[:, ['Delivery_person_Ratings','Road_traffic_density']]
-                                .groupby('Road_traffic_density')
-                                .agg({'Delivery_person_Ratings': ['mean', 'std']}))
-
-            mean_std_person_ratings.columns = ['mean_ratings', 'std_ratings']
-
-            mean_std_person_ratings.reset_index()
+            mean_std_person_ratings = perf.call('ratings_by_traffic', cached_call, estado, ratings_by_traffic, ratings_stats)
             st.dataframe(mean_std_person_ratings)
 
             
             st.markdown('##### Avaliação média por clima')
-            mean_std_person_ratings = (df.loc[:, ['Delivery_person_Ratings', 'Weatherconditions']]
-                               .groupby('Weatherconditions')
-                               .agg({'Delivery_person_Ratings': ['mean', 'std']}))
-
-            mean_std_person_ratings.columns = ['mean_Ratings', 'std_Ratings']
-            mean_std_person_ratings.reset_index()
-            
+            mean_std_person_ratings = perf.call('ratings_by_weather', cached_call, estado, ratings_by_weather, ratings_stats)
             st.dataframe(mean_std_person_ratings)
             
     with st.container():
         st.markdown("""---""")
         st.title('Velocidade de entrega')
         
+        # mais rápidos e mais lentos calculados juntos
+        mais_rapidos, mais_lentos = perf.call('top_delivery', cached_call, estado, top_delivery, ratings_stats, k=10)
+
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('##### Top Entregadores mais rápidos')
             
-            dados = top_delivery(df, True)
+            dados = mais_rapidos
             
             st.dataframe(dados)
             
@@ -274,6 +136,12 @@ with tab1:
             st.markdown('##### Top Entregadoers mais lentos')
             
             
-            dados = top_delivery(df, False)
+            dados = mais_lentos
             
             st.dataframe(dados)
+
+# ==============================================================================
+# Painel de Desempenho (somente com a instrumentação ligada)
+# ==============================================================================
+
+finish_page(perf, cleaning_timings())
@@ -2,16 +2,22 @@
 # Libraries
 # ==============================================================================
 
-import pandas as pd
-import re
-import plotly.express as px
-import folium
-from haversine import haversine
 import streamlit as st
-from PIL import Image
-from streamlit_folium import folium_static
-import plotly.graph_objects as go
-import numpy as np
+
+from core.concurrency import PageTasks
+from core.cube import load_cube
+from core.filters import FILTER_COLUMNS, load_bitmaps, load_date_index
+from core.loader import cleaning_timings, pin_dataset
+from core.profiling import finish_page, start_page
+from core.results import cached_call, result_state
+from core.sections import select_section
+from core.server import start_server_from_env
+from core.sidebar import render_sidebar
+from core.sketches import SKETCH_KEYS, load_sketches
+from core.watcher import start_watcher_from_env
+from views.restaurantes import (avg_st_time_delivery, avg_std_graph, avg_std_time_on_traffic, courier_count,
+                                distance, festival_time_stats, mean_distance_by_type_of_order_and_city,
+                                percentile_graph, time_percentiles)
 
 
 # ------------------------------------------------------------------------------
@@ -20,288 +26,34 @@ import numpy as np
 
 st.set_page_config(page_title = 'Visão Restaurantes', page_icon = '🥗', layout = 'wide')
 
-# ==============================================================================
-# Functions
-# ==============================================================================
-
-# ------------------------------------------------------------------------------
-# Limpandos os dados 
-# ------------------------------------------------------------------------------
-def clean_code(df):
-    
-    """ Está função tem a responsabilidade de limpar o dafaframe.
-        
-        Tipos de limpezas:
-        1. Remoção dos dados NaN;
-        2. Mudança do tipo da coluna de dados;
-        3. Remoção dos espaços das variáveis de texto;
-        4. Formatação da coluna de datas;
-        5. Limpeza da coluna de tempo (remoção do teto da variável numérica).
-        
-        Input: Dataframe
-        Output: Dataframe
-    """
-    
-    # Eliminar espaços dos textos
-    
-    df.loc[:, 'ID'] = df.loc[:, 'ID'].str.strip()
-    df.loc[:, 'Delivery_person_ID'] = df.loc[:, 'Delivery_person_ID'].str.strip()
-    df.loc[:, 'Road_traffic_density'] = df.loc[:, 'Road_traffic_density'].str.strip()
-    df.loc[:, 'Type_of_order'] = df.loc[:, 'Type_of_order'].str.strip()
-    df.loc[:, 'Type_of_vehicle'] = df.loc[:, 'Type_of_vehicle'].str.strip()
-    df.loc[:, 'City'] = df.loc[:, 'City'].str.strip()
-    df.loc[:, 'Weatherconditions'] = df.loc[:, 'Weatherconditions'].str.strip()
-    df.loc[:, 'multiple_deliveries'] = df.loc[:, 'multiple_deliveries'].str.strip()
-    df.loc[:, 'Festival'] = df.loc[:, 'Festival'].str.strip()
-    df.loc[:, 'Delivery_person_Age'] = df.loc[:, 'Delivery_person_Age'].str.strip()
-    df.loc[:, 'Delivery_person_Ratings'] = df.loc[:, 'Delivery_person_Ratings'].str.strip()
-
-    # Excluindo Linhas com Dados NaN
-
-    linhas_nao_vazias = df['Weatherconditions'] != 'conditions NaN'
-    df = df.loc[linhas_nao_vazias,:]
-    linhas_nao_vazias = df['multiple_deliveries'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Festival'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['City'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Delivery_person_Age'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-    linhas_nao_vazias = df['Delivery_person_Ratings'] != 'NaN'
-    df = df.loc[linhas_nao_vazias, :]
-
-    # Remover o texto (min) da coluna Time Taken
-
-    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df['Time_taken(min)'] = df['Time_taken(min)'].astype(int)
-
-    # Conversão de texto / categoria / string para números inteiros e decimais
-
-    df['Delivery_person_Age']= df['Delivery_person_Age'].astype(int)
-    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype(float)
-
-    # Conversão de texto / string para datas
-
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
-    
-    return df
-
-# ------------------------------------------------------------------------------
-# Distância entre pontos - Haversine
-# ------------------------------------------------------------------------------
-
-def distance(df, avg_by_city=''):
-    
-
-    """ Esta função calcula o distância média e o desvio padrão, entre dois pontos (resturantes e local da entrega).
-    Para a realização desse cálculo é utilizado a função de Haversine.
-
-    Parâmetros:
-       Input:
-           - df: Dataframe com os dados necessários para o cálculo
-               - Latitude e Longitude do restaurante
-               - Latitude e Longitude do local da entrega:
-           - avg_by_city:
-               - True: quando o resultado esperado deve ser feita a agregação por cidade
-               - False: quando o resultao esperado não deve ser feito a agregação por cidade
-           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
-               - 'avg_time': Calcula o tempo médio
-               - 'std_time': Calcula o desvio padrão do tempo
-       Output:
-           - Sem a agregação por cidade:
-               - df_aux: dataframe com a respectiva agregação, com as métricas média e desvio padrão da distância entre os dois pontos.
-           - Com a agregação por cidade:
-               - fig: objeto em um gráfico de pizza
-           
-           
-    """
-
-    
-    if avg_by_city == False:
-        
-        df['distance'] = (
-                df.loc[:, ['Restaurant_latitude',
-                           'Restaurant_longitude',
-                           'Delivery_location_latitude',
-                           'Delivery_location_longitude']]
-                    .apply(lambda x :
-                           haversine(
-                               (x['Restaurant_latitude'], x['Restaurant_longitude']),
-                               (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1))
-
-        avg_distance = np.round(df['distance'].mean(), 2)
-
-        return avg_distance
-    
-    else:
-
-        df['distance'] = (
-            df.loc[:, ['Restaurant_latitude',
-                       'Restaurant_longitude',
-                       'Delivery_location_latitude',
-                       'Delivery_location_longitude']]
-                .apply(lambda x :
-                       haversine(
-                           (x['Restaurant_latitude'], x['Restaurant_longitude']),
-                           (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1))
-
-        avg_distance = df.loc[:, ['City', 'distance']].groupby('City').mean().reset_index()
-
-        # avg_distance
-        # pull is given as a fraction of the pie radius
-        fig = go.Figure( data = [go.Pie(labels = avg_distance['City'], values = avg_distance['distance'], pull = [0.1, 0, 0])])
-        
-        return fig
-
-
-# ------------------------------------------------------------------------------
-# Calcular o a média ou o desvio padrão da entrega 
-# ------------------------------------------------------------------------------
-
-def avg_st_time_delivery(df, operacao, festival=''):
-
-    """ Esta função calcula o tempo médio e o desvio padrão de entrega.
-
-    Parâmetros:
-       Input:
-           - df: Dataframe com os dados necessários para o cálculo
-           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
-               - 'avg_time': Calcula o tempo médio
-               - 'std_time': Calcula o desvio padrão do tempo
-           - festival:
-               - 'Yes': Considerar as entregas de período que era durante o festival.
-               - 'No': Considerar as entregas de período que não foram de festival
-       Output:
-           - df: Dataframe com 2 colunas e 1 linha.
-
-    """
-
-    festival_time_taken = (df.loc[:, ['Time_taken(min)', 'Festival']]
-                                  .groupby('Festival')
-                                  .agg({'Time_taken(min)': ['mean', 'std']}))
-
-    festival_time_taken.columns = ['avg_time', 'std_time']
-
-    festival_time_taken = festival_time_taken.reset_index()
-
-    df_aux = np.round(festival_time_taken.loc[festival_time_taken['Festival'] == festival, operacao], 2)
-
-
-    return df_aux
-
-# ------------------------------------------------------------------------------
-# Gerar um fig para gráfico Sunburst - Avg City and Road Traffic Density 
-# ------------------------------------------------------------------------------
-
-
-def avg_std_time_on_traffic(df):
-    
-    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade e por tráfego.
-        Inseri as informações em um grafico de explosão solar
-
-    Parâmetros:
-       Input:
-           - df: Dataframe com os dados necessários para o cálculo
-           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
-               - 'avg_time': Calcula o tempo médio
-               - 'std_time': Calcula o desvio padrão do tempo
-       Output:
-           - fig de um gráfico de explosão solar (sunburst)
-
-    """
-
-    mean_std_time_taken_by_city_by_road_traffic_density = (df.loc[:, ['Time_taken(min)', 'City', 'Road_traffic_density']]
-                                                           .groupby(['City', 'Road_traffic_density'])
-                                                           .agg({'Time_taken(min)': ['mean', 'std']}))
-
-    mean_std_time_taken_by_city_by_road_traffic_density.columns = ['avg_time', 'std_time']
-    df_aux = mean_std_time_taken_by_city_by_road_traffic_density.reset_index()
-
-    fig = px.sunburst(df_aux, path = ['City', 'Road_traffic_density'],
-                      values = 'avg_time',
-                      color = 'std_time',
-                      color_continuous_scale = 'RdBu',
-                      color_continuous_midpoint = np.average(df_aux['std_time']))
-
-    return fig
-
-
-# ------------------------------------------------------------------------------
-# Gerar um fig para gráfico Barra - Erro - Distribuição do Tempo por Cidade
-# ------------------------------------------------------------------------------
-
-def avg_std_graph(df):
-
-    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade.
-        Inseri as informações em um grafico de barra (com a média) com a marcação de erro (desvio padrão).
-
-    Parâmetros:
-       Input:
-           - df: Dataframe com os dados necessários para o cálculo
-           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
-               - 'avg_time': Calcula o tempo médio
-               - 'std_time': Calcula o desvio padrão do tempol
-       Output:
-           - fig de um gráfico de barra (com a média) com a marcação de erro (desvio padrão).
-    """
-    
-    mean_std_time_taken_by_city = df.loc[:, ['Time_taken(min)', 'City']].groupby('City').agg({'Time_taken(min)': ['mean', 'std']})
-
-    mean_std_time_taken_by_city.columns = ['avg_time', 'std_time']
-    mean_std_time_taken_by_city = mean_std_time_taken_by_city.reset_index()
-
-    fig = go.Figure()
-    fig.add_trace( go.Bar( name = 'Control',
-                          x = mean_std_time_taken_by_city['City'],
-                          y = mean_std_time_taken_by_city['avg_time'],
-                          error_y = dict( type = 'data', array = mean_std_time_taken_by_city['std_time'])))
-
-    fig.update_layout(barmode = 'group')
-
-    return fig
-
-# ------------------------------------------------------------------------------
-# Gerar um Dataframe com a Distribuição da Distância por Cidade e Tipo de Ordem
-# ------------------------------------------------------------------------------
-
-def mean_distance_by_type_of_order_and_city(df):
+# Tempos das etapas (?profile=1 ou CURRY_PROFILE=1)
+perf = start_page('Visão Restaurantes')
 
-    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade e por tipo de ordem.
+# API JSON das métricas no mesmo processo (somente com CURRY_API_PORT definida)
+start_server_from_env()
 
-    Parâmetros:
-       Input:
-           - df: Dataframe com os dados necessários para o cálculo
-           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
-               - 'avg_time': Calcula o tempo médio
-               - 'std_time': Calcula o desvio padrão do tempo
-       Output:
-           - df_aux: dataframe com a agregação de cidade e tipo de ordem, com as métricas média e desvio padrão.
-           
-    """
-    
-    mean_std_time_taken_by_city_by_type_of_order = (df.loc[:, ['Time_taken(min)', 'City', 'Type_of_order']]
-                                                 .groupby(['City', 'Type_of_order'])
-                                                 .agg({'Time_taken(min)': ['mean', 'std']}))
-
-    mean_std_time_taken_by_city_by_type_of_order.columns = ['mean_time_taken', 'std_time_taken']
-    df_aux = mean_std_time_taken_by_city_by_type_of_order.reset_index()
-
-    return df_aux
+# Versão nova do CSV limpa e trocada em segundo plano (CURRY_WATCH_INTERVAL=0 desliga); esta execução
+# usa do início ao fim a versão ativa agora, mesmo que a troca aconteça no meio dela
+start_watcher_from_env()
+perf.call('pin_dataset', pin_dataset)
 
 # ==============================================================================
 # Inicio da Estrutura Lógica
 # ==============================================================================
 
-# Import Dataset
+# Cubo de pedidos (dataset lido, limpo e agregado uma vez por processo)
 # ------------------------------------------------------------------------------
 
-df = pd.read_csv('dataset/train.csv')
+cube = perf.call('load_cube', load_cube)
 
-# Limpando os dados
+# Resumos de quantis do tempo de entrega (t-digest por célula, fundidos para os percentis)
+sketches = perf.call('load_sketches', load_sketches)
+
+# Índice de datas e bitmaps (opções dos filtros)
 # ------------------------------------------------------------------------------
 
-df = clean_code(df)
+date_index = perf.call('load_date_index', load_date_index)
+bitmaps = perf.call('load_bitmaps', load_bitmaps)
 
 # ==============================================================================
 # Barra Lateral
@@ -309,98 +61,103 @@ df = clean_code(df)
 
 st.header('Marketplace - Visão Cliente')
 
-# Imagem do Logo que está na Side Bar
-# image_path = '/Users/fabioldossantos/Documents/repos/ftc_programacao_python/logo.png'
-image = Image.open('logo.png')
-st.sidebar.image(image, width=180)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""---""")
-
-# ------------------------------------------------------------------------------
-# Criar Filtros
-
-st.sidebar.markdown('### Selecione uma data limite')
-data_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value = pd.datetime(2022,4,13),
-    min_value = pd.datetime(2022, 2, 11),
-    max_value = pd.datetime(2022, 4, 6),
-    format = 'DD-MM-YYYY')
-
-st.sidebar.markdown("""---""")
-
-traffic_options = st.sidebar.multiselect(
-    'Quais as condições do trânsito?',
-    ['Low', 'Medium', 'High', 'Jam'],
-    default = ['Low', 'Medium', 'High', 'Jam'])
+filtros = render_sidebar(date_index, bitmaps)
 
-# Filtro de Datas
-linhas_selecionadas = df['Order_Date'] < data_slider
-df = df.loc[linhas_selecionadas, :]
+# Estado dos dados (versão do dataset + filtros): chave do cache de resultados
+estado = result_state(filtros)
 
-# Filtro de transito
-linhas_selecionadas = df['Road_traffic_density'].isin(traffic_options)
-df = df.loc[linhas_selecionadas,:]
+# Filtros de datas e categorias, aplicados às células do cubo
+cube = perf.call('cube.slice', cached_call, estado, cube.slice, **filtros)
+sketches = perf.call('sketches.slice', cached_call, estado, sketches.slice, **filtros)
 
-
-st.sidebar.markdown("""---""")
-
-st.sidebar.markdown('### Powered by Comunidade DS')
+# Filtros fora do grão dos resumos (clima, veículo) não se aplicam aos percentis
+filtros_sem_percentis = [coluna for coluna in FILTER_COLUMNS
+                         if coluna not in SKETCH_KEYS and set(filtros[coluna]) != set(bitmaps.values(coluna))]
 
 # ==============================================================================
 # Layout no Streamlit
 # ==============================================================================
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', '-', '-'])
+# Somente a seção selecionada é calculada
+secao = select_section(['Visão Gerencial', '-', '-'], key='restaurantes_secao')
 
 # ------------------------------------------------------------------------------
 # Criando a primeira Tab
 # ------------------------------------------------------------------------------
 
-with tab1:
+if secao == 'Visão Gerencial':
+
+    # Containers criados na ordem do layout e preenchidos quando os resultados chegam
+    metricas = st.container()
+    tempo_medio = st.container()
+    st.markdown("""---""")
+
+    percentis = st.container()
+    st.markdown("""---""")
+
+    distribuicao = select_section(["📈 Distribuição do tempo", "🗃 Distribuição da distância"],
+                                  key='restaurantes_distribuicao')
+    graficos_distribuicao = st.container()
+    st.markdown("""---""")
+
+    # Agregações e gráficos independentes calculados em paralelo (core.concurrency; CURRY_SESSION_WORKERS=0 desliga)
+    tasks = PageTasks(perf)
+
+    # estatísticas de tempo por festival, calculadas uma vez para as quatro métricas
+    festival_time_taken = tasks.submit('festival_time_stats', cached_call, estado, festival_time_stats, cube)
+    delivery_unic = tasks.submit('courier_count', cached_call, estado, courier_count, cube)
+    avg_distance = tasks.submit('distance', cached_call, estado, distance, cube, avg_by_city=False)
+    fig_distance_by_city = tasks.submit('distance_by_city', cached_call, estado, distance, cube, avg_by_city=True)
+    fig_time_on_traffic = tasks.submit('avg_std_time_on_traffic', cached_call, estado, avg_std_time_on_traffic, cube)
+    percentis_aux = tasks.submit('time_percentiles', cached_call, estado, time_percentiles, sketches)
+    fig_percentiles = tasks.submit('percentile_graph', cached_call, estado, percentile_graph, sketches)
+
+    if distribuicao == "📈 Distribuição do tempo":
+        distribuicao_aux = tasks.submit('avg_std_graph', cached_call, estado, avg_std_graph, cube)
+    else:
+        distribuicao_aux = tasks.submit('mean_distance_by_type_of_order_and_city', cached_call, estado,
+                                        mean_distance_by_type_of_order_and_city, cube)
     
 # ------------------------------------------------------------------------------
 # Primeiro Container - Métricas em Colunas
 
-    with st.container():
+    with metricas:
         st.title('Overall Metrics')
         
         col1, col2, col3, col4, col5, col6 = st.columns(6)
+
+        festival_time_taken = festival_time_taken.result()
         
         with col1:
            
-            delivery_unic = df.loc[:, 'Delivery_person_ID'].nunique()
-            col1.metric('Entregadores', delivery_unic)
+            col1.metric('Entregadores', delivery_unic.result())
             
         with col2:
             
-            avg_distance = distance(df, avg_by_city=False)
-            col2.metric('Distância Média', avg_distance)
+            col2.metric('Distância Média', avg_distance.result())
             
             
         with col3:
             
-            df_aux = avg_st_time_delivery(df, 'avg_time', 'Yes')            
+            df_aux = avg_st_time_delivery(festival_time_taken, 'avg_time', 'Yes')            
             col3.metric('Tempo Médio c/ Festival', df_aux)
                         
             
         with col4:
             
-            df_aux = avg_st_time_delivery(df, 'std_time', 'Yes')            
+            df_aux = avg_st_time_delivery(festival_time_taken, 'std_time', 'Yes')            
             col4.metric('STD c/ Festival', df_aux)
 
             
         with col5:
             
-            df_aux = avg_st_time_delivery(df, 'avg_time', 'No')            
+            df_aux = avg_st_time_delivery(festival_time_taken, 'avg_time', 'No')            
             col5.metric('Tempo Médio sem Festival', df_aux)
 
             
         with col6:
             
-            df_aux = avg_st_time_delivery(df, 'std_time', 'No')
+            df_aux = avg_st_time_delivery(festival_time_taken, 'std_time', 'No')
 
             col6.metric('STD sem Festival', df_aux)
         
@@ -411,42 +168,58 @@ with tab1:
 # Segundo Container - Gráfico de Pizza
 
 
-    with st.container():
+    with tempo_medio:
         st.title('Tempo médio de entrega')
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown('###### Por cidade')
-            fig = distance(df, avg_by_city=True)
-            st.plotly_chart(fig)
+            perf.call('plotly_chart.distance_by_city', st.plotly_chart, fig_distance_by_city.result())
  
             
         with col2:
             st.markdown('###### Por Densidade de Tráfego')
             
-            fig = avg_std_time_on_traffic(df)
-            st.plotly_chart(fig)
+            perf.call('plotly_chart.avg_std_time_on_traffic', st.plotly_chart, fig_time_on_traffic.result())
 
-        
-    st.markdown("""---""")
+# ------------------------------------------------------------------------------
+# Terceiro Container - Percentis do Tempo de Entrega
+
+    with percentis:
+        st.title('Percentis do tempo de entrega')
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            df_aux = percentis_aux.result()
+            for percentil in ['p50', 'p90', 'p99']:
+                col1.metric(f'{percentil} (min)', round(float(df_aux.loc[0, percentil]), 1))
+
+            if filtros_sem_percentis:
+                st.caption('Os percentis não consideram os filtros de ' + ', '.join(filtros_sem_percentis) + '.')
+
+        with col2:
+            st.markdown('###### Por cidade')
+            perf.call('plotly_chart.percentile_graph', st.plotly_chart, fig_percentiles.result())
 
 # ------------------------------------------------------------------------------
-# Terceiro Container
+# Quarto Container
 
-    tab1, tab2 = st.tabs(["📈 Distribuição do tempo", "🗃 Distribuição da distância"])
-    with st.container():
+    with graficos_distribuicao:
         
-        with tab1:            
+        if distribuicao == "📈 Distribuição do tempo":
             st.title('Distribuição do tempo')
         
-            fig = avg_std_graph(df)    
-            st.plotly_chart(fig)
+            perf.call('plotly_chart.avg_std_graph', st.plotly_chart, distribuicao_aux.result())
             
-        with tab2:
+        elif distribuicao == "🗃 Distribuição da distância":
             st.title('Distribuição da distância')
-            df_aux = mean_distance_by_type_of_order_and_city(df)
-            st.dataframe(df_aux)
-            
-    st.markdown("""---""")
-   
\ No newline at end of file
+            st.dataframe(distribuicao_aux.result())
+   
+
+# ==============================================================================
+# Painel de Desempenho (somente com a instrumentação ligada)
+# ==============================================================================
+
+finish_page(perf, cleaning_timings())
@@ -0,0 +1,6 @@
+""" Cálculos e gráficos das páginas do dashboard, sem dependência do Streamlit.
+
+    Cada módulo recebe os dados já filtrados (dataframe, cubo de pedidos ou
+    estatísticas agrupadas) e devolve dataframes ou figuras do plotly, para
+    que possam ser usados pelas páginas, pelos benchmarks e por scripts.
+"""
@@ -0,0 +1,191 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+from core.lazy import lazy_import
+
+# Importado só quando um gráfico é desenhado (core.lazy)
+px = lazy_import('plotly.express')
+
+
+# ==============================================================================
+# Functions - Dados
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Pedidos por dia e por semana
+# ------------------------------------------------------------------------------
+
+def orders_by_day(cube):
+
+    """ Esta função conta os pedidos por dia.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas Order_Date e orders
+    """
+
+    return cube.rollup(['Order_Date']).loc[:, ['Order_Date', 'orders']]
+
+
+def orders_by_week(cube):
+
+    """ Esta função conta os pedidos por semana do ano.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas week_of_year e orders
+    """
+
+    return cube.rollup(['week_of_year']).loc[:, ['week_of_year', 'orders']]
+
+
+def orders_per_courier_by_week(cube):
+
+    """ Esta função calcula, por semana, os pedidos por entregador distinto.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas week_of_year, orders, couriers e order_by_delivery
+    """
+
+    # contar pedidos e entregadores únicos por semana (união dos entregadores das células)
+    delivery_by_week_by_person = cube.rollup(['week_of_year'], couriers=True).loc[:, ['week_of_year', 'orders',
+                                                                                      'couriers']]
+
+    # criar uma coluna com a média de entrega realizado por entregadores únicos por semana
+    delivery_by_week_by_person['order_by_delivery'] = (delivery_by_week_by_person['orders'] /
+                                                       delivery_by_week_by_person['couriers'])
+
+    return delivery_by_week_by_person
+
+
+# ------------------------------------------------------------------------------
+# Pedidos por trânsito e por cidade
+# ------------------------------------------------------------------------------
+
+def traffic_share(cube):
+
+    """ Esta função calcula a participação de cada densidade de tráfego nos pedidos.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas Road_traffic_density, orders e percent_delivery
+    """
+
+    order_by_road_traffic_density = cube.rollup(['Road_traffic_density']).loc[:, ['Road_traffic_density', 'orders']]
+
+    # Criar uma coluna com o valor % para inserir no gráfico
+    order_by_road_traffic_density['percent_delivery'] = (order_by_road_traffic_density['orders'] /
+                                                         order_by_road_traffic_density['orders']
+                                                         .sum())
+
+    return order_by_road_traffic_density
+
+
+def orders_by_city_traffic(cube):
+
+    """ Esta função conta os pedidos por cidade e densidade de tráfego.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas City, Road_traffic_density (como texto) e orders
+    """
+
+    delivery_by_city_by_road_traffic = (cube.rollup(['City', 'Road_traffic_density'])
+                                            .loc[:, ['City', 'Road_traffic_density', 'orders']])
+
+    # o plotly agrupa pela coluna de cor: como texto, cidades fora do filtro não viram grupos vazios
+    delivery_by_city_by_road_traffic[['City', 'Road_traffic_density']] = (delivery_by_city_by_road_traffic
+                                                                          [['City', 'Road_traffic_density']]
+                                                                          .astype(str))
+
+    return delivery_by_city_by_road_traffic
+
+
+# ==============================================================================
+# Functions - Gráficos
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Desenhar um gráfico de barra
+# ------------------------------------------------------------------------------
+
+def order_metric(cube):
+    # criar o gráfico a partir do cubo (pedidos por dia)
+    order_by_date = orders_by_day(cube)
+    fig = px.bar(order_by_date,
+                 x='Order_Date',
+                 y='orders',
+                 labels={'Order_Date': 'Date', 'orders': 'Order Quantity'},
+                 template='plotly_white')
+
+    return fig
+
+
+# ------------------------------------------------------------------------------
+# Gerar uma Fig - Agrupamento duas colunas - Pie Plot
+# ------------------------------------------------------------------------------
+
+def traffic_order_share(cube):
+
+    order_by_road_traffic_density = traffic_share(cube)
+
+    fig = px.pie(order_by_road_traffic_density, values='percent_delivery', names='Road_traffic_density')
+
+    return fig
+
+
+# ------------------------------------------------------------------------------
+# Gerar uma Fig - Agrupamento duas colunas - Scatter Plot
+# ------------------------------------------------------------------------------
+
+def traffic_order_city(cube):
+
+    delivery_by_city_by_road_traffic = orders_by_city_traffic(cube)
+
+    fig = px.scatter(delivery_by_city_by_road_traffic,
+                     x='City',
+                     y='Road_traffic_density',
+                     size='orders',
+                     color='City',
+                     template='plotly_white')
+
+    return fig
+
+
+# ------------------------------------------------------------------------------
+# Gerar uma Fig - Line Plot
+# ------------------------------------------------------------------------------
+
+def order_share_by_week(cube):
+
+    delivery_by_week_by_person = orders_per_courier_by_week(cube)
+
+    # plotar o gráfico de linhas
+    fig = px.line(delivery_by_week_by_person,
+                  x='week_of_year',
+                  y='order_by_delivery',
+                  template='plotly_white',
+                  labels={'week_of_year': 'Week of Year', 'order_by_delivery':'Order Quantity'})
+
+    return fig
+
+# ------------------------------------------------------------------------------
+# Gerar uma Fig - Line Plot
+# ------------------------------------------------------------------------------
+
+def order_by_week(cube):
+    order_by_week = orders_by_week(cube)
+    fig = px.line(order_by_week, x='week_of_year', y='orders')
+    return fig
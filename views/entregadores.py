@@ -0,0 +1,138 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+
+from core.ranking import top_bottom_k
+
+
+# ==============================================================================
+# Functions
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Métricas gerais dos entregadores
+# ------------------------------------------------------------------------------
+
+def courier_metrics(ratings_stats):
+
+    """ Esta função calcula as métricas gerais dos entregadores (idade e condição do veículo).
+
+    Parâmetros:
+       Input:
+           - ratings_stats: estatísticas dos entregadores (core.stats.GroupedStats) já filtradas
+       Output:
+           - dicionário com maior_idade, menor_idade, melhor_cond e pior_cond
+             (NaN quando os filtros não deixam nenhum pedido)
+    """
+
+    total = ratings_stats.rollup([]).iloc[0]
+
+    # Filtros sem nenhum pedido: mínimos e máximos ficam NaN (mostrados como nan, como antes do cubo)
+    def inteiro(valor):
+        return np.nan if total[ratings_stats.count_column] == 0 or np.isnan(valor) else int(valor)
+
+    return {'maior_idade': inteiro(total['age_max']),
+            'menor_idade': inteiro(total['age_min']),
+            'melhor_cond': inteiro(total['condition_max']),
+            'pior_cond': inteiro(total['condition_min'])}
+
+
+# ------------------------------------------------------------------------------
+# Avaliação média por entregador
+# ------------------------------------------------------------------------------
+
+def ratings_by_courier(ratings_stats):
+
+    """ Esta função calcula a avaliação média de cada entregador.
+
+    Parâmetros:
+       Input:
+           - ratings_stats: estatísticas das avaliações (core.stats.GroupedStats) já filtradas
+       Output:
+           - df_aux: dataframe com as colunas Delivery_person_ID e Delivery_person_Ratings
+    """
+
+    df_aux = (ratings_stats.rollup(['Delivery_person_ID'])
+                  .loc[:, ['Delivery_person_ID', 'ratings_mean']]
+                  .rename(columns={'ratings_mean': 'Delivery_person_Ratings'}))
+
+    return df_aux
+
+
+# ------------------------------------------------------------------------------
+# Avaliação média e desvio padrão por trânsito e por clima
+# ------------------------------------------------------------------------------
+
+def ratings_by_traffic(ratings_stats):
+
+    """ Esta função calcula a média e o desvio padrão das avaliações por densidade de tráfego.
+
+    Parâmetros:
+       Input:
+           - ratings_stats: estatísticas das avaliações (core.stats.GroupedStats) já filtradas
+       Output:
+           - df_aux: dataframe indexado por Road_traffic_density, com as colunas mean_ratings e std_ratings
+    """
+
+    df_aux = (ratings_stats.rollup(['Road_traffic_density'])
+                  .set_index('Road_traffic_density')
+                  .loc[:, ['ratings_mean', 'ratings_std']])
+
+    df_aux.columns = ['mean_ratings', 'std_ratings']
+
+    return df_aux
+
+
+def ratings_by_weather(ratings_stats):
+
+    """ Esta função calcula a média e o desvio padrão das avaliações por condição climática.
+
+    Parâmetros:
+       Input:
+           - ratings_stats: estatísticas das avaliações (core.stats.GroupedStats) já filtradas
+       Output:
+           - df_aux: dataframe indexado por Weatherconditions, com as colunas mean_Ratings e std_Ratings
+    """
+
+    df_aux = (ratings_stats.rollup(['Weatherconditions'])
+                  .set_index('Weatherconditions')
+                  .loc[:, ['ratings_mean', 'ratings_std']])
+
+    df_aux.columns = ['mean_Ratings', 'std_Ratings']
+
+    return df_aux
+
+
+# ------------------------------------------------------------------------------
+# Top Entregadores
+# ------------------------------------------------------------------------------
+
+def top_delivery(ratings_stats, k=10):
+
+    """ Esta função calcula o top entregadores da base de dados, por cidade.
+
+        O tempo de cada entregador em cada cidade é o menor tempo de entrega,
+        que vem das células das estatísticas (time_min), sem voltar às linhas.
+        Os mais rápidos e os mais lentos saem de uma única passada, com seleção
+        parcial por cidade (core.ranking.top_bottom_k), para todas as cidades
+        existentes nos dados.
+
+    Parâmetros:
+       Input:
+           - ratings_stats: estatísticas dos entregadores (core.stats.GroupedStats) já filtradas
+           - k: quantidade de entregadores por cidade
+       Output:
+           - (mais_rapidos, mais_lentos): dois dataframes com a cidade, os IDs dos k entregadores
+             e o tempo de entrega.
+
+       """
+
+    df_aux = (ratings_stats.rollup(['City', 'Delivery_person_ID'])
+                  .rename(columns={'time_min': 'Time_taken(min)'})
+                  .astype({'Time_taken(min)': 'int64'}))
+
+    mais_rapidos, mais_lentos = top_bottom_k(df_aux, 'City', 'Delivery_person_ID', 'Time_taken(min)', k=k)
+
+    return mais_rapidos, mais_lentos
@@ -0,0 +1,381 @@
+# ==============================================================================
+# Libraries
+# ==============================================================================
+
+import numpy as np
+
+from core.lazy import lazy_import
+
+# Importados só quando um gráfico é desenhado (core.lazy)
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+
+# ==============================================================================
+# Functions - Dados
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Entregadores distintos
+# ------------------------------------------------------------------------------
+
+def courier_count(cube):
+
+    """ Esta função conta os entregadores distintos das células do cubo.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - quantidade de entregadores distintos (int)
+    """
+
+    return int(cube.rollup([], couriers=True).loc[0, 'couriers'])
+
+
+# ------------------------------------------------------------------------------
+# Média e desvio padrão da distância (geral e por cidade)
+# ------------------------------------------------------------------------------
+
+def distance_stats(cube):
+
+    """ Esta função calcula a distância média e o desvio padrão entre restaurante e local da entrega.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe de uma linha com as colunas avg_distance e std_distance (km)
+    """
+
+    return (cube.rollup([])
+                .rename(columns={'distance_mean': 'avg_distance', 'distance_std': 'std_distance'})
+                .loc[:, ['avg_distance', 'std_distance']])
+
+
+def distance_by_city(cube):
+
+    """ Esta função calcula a distância média e o desvio padrão por cidade.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas City, avg_distance e std_distance (km)
+    """
+
+    return (cube.rollup(['City'])
+                .rename(columns={'distance_mean': 'avg_distance', 'distance_std': 'std_distance'})
+                .loc[:, ['City', 'avg_distance', 'std_distance']])
+
+
+# ------------------------------------------------------------------------------
+# Média e desvio padrão do tempo de entrega por cidade (e por tráfego)
+# ------------------------------------------------------------------------------
+
+def time_by_city(cube):
+
+    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas City, avg_time e std_time
+    """
+
+    return (cube.rollup(['City'])
+                .rename(columns={'time_mean': 'avg_time', 'time_std': 'std_time'})
+                .loc[:, ['City', 'avg_time', 'std_time']])
+
+
+def time_by_city_traffic(cube):
+
+    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade e por tráfego.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - df_aux: dataframe com as colunas City, Road_traffic_density (como texto), avg_time e std_time
+    """
+
+    df_aux = (cube.rollup(['City', 'Road_traffic_density'])
+                  .rename(columns={'time_mean': 'avg_time', 'time_std': 'std_time'})
+                  .loc[:, ['City', 'Road_traffic_density', 'avg_time', 'std_time']])
+
+    # o sunburst agrupa pelas colunas do path: como texto, evita nós vazios de category
+    df_aux[['City', 'Road_traffic_density']] = df_aux[['City', 'Road_traffic_density']].astype(str)
+
+    return df_aux
+
+
+# ------------------------------------------------------------------------------
+# Percentis do tempo de entrega (geral, por cidade e por tráfego)
+# ------------------------------------------------------------------------------
+
+def _percentiles(sketches, by):
+
+    df_aux = sketches.rollup(by)
+    colunas = {c: c[len('time_'):] for c in df_aux.columns if c.startswith('time_p')}
+
+    return df_aux.rename(columns=colunas).loc[:, list(by) + ['orders'] + list(colunas.values())]
+
+
+def time_percentiles(sketches):
+
+    """ Esta função estima os percentis p50, p90 e p99 do tempo de entrega.
+
+    Parâmetros:
+       Input:
+           - sketches: resumos de quantis (core.sketches.QuantileSketches) já filtrados
+       Output:
+           - df_aux: dataframe de uma linha com as colunas orders, p50, p90 e p99 (min)
+    """
+
+    return _percentiles(sketches, [])
+
+
+def time_percentiles_by_city(sketches):
+
+    """ Esta função estima os percentis p50, p90 e p99 do tempo de entrega por cidade.
+
+    Parâmetros:
+       Input:
+           - sketches: resumos de quantis (core.sketches.QuantileSketches) já filtrados
+       Output:
+           - df_aux: dataframe com as colunas City, orders, p50, p90 e p99 (min)
+    """
+
+    return _percentiles(sketches, ['City'])
+
+
+def time_percentiles_by_city_traffic(sketches):
+
+    """ Esta função estima os percentis p50, p90 e p99 do tempo de entrega por cidade e por tráfego.
+
+    Parâmetros:
+       Input:
+           - sketches: resumos de quantis (core.sketches.QuantileSketches) já filtrados
+       Output:
+           - df_aux: dataframe com as colunas City, Road_traffic_density, orders, p50, p90 e p99 (min)
+    """
+
+    return _percentiles(sketches, ['City', 'Road_traffic_density'])
+
+
+# ==============================================================================
+# Functions - Métricas e Gráficos
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Distância entre pontos - Haversine
+# ------------------------------------------------------------------------------
+
+def distance(cube, avg_by_city=''):
+    
+
+    """ Esta função calcula o distância média e o desvio padrão, entre dois pontos (resturantes e local da entrega).
+    Usa a distância Haversine (distance_km) já agregada nas células do cubo de pedidos.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+           - avg_by_city:
+               - True: quando o resultado esperado deve ser feita a agregação por cidade
+               - False: quando o resultao esperado não deve ser feito a agregação por cidade
+           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
+               - 'avg_time': Calcula o tempo médio
+               - 'std_time': Calcula o desvio padrão do tempo
+       Output:
+           - Sem a agregação por cidade:
+               - df_aux: dataframe com a respectiva agregação, com as métricas média e desvio padrão da distância entre os dois pontos.
+           - Com a agregação por cidade:
+               - fig: objeto em um gráfico de pizza
+           
+           
+    """
+
+    
+    if avg_by_city == False:
+
+        avg_distance = np.round(distance_stats(cube).loc[0, 'avg_distance'], 2)
+
+        return avg_distance
+    
+    else:
+
+        avg_distance = distance_by_city(cube)
+
+        # avg_distance
+        # pull is given as a fraction of the pie radius
+        fig = go.Figure( data = [go.Pie(labels = avg_distance['City'], values = avg_distance['avg_distance'], pull = [0.1, 0, 0])])
+        
+        return fig
+
+
+# ------------------------------------------------------------------------------
+# Calcular o tempo médio e o desvio padrão da entrega, com e sem festival
+# ------------------------------------------------------------------------------
+
+def festival_time_stats(cube):
+
+    """ Esta função calcula, uma única vez, o tempo médio e o desvio padrão de entrega por festival.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+       Output:
+           - festival_time_taken: dataframe com as colunas Festival, avg_time e std_time
+
+    """
+
+    festival_time_taken = (cube.rollup(['Festival'])
+                               .rename(columns={'time_mean': 'avg_time', 'time_std': 'std_time'})
+                               .loc[:, ['Festival', 'avg_time', 'std_time']])
+
+    return festival_time_taken
+
+
+# ------------------------------------------------------------------------------
+# Selecionar a média ou o desvio padrão da entrega 
+# ------------------------------------------------------------------------------
+
+def avg_st_time_delivery(festival_time_taken, operacao, festival=''):
+
+    """ Esta função seleciona o tempo médio ou o desvio padrão de entrega.
+
+    Parâmetros:
+       Input:
+           - festival_time_taken: Dataframe gerado por festival_time_stats
+           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
+               - 'avg_time': Calcula o tempo médio
+               - 'std_time': Calcula o desvio padrão do tempo
+           - festival:
+               - 'Yes': Considerar as entregas de período que era durante o festival.
+               - 'No': Considerar as entregas de período que não foram de festival
+       Output:
+           - df: Dataframe com 2 colunas e 1 linha.
+
+    """
+
+    df_aux = np.round(festival_time_taken.loc[festival_time_taken['Festival'] == festival, operacao], 2)
+
+
+    return df_aux
+
+# ------------------------------------------------------------------------------
+# Gerar um fig para gráfico Sunburst - Avg City and Road Traffic Density 
+# ------------------------------------------------------------------------------
+
+
+def avg_std_time_on_traffic(cube):
+    
+    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade e por tráfego.
+        Inseri as informações em um grafico de explosão solar
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
+               - 'avg_time': Calcula o tempo médio
+               - 'std_time': Calcula o desvio padrão do tempo
+       Output:
+           - fig de um gráfico de explosão solar (sunburst)
+
+    """
+
+    df_aux = time_by_city_traffic(cube)
+
+    fig = px.sunburst(df_aux, path = ['City', 'Road_traffic_density'],
+                      values = 'avg_time',
+                      color = 'std_time',
+                      color_continuous_scale = 'RdBu',
+                      color_continuous_midpoint = np.average(df_aux['std_time']))
+
+    return fig
+
+
+# ------------------------------------------------------------------------------
+# Gerar um fig para gráfico Barra - Erro - Distribuição do Tempo por Cidade
+# ------------------------------------------------------------------------------
+
+def avg_std_graph(cube):
+
+    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade.
+        Inseri as informações em um grafico de barra (com a média) com a marcação de erro (desvio padrão).
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
+               - 'avg_time': Calcula o tempo médio
+               - 'std_time': Calcula o desvio padrão do tempol
+       Output:
+           - fig de um gráfico de barra (com a média) com a marcação de erro (desvio padrão).
+    """
+    
+    mean_std_time_taken_by_city = time_by_city(cube)
+
+    fig = go.Figure()
+    fig.add_trace( go.Bar( name = 'Control',
+                          x = mean_std_time_taken_by_city['City'],
+                          y = mean_std_time_taken_by_city['avg_time'],
+                          error_y = dict( type = 'data', array = mean_std_time_taken_by_city['std_time'])))
+
+    fig.update_layout(barmode = 'group')
+
+    return fig
+
+# ------------------------------------------------------------------------------
+# Gerar um fig para gráfico Barra - Percentis do Tempo por Cidade
+# ------------------------------------------------------------------------------
+
+def percentile_graph(sketches):
+
+    """ Esta função estima os percentis p50, p90 e p99 do tempo de entrega por cidade.
+        Inseri as informações em um grafico de barras agrupadas (uma barra por percentil).
+
+    Parâmetros:
+       Input:
+           - sketches: resumos de quantis (core.sketches.QuantileSketches) já filtrados
+       Output:
+           - fig de um gráfico de barras agrupadas
+    """
+
+    percentis_by_city = time_percentiles_by_city(sketches)
+
+    fig = go.Figure()
+    for percentil in ['p50', 'p90', 'p99']:
+        fig.add_trace(go.Bar(name = percentil,
+                             x = percentis_by_city['City'],
+                             y = percentis_by_city[percentil].round(1)))
+
+    fig.update_layout(barmode = 'group', yaxis_title = 'min')
+
+    return fig
+
+# ------------------------------------------------------------------------------
+# Gerar um Dataframe com a Distribuição da Distância por Cidade e Tipo de Ordem
+# ------------------------------------------------------------------------------
+
+def mean_distance_by_type_of_order_and_city(cube):
+
+    """ Esta função calcula o tempo médio e o desvio padrão de entrega por cidade e por tipo de ordem.
+
+    Parâmetros:
+       Input:
+           - cube: cubo de pedidos (core.cube.OrderCube) já filtrado
+           - operacao: Tipo de operação que precisa ser calculado, sendo elas:
+               - 'avg_time': Calcula o tempo médio
+               - 'std_time': Calcula o desvio padrão do tempo
+       Output:
+           - df_aux: dataframe com a agregação de cidade e tipo de ordem, com as métricas média e desvio padrão.
+           
+    """
+    
+    df_aux = (cube.rollup(['City', 'Type_of_order'])
+                  .rename(columns={'time_mean': 'mean_time_taken', 'time_std': 'std_time_taken'})
+                  .loc[:, ['City', 'Type_of_order', 'mean_time_taken', 'std_time_taken']])
+
+    return df_aux